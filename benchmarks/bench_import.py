@@ -0,0 +1,58 @@
+"""
+Benchmark of the time a fresh interpreter spends importing coinsta modules.
+
+Every module is imported in a new process so nothing is cached between runs. The heavy
+dependencies loaded by the import are listed, `coinsta.core` must not load any of them.
+
+Run with: python -m benchmarks.bench_import [--repeat N] [--max-ms MS]
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+MODULES = ['coinsta.core', 'coinsta.config', 'coinsta.cache', 'coinsta.aio', 'pandas']
+HEAVY = ['pandas', 'numpy', 'lxml', 'requests', 'aiohttp']
+
+_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import {0}
+elapsed = time.perf_counter() - started
+print(json.dumps({{'ms': elapsed * 1000, 'loaded': [m for m in {1!r} if m in sys.modules]}}))
+"""
+
+
+def _import_once(module):
+    output = subprocess.check_output([sys.executable, '-c', _SCRIPT.format(module, HEAVY)])
+    return json.loads(output.decode())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help='number of fresh interpreters per module')
+    parser.add_argument('--max-ms', type=float, help='fail when importing coinsta.core takes longer than this')
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module in MODULES:
+        try:
+            runs = [_import_once(module) for _ in range(args.repeat)]
+        except subprocess.CalledProcessError:
+            print("{0:<16} {1:>9}".format(module, 'n/a'))
+            continue
+
+        best = min(run['ms'] for run in runs)
+        loaded = ', '.join(runs[0]['loaded']) or '-'
+        print("{0:<16} {1:>9.1f} ms  heavy dependencies: {2}".format(module, best, loaded))
+
+        if module == 'coinsta.core':
+            failed = bool(runs[0]['loaded']) or (args.max_ms is not None and best > args.max_ms)
+
+    if failed:
+        print("coinsta.core imports heavy dependencies or exceeds the time budget")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
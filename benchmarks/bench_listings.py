@@ -0,0 +1,51 @@
+"""
+Benchmark of the typed listings flattening against the json_normalize path for large listings.
+
+Run with: python -m benchmarks.bench_listings [--limit N] [--repeat N]
+"""
+import argparse
+import timeit
+import tracemalloc
+import pandas as pd
+from pandas import json_normalize
+from benchmarks.fixtures import listings
+from coinsta.utils import _listings_frame
+
+
+def _json_normalize_path(data):
+    df = pd.DataFrame.from_records(data)
+    main_df = df.drop('quote', axis='columns')
+    expanded_df = json_normalize(df['quote'])
+    return pd.concat([main_df, expanded_df], axis='columns')
+
+
+def _peak_memory(func, data):
+    tracemalloc.start()
+    func(data)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--limit', type=int, default=5000, help='number of listings')
+    parser.add_argument('--repeat', type=int, default=5, help='number of timed runs per path')
+    args = parser.parse_args(argv)
+
+    data = listings(args.limit)
+    paths = [
+        ('json_normalize', _json_normalize_path),
+        ('typed', _listings_frame),
+        ('typed 3 columns', lambda d: _listings_frame(d, columns=['symbol', 'cmc_rank', 'USD.price']))
+    ]
+
+    for name, func in paths:
+        best = min(timeit.repeat(lambda: func(data), number=1, repeat=args.repeat))
+        peak = _peak_memory(func, data)
+        print("{0:<16} {1:>9.2f} ms {2:>9.1f} MiB peak  ({3} listings)".format(name, best * 1000, peak / 2 ** 20,
+                                                                           args.limit))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Benchmark of the streaming table extractor against the pd.read_html path on the recorded fixture pages,
+followed by the time the batch cleaning stage spends on the extracted table alone.
+
+Run with: python -m benchmarks.bench_tables [--rows N] [--repeat N]
+"""
+import argparse
+import timeit
+from io import StringIO
+import pandas as pd
+from benchmarks.fixtures import historical_page
+from coinsta.tables import _clean_historical, _extract_table, _is_historical_table, _read_historical
+
+
+def _read_html_path(html):
+    df = pd.read_html(StringIO(html))[-1]
+    df['Date'] = pd.to_datetime(df['Date'])
+    df.rename({"Open*": "Open", "Close**": "Close", "Market Cap": "Market_cap"}, axis='columns', inplace=True)
+    df.set_index('Date', drop=True, inplace=True)
+    df.sort_index(inplace=True)
+    return df
+
+
+def _extractor_path(html):
+    return _read_historical([html.encode()])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=2000, help='number of days in the benchmarked table')
+    parser.add_argument('--repeat', type=int, default=5, help='number of timed runs per path')
+    args = parser.parse_args(argv)
+
+    html = historical_page(args.rows)
+
+    results = {}
+    for name, func in [('pd.read_html', _read_html_path), ('extractor', _extractor_path)]:
+        best = min(timeit.repeat(lambda: func(html), number=1, repeat=args.repeat))
+        results[name] = best
+        print("{0:<14} {1:>9.2f} ms  ({2} rows)".format(name, best * 1000, args.rows))
+
+    print("speed up: {0:.1f}x".format(results['pd.read_html'] / results['extractor']))
+
+    table = _extract_table([html.encode()], match=_is_historical_table)
+    best = min(timeit.repeat(lambda: _clean_historical([table]), number=1, repeat=args.repeat))
+    print("{0:<14} {1:>9.2f} ms  ({2} rows)".format('cleaning only', best * 1000, args.rows))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Recorded CoinMarketCap pages and API responses shared by the benchmarks.
+"""
+import copy
+import json
+import os
+from datetime import datetime, timedelta
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests', 'fixtures')
+
+
+def read(name):
+    """
+    Returns the content of a fixture file as a string.
+    """
+    with open(os.path.join(FIXTURES, name)) as f:
+        return f.read()
+
+
+def load(name):
+    """
+    Returns the decoded content of a JSON fixture file.
+    """
+    return json.loads(read(name))
+
+
+def historical_page(rows, end=None):
+    """
+    Returns the historical fixture page with its rows repeated to cover `rows` days up to `end`.
+    """
+    html = read('historical.html')
+    head, rest = html.rsplit('<tbody>\n', 1)
+    body, tail = rest.split('\n</tbody>', 1)
+
+    lines = body.splitlines()
+    lines = (lines * (rows // len(lines) + 1))[:rows]
+
+    # Rewrite the dates so that the page covers the requested days, most recent first
+    day = end or datetime(2020, 1, 1)
+    template_date = datetime(2018, 3, 1)
+    for i, line in enumerate(lines):
+        recorded = (template_date - timedelta(days=i % 60)).strftime('%b %d, %Y')
+        lines[i] = line.replace(recorded, (day - timedelta(days=i)).strftime('%b %d, %Y'), 1)
+
+    return head + '<tbody>\n' + '\n'.join(lines) + '\n</tbody>' + tail
+
+
+def listings(limit, start=1):
+    """
+    Returns `limit` listings records starting at rank `start`, cycling through the recorded coins.
+    """
+    data = load('listings.json')['data']
+
+    records = []
+    for rank in range(start, start + limit):
+        record = copy.deepcopy(data[(rank - 1) % len(data)])
+        record['id'] = rank
+        record['cmc_rank'] = rank
+        if rank > len(data):
+            record['symbol'] = '{0}{1}'.format(record['symbol'], rank)
+        records.append(record)
+    return records
@@ -0,0 +1,138 @@
+"""
+Offline benchmarks of coinsta against the local CoinMarketCap stand-in.
+
+Every scenario is timed call by call to report throughput, p50/p99 latency and the peak
+memory traced during one call. Results can be saved as JSON and compared between releases.
+
+Run with: python -m benchmarks.run [--iterations N] [--latency S] [--error-rate R] [--json out.json]
+                                   [--compare previous.json] [--only name ...]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+import numpy as np
+import coinsta.utils
+from benchmarks.server import StandInServer
+from coinsta.config import set_config
+from coinsta.core import Current, Historical, HistoricalSnapshot
+from coinsta.utils import _ticker_checker
+
+TICKERS = ['BTC', 'ETH', 'XRP', 'USDT', 'BCH', 'USDC']
+
+
+def _scenarios(current):
+    directory = coinsta.utils._SLUG_DIRECTORY
+
+    def ticker_checker_cold():
+        # Drop both the in-memory index and its copy on disk so the directory is downloaded
+        directory.clear()
+        if os.path.exists(directory.path_for()):
+            os.remove(directory.path_for())
+        return _ticker_checker('btc')
+
+    def snapshot_cold():
+        HistoricalSnapshot.cache.clear()
+        return HistoricalSnapshot(date(2018, 7, 29)).get_snapshot()
+
+    many = ['{0}{1}'.format(TICKERS[i % len(TICKERS)], i + 1) if i >= len(TICKERS) else TICKERS[i]
+            for i in range(100)]
+
+    return [
+        ('ticker_checker (cold)', ticker_checker_cold),
+        ('ticker_checker (warm)', lambda: _ticker_checker('eth')),
+        ('Historical.get_data 1y', lambda: Historical('btc', date(2019, 1, 1), date(2019, 12, 31)).get_data()),
+        ('Historical.get_data 5y', lambda: Historical('btc', date(2015, 1, 1), date(2019, 12, 31)).get_data()),
+        ('HistoricalSnapshot (cold)', snapshot_cold),
+        ('Current.get_current', lambda: current.get_current('btc')),
+        ('Current.get_current_many 100', lambda: current.get_current_many(many)),
+        ('Current.global_info', current.global_info),
+        ('Current.top_100', current.top_100),
+        ('Current.top_100 5000', lambda: current.top_100(limit=5000)),
+    ]
+
+
+def _measure(func, iterations):
+    # Warm the connection pool and any lazy imports before timing
+    func()
+
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        call_started = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - call_started)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'throughput': iterations / elapsed,
+        'p50_ms': float(np.percentile(latencies, 50)) * 1000,
+        'p99_ms': float(np.percentile(latencies, 99)) * 1000,
+        'peak_mib': peak / 2 ** 20
+    }
+
+
+def _print(results, previous=None):
+    print("{0:<30} {1:>10} {2:>10} {3:>10} {4:>10}".format('scenario', 'calls/s', 'p50 ms', 'p99 ms', 'peak MiB'))
+
+    for name, result in results.items():
+        line = "{0:<30} {1[throughput]:>10.1f} {1[p50_ms]:>10.2f} {1[p99_ms]:>10.2f} {1[peak_mib]:>10.2f}".format(
+            name, result)
+
+        if previous and name in previous:
+            line += "  p50 x{0:.2f}".format(result['p50_ms'] / previous[name]['p50_ms'])
+
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=20, help='timed calls per scenario')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of responses answered with a 503')
+    parser.add_argument('--json', help='file the results are written to')
+    parser.add_argument('--compare', help='results of a previous run to compare the p50 latency with')
+    parser.add_argument('--only', nargs='*', help='substrings of the scenarios to run')
+    args = parser.parse_args(argv)
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)['results']
+
+    with StandInServer(latency=args.latency, error_rate=args.error_rate) as server, \
+            tempfile.TemporaryDirectory() as tmp:
+
+        config = set_config(server.config(backoff=0.01))
+        coinsta.utils._SLUG_DIRECTORY.path = os.path.join(tmp, 'slugs.json')
+        coinsta.utils._SLUG_DIRECTORY.clear()
+
+        current = Current('stand-in-key', config=config)
+
+        results = {}
+        for name, func in _scenarios(current):
+            if args.only and not any(pattern in name for pattern in args.only):
+                continue
+            results[name] = _measure(func, args.iterations)
+
+        requests_served = server.requests
+
+    _print(results, previous)
+    print("\n{0} requests served".format(requests_served))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'coinsta': coinsta.__version__, 'latency': args.latency, 'error_rate': args.error_rate,
+                       'iterations': args.iterations, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+"""
+A local stand-in for the CoinMarketCap website and Pro API serving the recorded fixtures.
+
+The server answers the historical data, snapshot and `/all/views/all/` pages as well as the
+quotes, listings and global metrics endpoints. Latency and errors can be injected to measure
+how coinsta behaves on a slow or flaky upstream.
+"""
+import json
+import random
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from benchmarks import fixtures
+from coinsta.config import Config
+
+# Value of one US dollar in the currencies the stand-in converts to, others are rejected like upstream
+RATES = {'USD': 1.0, 'EUR': 0.9, 'GBP': 0.8, 'JPY': 110.0, 'BTC': 1 / 30000.0, 'ETH': 1 / 2000.0}
+
+# Quote fields expressed in the converted currency
+_MONEY_FIELDS = ('price', 'volume_24h', 'market_cap', 'total_market_cap', 'total_volume_24h',
+                 'total_volume_24h_reported', 'altcoin_volume_24h', 'altcoin_volume_24h_reported',
+                 'altcoin_market_cap')
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately, without this every response waits on a delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server.stand_in
+        server.requests += 1
+
+        if server.latency:
+            time.sleep(server.latency)
+
+        if server.error_rate and server.random.random() < server.error_rate:
+            return self._send(503, 'text/plain', b'Service Unavailable')
+
+        parts = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        path = parts.path.rstrip('/')
+
+        try:
+            if path.startswith('/currencies/') and path.endswith('/historical-data'):
+                body = self._historical(query)
+            elif path.startswith('/historical/'):
+                body = fixtures.read('snapshot.html')
+            elif path == '/all/views/all':
+                body = fixtures.read('all.html')
+            elif path == '/v1/cryptocurrency/quotes/latest':
+                return self._json(self._converted(self._quotes(query), query))
+            elif path == '/v1/cryptocurrency/listings/latest':
+                return self._json(self._converted(self._listings(query), query))
+            elif path == '/v1/global-metrics/quotes/latest':
+                return self._json(self._converted(fixtures.load('global.json'), query))
+            else:
+                return self._send(404, 'text/plain', b'Not Found')
+        except (KeyError, ValueError):
+            return self._send(400, 'text/plain', b'Bad Request')
+
+        self._send(200, 'text/html; charset=utf-8', body.encode())
+
+    def _send(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, payload):
+        self._send(200, 'application/json', json.dumps(payload).encode())
+
+    @staticmethod
+    def _historical(query):
+        start = datetime.strptime(query['start'], '%Y%m%d')
+        end = datetime.strptime(query['end'], '%Y%m%d')
+        return fixtures.historical_page((end - start).days + 1, end=end)
+
+    @staticmethod
+    def _status(credits=1, error_code=0, error_message=None):
+        return {'timestamp': datetime.utcnow().isoformat() + 'Z', 'error_code': error_code,
+                'error_message': error_message, 'elapsed': 1, 'credit_count': credits, 'notice': None}
+
+    def _converted(self, payload, query):
+        currencies = query.get('convert', 'USD').upper().split(',')
+        if any(currency not in RATES for currency in currencies):
+            return {'status': self._status(0, 400, 'Invalid value for "convert"')}
+
+        if payload['status']['error_code']:
+            return payload
+
+        def convert(item):
+            usd = item['quote']['USD']
+            item = dict(item)
+            item['quote'] = {currency: {key: value * RATES[currency] if key in _MONEY_FIELDS and value else value
+                                        for key, value in usd.items()}
+                             for currency in currencies}
+            return item
+
+        data = payload['data']
+        if isinstance(data, list):
+            data = [convert(coin) for coin in data]
+        elif 'quote' in data:
+            data = convert(data)
+        else:
+            data = {symbol: convert(coin) for symbol, coin in data.items()}
+
+        payload = dict(payload, data=data)
+        payload['status'] = dict(payload['status'], credit_count=payload['status']['credit_count'] * len(currencies))
+        return payload
+
+    def _quotes(self, query):
+        known = self.server.stand_in.symbols
+        symbols = query['symbol'].split(',')
+
+        data = {symbol: known[symbol] for symbol in symbols if symbol in known}
+        if len(data) < len(symbols) and query.get('skip_invalid') != 'true':
+            return {'status': self._status(0, 400, 'Invalid value for "symbol"')}
+
+        return {'status': self._status(), 'data': data}
+
+    def _listings(self, query):
+        limit = int(query.get('limit', 100))
+        start = int(query.get('start', 1))
+        total = self.server.stand_in.universe
+        limit = max(0, min(limit, total - start + 1))
+        return {'status': self._status(1 + limit // 200), 'data': fixtures.listings(limit, start)}
+
+
+class StandInServer:
+    """
+    A threaded HTTP server standing in for CoinMarketCap on a local port.
+    """
+
+    def __init__(self, latency=0.0, error_rate=0.0, universe=10000, seed=0):
+        """
+        :param latency: Seconds added before every response.
+        :param error_rate: Share of the requests (0 to 1) answered with a 503.
+        :param universe: Number of coins served by the listings endpoint.
+        :param seed: Seed of the error injection so runs are reproducible.
+        """
+        self.latency = latency
+        self.error_rate = error_rate
+        self.universe = universe
+        self.random = random.Random(seed)
+        self.requests = 0
+        # Built once so the quotes endpoint does not spend the benchmark time generating coins
+        self.symbols = {record['symbol']: record for record in fixtures.listings(500)}
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.stand_in = self
+        self._thread = None
+
+    def __repr__(self):
+        return "<StandInServer({0}, latency={1}, error_rate={2})>".format(self.url, self.latency, self.error_rate)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return 'http://{0}:{1}'.format(host, port)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='coinsta-stand-in', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def config(self, **options):
+        """
+        Returns a configuration sending every request of coinsta to this server.
+
+        :param options: Any other argument of the Config constructor
+        :return: A Config object
+        """
+        return Config(web_url=self.url, api_url=self.url, **options)
@@ -0,0 +1,4 @@
+import sys
+from coinsta.cli import main
+
+sys.exit(main())
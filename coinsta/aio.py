@@ -0,0 +1,365 @@
+import asyncio
+from datetime import date
+from coinsta.config import get_config
+from coinsta.core import Historical, _QUOTE_COLUMNS, _chunk_records
+from coinsta.exceptions import WrongCoinCode, BadSnapshotURL
+from coinsta.lazy import _lazy_import
+from coinsta.tables import _read_historical, _read_snapshot
+from coinsta.utils import _ticker_checker, _quote_record, _global_record, _listings_frame, _currencies, _merge_quotes, \
+    _historical_url, _snapshot_url, _http_error, _check_api_status, _api_json, _retry_after, _SLUG_DIRECTORY
+
+pd = _lazy_import('pandas')
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+def _client_timeout(timeout):
+    """
+    A function that turns a timeout of the configuration into an aiohttp.ClientTimeout.
+
+    :param timeout: Seconds, or a (connect, read) tuple as accepted by requests
+    :return: An aiohttp.ClientTimeout object
+    """
+    if isinstance(timeout, (tuple, list)):
+        connect, read = timeout
+        return aiohttp.ClientTimeout(sock_connect=connect, sock_read=read)
+    return aiohttp.ClientTimeout(total=timeout)
+
+
+class AsyncClient:
+    """
+    A non-blocking HTTP client shared by the asyncio counterparts of the coinsta classes.
+
+    The number of requests in flight is bounded by a semaphore so that `asyncio.gather`
+    over many tickers does not flood CoinMarketCap.
+    """
+
+    def __init__(self, concurrency=10, timeout=None, session=None, config=None):
+        """
+        :param concurrency: Maximum number of requests in flight at the same time.
+        :param timeout: Seconds (or a (connect, read) tuple) to wait for CoinMarketCap before giving up.
+                        Defaults to the configuration.
+        :param session: An optional aiohttp.ClientSession to reuse, one is created lazily otherwise.
+        :param config: An optional Config object whose timeout and headers are used, the global configuration
+                       otherwise.
+        """
+        if aiohttp is None:
+            raise ImportError("coinsta.aio requires aiohttp. Install it with `pip install coinsta[aio]`")
+
+        config = config or get_config()
+
+        self.concurrency = concurrency
+        self.timeout = timeout if timeout is not None else config.timeout
+        self.headers = dict(config.headers)
+        self._session = session
+        self._owns_session = session is None
+        self._semaphore = None
+
+    def __repr__(self):
+        return "<AsyncClient(concurrency={0}, timeout={1})>".format(self.concurrency, self.timeout)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def get_text(self, url, params=None, headers=None):
+        """
+        Performs a GET request without blocking the event loop.
+
+        :param url: HTTP link to request
+        :param params: Optional dictionary of query parameters
+        :param headers: Optional dictionary of headers
+        :return: A tuple of the HTTP status code and the body as a string
+        """
+        status, text, _ = await self.get(url, params=params, headers=headers)
+        return status, text
+
+    async def get(self, url, params=None, headers=None):
+        """
+        Performs a GET request without blocking the event loop and keeps the response headers.
+
+        :param url: HTTP link to request
+        :param params: Optional dictionary of query parameters
+        :param headers: Optional dictionary of headers
+        :return: A tuple of the HTTP status code, the body as a string and the response headers
+        """
+        # Both objects bind to the running loop so they are only built once we are inside it
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.concurrency)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=_client_timeout(self.timeout))
+
+        async with self._semaphore:
+            async with self._session.get(url, params=params, headers=dict(self.headers, **(headers or {}))) \
+                    as response:
+                return response.status, await response.text(), response.headers
+
+    async def close(self):
+        """
+        Closes the underlying aiohttp session when it is owned by the client.
+        """
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class AsyncHistorical(Historical):
+    """
+    The asyncio counterpart of Historical.
+    """
+
+    def __init__(self, ticker, start, end=None, client=None, config=None, strict=False):
+        """
+        :param ticker: str object representing ticker information.
+        :param start: a Datetime date object representing YYYYMMDD.
+        :param end: a Datetime date object representing YYYYMMDD.
+        :param client: An AsyncClient shared between instances to bound the requests in flight.
+        :param config: An optional Config object holding the website url, the global configuration otherwise.
+        :param strict: Boolean (default=False) indicating whether a ticker missing from the CoinMarketCap directory
+                       raises WrongCoinCode before any download.
+        """
+        super().__init__(ticker, start, end, config=config, strict=strict)
+        self.client = client
+
+    def __repr__(self):
+        return "<AsyncHistorical({0}, {1}, {2})>".format(self.ticker, self.start, self.end)
+
+    async def get_data(self):
+        """
+        This coroutine scrapes and cleans the data of the specified ticker
+        from CoinMarketCap website.
+
+        :return: A Pandas DataFrame object containing historical data on the specified ticker.
+        """
+        loop = asyncio.get_running_loop()
+
+        # The directory is usually in memory, only a cold start downloads it
+        slug = await loop.run_in_executor(None, _ticker_checker, self.ticker, self.strict, self.config)
+
+        site_url = _historical_url(slug, self.start, self.end, self.config)
+
+        client = self.client or AsyncClient(config=self.config)
+        try:
+            status, text = await client.get_text(site_url)
+        finally:
+            if self.client is None:
+                await client.close()
+
+        if status >= 400:
+            error = _http_error(status, site_url,
+                                WrongCoinCode("'{0}' is unavailable on CoinMarketCap.com. "
+                                              "Please check the website for the right ticker name".format(slug)))
+            if isinstance(error, WrongCoinCode):
+                _SLUG_DIRECTORY.mark_unavailable(slug, self.config)
+            raise error
+
+        return await loop.run_in_executor(None, _read_historical, [text])
+
+
+class AsyncHistoricalSnapshot:
+    """
+    The asyncio counterpart of HistoricalSnapshot.
+    """
+
+    def __init__(self, period, client=None, config=None):
+        assert isinstance(period, date)
+        self.period = period
+        self.client = client
+        self.config = config
+
+    def __repr__(self):
+        return "<AsyncHistoricalSnapshot({0})>".format(self.period)
+
+    async def get_snapshot(self):
+        """
+        A coroutine the retrieves a historical snapshot of crypto-currency markets via CoinMarketCap.
+
+        :return: A Pandas DataFrame object with historical snapshot data of the period specified.
+        """
+        site_url = _snapshot_url(self.period, self.config)
+
+        client = self.client or AsyncClient(config=self.config)
+        try:
+            status, text = await client.get_text(site_url)
+        finally:
+            if self.client is None:
+                await client.close()
+
+        error = BadSnapshotURL("Check 'https://coinmarketcap.com/historical/' "
+                               "for available historical snapshot periods ")
+        if status >= 400:
+            raise _http_error(status, site_url, error)
+
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(None, _read_snapshot, [text])
+        except ValueError:
+            raise error
+
+
+class AsyncCurrent:
+    """
+    The asyncio counterpart of Current.
+
+    Supported fiat currencies: 'https://coinmarketcap.com/api/documentation/v1/#section/Standards-and-Conventions'
+    API Keys signup available at: 'https://pro.coinmarketcap.com/signup/'
+    """
+
+    def __init__(self, api_key=None, currency='USD', client=None, concurrency=10, timeout=None, config=None,
+                 convert_limit=None):
+        """
+        :param api_key: str object representing the CoinMarketCap API key.
+        :param currency: str object representing the currency prices are converted to, or a list of them
+                         (e.g. ['USD', 'EUR', 'BTC']) which are all requested in the same call.
+        :param client: An optional AsyncClient shared between instances.
+        :param concurrency: Maximum number of requests in flight when the instance builds its own client.
+        :param timeout: Seconds to wait for the API when the instance builds its own client. Defaults to the config.
+        :param config: An optional Config object holding the API url, the global configuration is used otherwise.
+        :param convert_limit: Optional number of currencies the API plan converts per call (1 on the basic plan),
+                              longer lists are split into that many currencies per request and merged.
+        """
+        self.api_key = api_key
+        self.config = config or get_config()
+        self.currencies = _currencies(currency)
+        self.currency = self.currencies[0]
+        self.convert_limit = convert_limit
+
+        self._owns_client = client is None
+        if client is None:
+            client = AsyncClient(concurrency=concurrency, timeout=timeout, config=self.config)
+        self.client = client
+
+    def __repr__(self):
+        return "<AsyncCurrent(api_key={0}, currency{1})>".format(self.api_key, ','.join(self.currencies))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def close(self):
+        """
+        A coroutine that closes the client owned by this instance.
+        """
+        if self._owns_client:
+            await self.client.close()
+
+    def _convert(self, convert):
+        currencies = self.currencies if convert is None else _currencies(convert)
+        return currencies, currencies[0] if len(currencies) == 1 else currencies
+
+    async def _parse_cmc_url(self, url, **kwargs):
+        headers = {
+            'Accepts': 'application/json',
+            'X-CMC_PRO_API_KEY': self.api_key
+        }
+        params = {key: str(val) for key, val in kwargs.items()}
+
+        status, text, response_headers = await self.client.get(url, params=params, headers=headers)
+        retry_after = _retry_after(response_headers.get('Retry-After')) if status == 429 else None
+        return _api_json(status, text, url, retry_after)
+
+    async def _request(self, url, currencies, **kwargs):
+        """
+        A coroutine that requests an endpoint converted to every currency, in as few calls as the plan allows.
+
+        :param url: HTTP link to an acceptable CoinMarketCap API endpoint
+        :param currencies: list of str objects representing the currencies to convert to
+        :param kwargs: All acceptable parameters available in CoinMarketCap API
+        :return: JSON object containing response data with the quotes of every currency
+        """
+        size = self.convert_limit or len(currencies)
+
+        responses = await asyncio.gather(*[self._parse_cmc_url(url, convert=','.join(currencies[i:i + size]), **kwargs)
+                                           for i in range(0, len(currencies), size)])
+
+        response = _merge_quotes(responses)
+        _check_api_status(response)
+        return response
+
+    async def get_current(self, ticker, convert=None):
+        """
+        The coroutine returns the latest price information for the user supplied ticker.
+
+        :param ticker: A string representing the ticker of the crypto-currency of interest.
+        :param convert: Optional currency or list of currencies overriding those of the instance.
+        :return: A dictionary object containing current market and price information on the ticker supplied,
+                 with `<currency>.<field>` keys when converted to many currencies.
+        """
+        url = self.config.api('cryptocurrency/quotes/latest')
+        currencies, currency = self._convert(convert)
+
+        response_data = await self._request(url, currencies, symbol=ticker.upper())
+
+        if response_data['status']['error_code'] == 400:
+            raise WrongCoinCode('Invalid ticker from "CoinMarketCap.com". Please supply a valid crypto ticker')
+
+        for v in response_data['data'].values():
+            return _quote_record(v, currency)
+
+    async def get_current_many(self, tickers, chunk_size=100, convert=None):
+        """
+        The coroutine returns the latest price information for many tickers with batched requests.
+
+        :param tickers: An iterable of strings representing the tickers of the crypto-currencies of interest.
+        :param chunk_size: Integer (default=100) representing the number of symbols sent per request.
+        :param convert: Optional currency or list of currencies overriding those of the instance.
+        :return: A Pandas DataFrame object indexed by symbol containing current market and price information,
+                 or by (symbol, currency) when converted to many currencies.
+        """
+        url = self.config.api('cryptocurrency/quotes/latest')
+        currencies, _ = self._convert(convert)
+
+        symbols = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+        chunks = [symbols[i:i + chunk_size] for i in range(0, len(symbols), chunk_size)]
+
+        responses = await asyncio.gather(*[
+            self._request(url, currencies, symbol=','.join(chunk), skip_invalid='true')
+            for chunk in chunks
+        ])
+
+        records = [record for chunk, response_data in zip(chunks, responses)
+                   for record in _chunk_records(response_data, chunk, currencies)]
+
+        if len(currencies) == 1:
+            return pd.DataFrame.from_records(records, index='symbol', columns=_QUOTE_COLUMNS)
+
+        return pd.DataFrame.from_records(records, index=['symbol', 'currency'], columns=_QUOTE_COLUMNS + ['currency'])
+
+    async def global_info(self, convert=None):
+        """
+        A coroutine that returns market information at the global level.
+
+        :param convert: Optional currency or list of currencies overriding those of the instance.
+        :return: A dictionary object containing global market information of crypto-currencies,
+                 with `<currency>.<field>` keys when converted to many currencies.
+        """
+        url = self.config.api('global-metrics/quotes/latest')
+        currencies, currency = self._convert(convert)
+
+        global_response = await self._request(url, currencies)
+        return _global_record(global_response['data'], currency)
+
+    async def top_100(self, limit=100, columns=None, convert=None):
+        """
+        A coroutine that returns the top listings of crypto-currencies by market capitalisation.
+
+        :param limit: Integer (default=100) representing the number of listings
+        :param columns: Optional list of the columns to build, e.g. ['symbol', 'cmc_rank', 'USD.price']
+        :param convert: Optional currency or list of currencies overriding those of the instance.
+        :return: A Pandas DataFrame object containing all market and price information of number of listings requested
+                 with a `<currency>.<field>` column per field and currency
+        """
+        url = self.config.api('cryptocurrency/listings/latest')
+        currencies, _ = self._convert(convert)
+
+        top_response = await self._request(url, currencies, limit=limit)
+        return _listings_frame(top_response['data'], columns=columns)
@@ -0,0 +1,358 @@
+import numpy as np
+import pandas as pd
+
+
+class Panel:
+    """
+    A price panel of many coins held as one contiguous (days x tickers) float64 matrix.
+
+    Log returns, running peaks and cumulative sums of the returns are derived once and kept
+    next to the prices, so rolling statistics, drawdowns and correlation matrices are a few
+    NumPy operations over the whole cross section. Appending new days only derives the new rows.
+    Missing prices are NaN and every statistic skips them.
+    """
+
+    def __init__(self, prices, dates, tickers):
+        """
+        :param prices: 2-D array-like of prices with a row per date and a column per ticker.
+        :param dates: Sorted dates of the rows.
+        :param tickers: Tickers of the columns.
+        """
+        prices = np.array(prices, dtype=np.float64, ndmin=2)
+        dates = pd.DatetimeIndex(dates)
+        tickers = pd.Index(tickers)
+
+        if prices.shape != (len(dates), len(tickers)):
+            raise ValueError("prices must have a row per date and a column per ticker, got shape {0} for {1} dates "
+                             "and {2} tickers".format(prices.shape, len(dates), len(tickers)))
+        if not dates.is_monotonic_increasing or not dates.is_unique:
+            raise ValueError("dates must be unique and sorted")
+
+        self.tickers = tickers
+        self._size = 0
+
+        capacity, width = max(len(dates), 1), len(tickers)
+        self._prices = np.full((capacity, width), np.nan)
+        self._returns = np.full((capacity, width), np.nan)
+        self._peaks = np.full((capacity, width), np.nan)
+        self._dates = np.full(capacity, np.datetime64('NaT'), dtype=dates.values.dtype)
+
+        # Cumulative sums of the returns, their squares and their counts after a leading row of zeros
+        self._sums = np.zeros((3, capacity + 1, width))
+
+        self._write(0, prices, dates.values)
+        self._derive(0)
+
+    def __repr__(self):
+        return "<Panel(days={0}, tickers={1})>".format(self._size, len(self.tickers))
+
+    def __len__(self):
+        return self._size
+
+    @classmethod
+    def from_frame(cls, df, column='Close'):
+        """
+        An alternative constructor reading one column of a panel indexed by ticker and date,
+        such as the output of `Historical.get_many`.
+
+        :param df: Pandas DataFrame object indexed by (ticker, Date).
+        :param column: Name of the price column. Default is 'Close'.
+
+        :return: A Panel object.
+        """
+        prices, dates, tickers = _pivot(df, column)
+        return cls(prices, dates, tickers)
+
+    def _grow(self, rows, width):
+        # Buffers double when full so appending is amortised to the cost of the new days
+        capacity = len(self._dates)
+        if rows <= capacity and width == self._prices.shape[1]:
+            return
+
+        capacity = max(rows, 2 * capacity) if rows > capacity else capacity
+        size = self._size
+
+        self._prices = _resized(self._prices, (capacity, width), size)
+        self._returns = _resized(self._returns, (capacity, width), size)
+        self._peaks = _resized(self._peaks, (capacity, width), size)
+        self._dates = _resized(self._dates, (capacity,), size)
+        self._sums = _resized(self._sums, (3, capacity + 1, width), size + 1, axis=1)
+
+    def _write(self, start, prices, dates):
+        end = start + len(prices)
+        self._grow(end, prices.shape[1])
+
+        self._prices[start:end] = prices
+        self._dates[start:end] = dates
+        self._size = max(self._size, end)
+
+    def _derive(self, start):
+        """
+        Derives the returns, running peaks and cumulative sums of every row from row `start` on.
+        """
+        size = self._size
+        prices = self._prices[:size]
+
+        returns = self._returns
+        first = max(start, 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            np.log(prices[first:] / prices[first - 1:-1], out=returns[first:size])
+        returns[0] = np.nan
+
+        peaks = self._peaks
+        peaks[start:size] = np.fmax.accumulate(prices[start:], axis=0)
+        if start:
+            np.fmax(peaks[start:size], peaks[start - 1], out=peaks[start:size])
+
+        valid = ~np.isnan(returns[start:size])
+        clean = np.where(valid, returns[start:size], 0.0)
+        for sums, values in zip(self._sums, (clean, clean * clean, valid)):
+            np.cumsum(values, axis=0, out=sums[start + 1:size + 1])
+            sums[start + 1:size + 1] += sums[start]
+
+    @property
+    def dates(self):
+        return pd.DatetimeIndex(self._dates[:self._size], name='Date')
+
+    @property
+    def prices(self):
+        """
+        The read-only (days x tickers) price matrix, a view on the panel buffer.
+        """
+        return _read_only(self._prices[:self._size])
+
+    def _frame(self, values):
+        return pd.DataFrame(values, index=self.dates, columns=self.tickers, copy=False)
+
+    def log_returns(self):
+        """
+        Returns the daily log returns, NaN on the first day and next to missing prices.
+
+        :return: A Pandas DataFrame object indexed by date with a column per ticker
+        """
+        return self._frame(_read_only(self._returns[:self._size]))
+
+    def _window_sums(self, window):
+        if window < 1:
+            raise ValueError("window must be a positive number of days")
+
+        size = self._size
+        sums = self._sums[:, :size + 1]
+
+        # Row r covers the days (r - window, r], the first rows only have the days since the start
+        windowed = np.empty((3, size, sums.shape[2]))
+        head = min(window, size)
+        np.subtract(sums[:, 1:head + 1], sums[:, :1], out=windowed[:, :head])
+        np.subtract(sums[:, head + 1:], sums[:, 1:size + 1 - head], out=windowed[:, head:])
+        return windowed
+
+    def rolling_mean(self, window, min_periods=None):
+        """
+        Returns the mean of the log returns over a trailing window.
+
+        :param window: Integer number of days in the window.
+        :param min_periods: Integer number of returns needed in a window, the whole window by default.
+
+        :return: A Pandas DataFrame object indexed by date with a column per ticker
+        """
+        total, _, count = self._window_sums(window)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = total / count
+        mean[count < (window if min_periods is None else max(min_periods, 1))] = np.nan
+        return self._frame(mean)
+
+    def rolling_std(self, window, min_periods=None, ddof=1):
+        """
+        Returns the standard deviation of the log returns over a trailing window.
+
+        :param window: Integer number of days in the window.
+        :param min_periods: Integer number of returns needed in a window, the whole window by default.
+        :param ddof: Delta degrees of freedom (default=1) of the estimator.
+
+        :return: A Pandas DataFrame object indexed by date with a column per ticker
+        """
+        total, squares, count = self._window_sums(window)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            variance = (squares - total * total / count) / (count - ddof)
+        np.maximum(variance, 0.0, out=variance)
+
+        std = np.sqrt(variance)
+        std[(count < (window if min_periods is None else max(min_periods, 1))) | (count <= ddof)] = np.nan
+        return self._frame(std)
+
+    def volatility(self, window=30, periods=365):
+        """
+        Returns the annualised rolling volatility of the log returns.
+
+        :param window: Integer (default=30) number of days in the window.
+        :param periods: Number (default=365) of return periods in a year, crypto markets never close.
+
+        :return: A Pandas DataFrame object indexed by date with a column per ticker
+        """
+        return self.rolling_std(window) * np.sqrt(periods)
+
+    def drawdown(self):
+        """
+        Returns the relative distance of every price from its running peak, 0 at a new high.
+
+        :return: A Pandas DataFrame object indexed by date with a column per ticker
+        """
+        size = self._size
+        return self._frame(self._prices[:size] / self._peaks[:size] - 1.0)
+
+    def max_drawdown(self):
+        """
+        Returns the deepest drawdown of every ticker.
+
+        :return: A Pandas Series object indexed by ticker
+        """
+        return pd.Series(np.fmin.reduce(self.drawdown().values, axis=0), index=self.tickers)
+
+    def _moments(self, window, min_periods):
+        # The first day never has a return
+        returns = self._returns[1:self._size]
+        if window is not None:
+            returns = returns[-window:]
+
+        valid = ~np.isnan(returns)
+        if valid.all():
+            # Without gaps every pair shares the same days and one product of the centred returns is enough
+            count = len(returns)
+            centred = returns - returns.mean(axis=0)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                covariance = centred.T @ centred / (count - 1)
+            return covariance, np.diag(covariance)[:, None], np.bool_(count < max(min_periods, 2))
+
+        values = np.where(valid, returns, 0.0)
+        mask = valid.astype(np.float64)
+
+        # Pairwise complete sums: entry (i, j) only covers the days both tickers have a return
+        count = mask.T @ mask
+        total = values.T @ mask
+        squares = (values * values).T @ mask
+        products = values.T @ values
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            covariance = (products - total * total.T / count) / (count - 1)
+            variance = (squares - total * total / count) / (count - 1)
+
+        return covariance, variance, count < max(min_periods, 2)
+
+    def cov(self, window=None, min_periods=2):
+        """
+        Returns the covariance matrix of the log returns, each pair over the days both tickers traded.
+
+        :param window: Optional integer number of trailing days, the whole history by default.
+        :param min_periods: Integer (default=2) number of common returns needed by a pair.
+
+        :return: A Pandas DataFrame object with a row and a column per ticker
+        """
+        covariance, _, short = self._moments(window, min_periods)
+        covariance[short] = np.nan
+        return pd.DataFrame(covariance, index=self.tickers, columns=self.tickers, copy=False)
+
+    def corr(self, window=None, min_periods=2):
+        """
+        Returns the Pearson correlation matrix of the log returns, each pair over the days both tickers traded.
+
+        :param window: Optional integer number of trailing days, the whole history by default.
+        :param min_periods: Integer (default=2) number of common returns needed by a pair.
+
+        :return: A Pandas DataFrame object with a row and a column per ticker
+        """
+        covariance, variance, short = self._moments(window, min_periods)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            correlation = covariance / np.sqrt(variance * variance.T)
+        np.clip(correlation, -1.0, 1.0, out=correlation)
+        correlation[short] = np.nan
+        return pd.DataFrame(correlation, index=self.tickers, columns=self.tickers, copy=False)
+
+    def append(self, df, column='Close'):
+        """
+        Adds new days to the panel and derives only the rows they affect.
+
+        Days already in the panel are replaced, e.g. today's partial candle, and new tickers
+        get a column of their own. Days before the last one which are missing from the panel
+        cannot be inserted, build a new panel from the full history instead.
+
+        :param df: Pandas DataFrame object indexed by (ticker, Date), such as the output of `Historical.get_many`.
+        :param column: Name of the price column. Default is 'Close'.
+
+        :return: The Panel object itself
+        """
+        prices, dates, tickers = _pivot(df, column)
+        if not len(dates):
+            return self
+
+        # New tickers are added as columns of NaN prices
+        new = tickers.difference(self.tickers, sort=False)
+        if len(new):
+            self._grow(len(self._dates), len(self.tickers) + len(new))
+            self.tickers = self.tickers.append(new)
+
+        current = self.dates
+        positions = current.get_indexer(dates)
+        later = positions < 0
+        if len(current) and (later & (dates <= current[-1])).any():
+            raise ValueError("Only days after {0} can be appended to the panel".format(current[-1].date()))
+
+        columns = self.tickers.get_indexer(tickers)
+        start = int(positions[~later].min()) if (~later).any() else self._size
+
+        # Known days keep the prices of the tickers the new data does not mention
+        for row, position in zip(prices[~later], positions[~later]):
+            known = ~np.isnan(row)
+            self._prices[position, columns[known]] = row[known]
+
+        rows = np.full((int(later.sum()), len(self.tickers)), np.nan)
+        rows[:, columns] = prices[later]
+        self._write(self._size, rows, dates.values[later])
+
+        self._derive(start)
+        return self
+
+
+def _resized(values, shape, rows, axis=0):
+    """
+    A function that copies the first rows of an array into a new array of another shape.
+
+    :param values: NumPy array to copy
+    :param shape: shape of the new array, padded with NaN (zeros for integer counts and sums)
+    :param rows: number of leading rows along `axis` to keep
+    :param axis: axis of the rows
+    :return: A NumPy array object
+    """
+    fill = np.datetime64('NaT') if values.dtype.kind == 'M' else (0.0 if axis else np.nan)
+    resized = np.full(shape, fill, dtype=values.dtype)
+
+    index = [slice(None)] * values.ndim
+    index[axis] = slice(0, rows)
+    index[-1] = slice(0, min(values.shape[-1], shape[-1])) if values.ndim > 1 else index[-1]
+    resized[tuple(index)] = values[tuple(index)]
+    return resized
+
+
+def _read_only(values):
+    view = values.view()
+    view.flags.writeable = False
+    return view
+
+
+def _pivot(df, column):
+    """
+    A function that turns one column of a (ticker, Date) panel into a dense date by ticker matrix.
+
+    :param df: Pandas DataFrame object indexed by (ticker, Date)
+    :param column: name of the column to pivot
+    :return: A tuple of the 2-D NumPy array, the sorted DatetimeIndex and the ticker Index
+    """
+    if df.index.nlevels != 2:
+        raise ValueError("Expected a DataFrame indexed by (ticker, Date) such as the output of Historical.get_many")
+
+    ticker_codes, tickers = pd.factorize(df.index.get_level_values(0), sort=False)
+    date_codes, dates = pd.factorize(pd.DatetimeIndex(df.index.get_level_values(1)), sort=True)
+
+    prices = np.full((len(dates), len(tickers)), np.nan)
+    prices[date_codes, ticker_codes] = df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    return prices, pd.DatetimeIndex(dates), pd.Index(tickers)
@@ -0,0 +1,375 @@
+"""
+Backfill of historical snapshots into a memory-mapped columnar store.
+
+Run with: python -m coinsta.backfill START END [PATH] [--freq W] [--workers N] [--processes N]
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from coinsta.cli import _date
+from coinsta.config import get_config
+from coinsta.exceptions import BadSnapshotURL
+from coinsta.lazy import _lazy_import
+from coinsta.tables import _extract_table, _is_snapshot_table, _numeric_block, _stream_html
+from coinsta.utils import _http_error, _snapshot_url
+
+requests_exceptions = _lazy_import('requests.exceptions')
+
+# Numeric columns of the snapshot table and their names in the store
+_SNAPSHOT_COLUMNS = {
+    '#': 'rank',
+    'Market Cap': 'market_cap',
+    'Price': 'price',
+    'Circulating Supply': 'circulating_supply',
+    'Volume (24h)': 'volume_24h',
+    '% 1h': 'percent_change_1h',
+    '% 24h': 'percent_change_24h',
+    '% 7d': 'percent_change_7d'
+}
+
+# Columns of the store that are not float64
+_DTYPES = {'period': 'datetime64[D]', 'coin_id': np.int32}
+
+
+def _download_page(period, config=None):
+    """
+    A function that downloads the raw snapshot page of one period.
+
+    :param period: date object of the snapshot
+    :param config: Config object to send the request with, the global configuration otherwise
+    :return: A bytes object
+    """
+    config = config or get_config()
+    site_url = _snapshot_url(period, config)
+
+    try:
+        return b''.join(_stream_html(site_url, transport=config.transport))
+    except requests_exceptions.HTTPError as e:
+        raise _http_error(e.response.status_code, site_url,
+                          BadSnapshotURL("No historical snapshot on CoinMarketCap for {0}".format(period))) from e
+
+
+def _parse_snapshot_page(page):
+    """
+    A function that converts a snapshot page to fixed width numeric columns, run on the process pool.
+
+    :param page: bytes object of the snapshot page
+    :return: A dictionary object with the `symbol` and `name` lists and a float64 array per numeric column
+    """
+    try:
+        header, rows = _extract_table([page], match=_is_snapshot_table, table='snapshot')
+    except ValueError:
+        raise BadSnapshotURL("The page holds no snapshot table")
+
+    positions = {cell.strip(): i for i, cell in enumerate(header)}
+    present = [raw_name for raw_name in _SNAPSHOT_COLUMNS if raw_name in positions]
+    rows = [row for row in rows if len(row) >= len(header) - 1]
+
+    # The circulating supply is followed by the symbol of the coin, e.g. '17,180,000 BTC'
+    supply = positions.get('Circulating Supply')
+    lines = ['\t'.join(row[supply].split(' ', 1)[0] if positions[raw_name] == supply else row[positions[raw_name]]
+                       for raw_name in present) for row in rows]
+
+    parsed = _numeric_block(lines, [_SNAPSHOT_COLUMNS[raw_name] for raw_name in present]) if rows else {}
+    parsed = {column: parsed.get(column, np.full(len(rows), np.nan)) for column in _SNAPSHOT_COLUMNS.values()}
+
+    parsed['symbol'] = [row[positions['Symbol']] for row in rows]
+    parsed['name'] = [row[positions['Name']] for row in rows]
+    return parsed
+
+
+class SnapshotStore:
+    """
+    A local columnar store of historical snapshots made of `.npy` segments.
+
+    Every backfill run appends segments holding a fixed width array per column: the period
+    as datetime64[D], the coin as an int32 id into the `symbols.json` dictionary and the
+    numbers as float64. Segments are memory-mapped when read, so a query only pages in the
+    periods and columns it touches. `manifest.json` lists the finished segments and is
+    written last, an interrupted backfill leaves no partial segment behind. A store has a
+    single writer at a time.
+    """
+
+    columns = ('period', 'coin_id') + tuple(_SNAPSHOT_COLUMNS.values())
+
+    def __init__(self, path=None):
+        """
+        :param path: Directory of the store. Defaults to `snapshots` in the cache dir.
+        """
+        if path is None:
+            path = os.path.join(get_config().cache_dir, 'snapshots')
+
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+
+        self._manifest = self._load('manifest.json', {'segments': []})
+        self.symbols = [tuple(pair) for pair in self._load('symbols.json', [])]
+        self._ids = {pair: i for i, pair in enumerate(self.symbols)}
+
+    def __repr__(self):
+        return "<SnapshotStore({0}, segments={1})>".format(self.path, len(self._manifest['segments']))
+
+    def _load(self, name, default):
+        try:
+            with open(os.path.join(self.path, name)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return default
+
+    def _dump(self, name, value):
+        # Replaced atomically so readers never see a half written file
+        tmp = os.path.join(self.path, name + '.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(value, f)
+        os.replace(tmp, os.path.join(self.path, name))
+
+    def periods(self):
+        """
+        Returns the periods held by the store.
+
+        :return: A sorted list of date objects
+        """
+        return sorted(datetime.strptime(period, '%Y-%m-%d').date()
+                      for segment in self._manifest['segments'] for period in segment['periods'])
+
+    def _encode(self, symbols, names):
+        """
+        Returns the dictionary ids of (symbol, name) pairs, adding the pairs seen for the first time.
+        """
+        ids = np.empty(len(symbols), dtype=np.int32)
+        for i, pair in enumerate(zip(symbols, names)):
+            coin_id = self._ids.get(pair)
+            if coin_id is None:
+                coin_id = self._ids[pair] = len(self.symbols)
+                self.symbols.append(pair)
+            ids[i] = coin_id
+        return ids
+
+    def _append(self, snapshots):
+        """
+        Writes the parsed snapshots of many periods as one new segment.
+
+        :param snapshots: list of (period, parsed) tuples as returned by _parse_snapshot_page
+        """
+        if not snapshots:
+            return
+
+        snapshots = sorted(snapshots, key=lambda snapshot: snapshot[0])
+        sizes = [len(parsed['symbol']) for _, parsed in snapshots]
+
+        arrays = {
+            'period': np.repeat(np.array([period for period, _ in snapshots], dtype='datetime64[D]'), sizes),
+            'coin_id': np.concatenate([self._encode(parsed['symbol'], parsed['name']) for _, parsed in snapshots] or
+                                      [np.empty(0, dtype=np.int32)])
+        }
+        for column in _SNAPSHOT_COLUMNS.values():
+            arrays[column] = np.concatenate([parsed[column] for _, parsed in snapshots])
+
+        name = 'segment-{0:05d}'.format(len(self._manifest['segments']))
+        os.makedirs(os.path.join(self.path, name), exist_ok=True)
+        for column, values in arrays.items():
+            np.save(os.path.join(self.path, name, column + '.npy'), values)
+
+        self._dump('symbols.json', self.symbols)
+        self._manifest['segments'].append({'name': name, 'rows': int(sum(sizes)),
+                                           'periods': [period.isoformat() for period, _ in snapshots]})
+        self._dump('manifest.json', self._manifest)
+
+    def segments(self, columns=None):
+        """
+        Returns the memory-mapped columns of every segment, nothing is read from disk until used.
+
+        :param columns: Optional list of column names, every column by default.
+
+        :return: A list with a dictionary object of read-only NumPy arrays per segment
+        """
+        columns = self.columns if columns is None else columns
+        return [{column: np.load(os.path.join(self.path, segment['name'], column + '.npy'), mmap_mode='r')
+                 for column in columns}
+                for segment in self._manifest['segments']]
+
+    def read(self, start=None, end=None, columns=None):
+        """
+        Reads the snapshots of a range of periods as one long format DataFrame.
+
+        Only the rows of the requested periods are copied out of the memory-mapped segments.
+        Symbols and names are categorical columns decoded from the coin ids.
+
+        :param start: Optional date object of the first period.
+        :param end: Optional date object of the last period.
+        :param columns: Optional list of numeric column names, every column by default.
+
+        :return: A Pandas DataFrame object with period, coin_id, symbol and name followed by the numeric columns.
+        """
+        numeric = list(_SNAPSHOT_COLUMNS.values()) if columns is None else list(columns)
+        low = np.datetime64(start, 'D') if start is not None else None
+        high = np.datetime64(end, 'D') if end is not None else None
+
+        parts = []
+        for segment in self.segments(['period', 'coin_id'] + numeric):
+            periods = segment['period']
+            first = 0 if low is None else np.searchsorted(periods, low, side='left')
+            last = len(periods) if high is None else np.searchsorted(periods, high, side='right')
+            if first < last:
+                parts.append({column: values[first:last] for column, values in segment.items()})
+
+        data = {}
+        for column in ['period', 'coin_id'] + numeric:
+            dtype = _DTYPES.get(column, np.float64)
+            data[column] = np.concatenate([part[column] for part in parts]) if parts else np.empty(0, dtype=dtype)
+
+        # Segments are sorted by period but several runs may interleave
+        if parts and not (np.diff(data['period'].view(np.int64)) >= 0).all():
+            order = np.argsort(data['period'], kind='stable')
+            data = {column: values[order] for column, values in data.items()}
+
+        pairs = self.symbols or [('', '')]
+        symbol_codes, symbols = pd.factorize(pd.Index([symbol for symbol, _ in pairs], dtype=object))
+        name_codes, names = pd.factorize(pd.Index([name for _, name in pairs], dtype=object))
+
+        df = pd.DataFrame({'period': data['period'].astype('datetime64[ns]'), 'coin_id': data['coin_id']})
+        df['symbol'] = pd.Categorical.from_codes(symbol_codes[data['coin_id']], categories=symbols)
+        df['name'] = pd.Categorical.from_codes(name_codes[data['coin_id']], categories=names)
+        for column in numeric:
+            df[column] = data[column]
+
+        return df
+
+
+def _completed(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+def backfill(start, end, path=None, freq='W', workers=8, processes=None, segment_size=52, progress=None,
+             errors='raise', config=None):
+    """
+    A function that downloads the historical snapshots of a range of periods into a SnapshotStore.
+
+    Pages are downloaded on a thread pool and parsed on a process pool, with no more than
+    `workers + processes` periods in flight, and a segment is written every `segment_size`
+    periods so memory use stays flat however long the range is. Periods
+    already in the store are skipped, an interrupted backfill resumes where it stopped.
+
+    :param start: a Datetime date object representing the first period.
+    :param end: a Datetime date object representing the last period.
+    :param path: Directory of the store, see SnapshotStore.
+    :param freq: str object representing a Pandas frequency (default='W') between periods.
+    :param workers: Integer (default=8) representing the number of pages downloaded at the same time.
+    :param processes: Integer number of parsing processes, the number of CPUs by default. 0 parses in this process.
+    :param segment_size: Integer (default=52) representing the number of periods written per segment.
+    :param progress: An optional callable receiving a dictionary with the period, number of rows and error
+                     of every finished period.
+    :param errors: 'raise' (default) to raise the error of a failed period, 'ignore' to leave it out.
+    :param config: An optional Config object, the global configuration is used otherwise.
+
+    :return: The SnapshotStore object
+    """
+    if errors not in ('raise', 'ignore'):
+        raise ValueError("errors must be either 'raise' or 'ignore'")
+
+    store = SnapshotStore(path)
+    done = set(store.periods())
+    periods = [timestamp.date() for timestamp in pd.date_range(start, end, freq=freq)
+               if timestamp.date() not in done]
+
+    if not periods:
+        return store
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    pool = None
+    if processes > 0:
+        # Spawned workers do not inherit the download threads of this process
+        pool = ProcessPoolExecutor(max_workers=min(processes, len(periods)),
+                                   mp_context=multiprocessing.get_context('spawn'))
+
+    # Periods downloading or parsing at once, raw pages never pile up behind slow parsers
+    in_flight = max(1, workers) + processes
+    queued = iter(periods)
+
+    buffer = []
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(periods)))) as downloads:
+            waiting = {}
+
+            def submit():
+                for period in itertools.islice(queued, in_flight - len(waiting)):
+                    waiting[downloads.submit(_download_page, period, config)] = ('download', period)
+
+            submit()
+            while waiting:
+                finished, _ = wait(waiting, return_when=FIRST_COMPLETED)
+
+                for future in finished:
+                    stage, period = waiting.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        if progress is not None:
+                            progress({'period': period, 'rows': 0, 'error': e})
+                        if errors == 'raise':
+                            for pending in waiting:
+                                pending.cancel()
+                            raise
+                        continue
+
+                    if stage == 'download':
+                        parsed = pool.submit(_parse_snapshot_page, result) if pool else \
+                            _completed(_parse_snapshot_page(result))
+                        waiting[parsed] = ('parse', period)
+                        continue
+
+                    buffer.append((period, result))
+                    if progress is not None:
+                        progress({'period': period, 'rows': len(result['symbol']), 'error': None})
+
+                    if len(buffer) >= segment_size:
+                        store._append(buffer)
+                        buffer = []
+
+                submit()
+    finally:
+        # Periods parsed before a failure are kept so the next run resumes after them
+        store._append(buffer)
+        if pool is not None:
+            pool.shutdown()
+
+    return store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('start', type=_date, help='first period, YYYY-MM-DD')
+    parser.add_argument('end', type=_date, help='last period, YYYY-MM-DD')
+    parser.add_argument('path', nargs='?', help='directory of the store, defaults to the cache dir')
+    parser.add_argument('--freq', default='W', help='pandas frequency between periods (default: W)')
+    parser.add_argument('--workers', type=int, default=8, help='pages downloaded at the same time')
+    parser.add_argument('--processes', type=int, help='parsing processes, defaults to the number of CPUs')
+    parser.add_argument('--segment-size', type=int, default=52, help='periods written per segment')
+    parser.add_argument('--ignore-errors', action='store_true', help='skip the periods that fail')
+    args = parser.parse_args(argv)
+
+    def report(event):
+        status = 'failed: {0}'.format(event['error']) if event['error'] else '{0} coins'.format(event['rows'])
+        print("{0}  {1}".format(event['period'], status), file=sys.stderr)
+
+    started = time.perf_counter()
+    store = backfill(args.start, args.end, args.path, freq=args.freq, workers=args.workers,
+                     processes=args.processes, segment_size=args.segment_size, progress=report,
+                     errors='ignore' if args.ignore_errors else 'raise')
+    print("{0} periods in {1} after {2:.1f} s".format(len(store.periods()), store.path, time.perf_counter() - started))
+
+
+if __name__ == '__main__':
+    main()
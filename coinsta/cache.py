@@ -0,0 +1,258 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from coinsta.config import get_config
+from coinsta.instrument import _emit
+
+# Seconds CoinMarketCap responses stay fresh, keyed by the end of the endpoint url
+_DEFAULT_TTLS = {
+    'cryptocurrency/quotes/latest': 60,
+    'cryptocurrency/listings/latest': 60,
+    'global-metrics/quotes/latest': 300
+}
+
+
+class MemoryCache:
+    """
+    A thread safe in-memory LRU cache whose entries expire after their TTL.
+    """
+
+    def __init__(self, maxsize=1024):
+        """
+        :param maxsize: Maximum number of responses kept, the least recently used are dropped first.
+        """
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "<MemoryCache(entries={0}, maxsize={1})>".format(len(self._entries), self.maxsize)
+
+    def get(self, key):
+        """
+        Returns the cached value of the key or None when it is missing or expired.
+
+        :param key: str object identifying the response
+        :return: The cached value or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires, value = entry
+            if expires < time.time():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        """
+        Stores a value for `ttl` seconds.
+
+        :param key: str object identifying the response
+        :param value: JSON serialisable value to store
+        :param ttl: Number of seconds the value stays fresh
+        """
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Drops every cached value.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+class DiskCache:
+    """
+    A SQLite backed cache shared by every process pointing at the same file.
+    """
+
+    def __init__(self, path=None):
+        """
+        :param path: Location of the SQLite database. Defaults to `responses.sqlite` in the cache dir.
+        """
+        if path is None:
+            path = os.path.join(get_config().cache_dir, 'responses.sqlite')
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self.path = path
+
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS responses "
+                         "(key TEXT PRIMARY KEY, expires REAL NOT NULL, value TEXT NOT NULL)")
+
+    def __repr__(self):
+        return "<DiskCache({0})>".format(self.path)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key):
+        """
+        Returns the cached value of the key or None when it is missing or expired.
+
+        :param key: str object identifying the response
+        :return: The cached value or None
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT expires, value FROM responses WHERE key = ?", (key,)).fetchone()
+
+        if row is None or row[0] < time.time():
+            return None
+
+        return json.loads(row[1])
+
+    def set(self, key, value, ttl):
+        """
+        Stores a value for `ttl` seconds.
+
+        :param key: str object identifying the response
+        :param value: JSON serialisable value to store
+        :param ttl: Number of seconds the value stays fresh
+        """
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses WHERE expires < ?", (time.time(),))
+            conn.execute("INSERT OR REPLACE INTO responses (key, expires, value) VALUES (?, ?, ?)",
+                         (key, time.time() + ttl, json.dumps(value)))
+
+    def clear(self):
+        """
+        Drops every cached value.
+        """
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+
+
+class _Call:
+    """
+    An upstream request in flight that other callers of the same key wait on.
+    """
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ResponseCache:
+    """
+    A cache of CoinMarketCap API responses keyed on the url and the request parameters.
+
+    Concurrent identical requests are deduplicated: the first caller fetches the response
+    while the others wait for it, so they share one upstream call. Error responses are
+    never cached.
+    """
+
+    def __init__(self, backend=None, ttls=None, default_ttl=60):
+        """
+        :param backend: MemoryCache (default) or DiskCache object storing the responses.
+        :param ttls: Optional dictionary of seconds per endpoint, e.g. {'global-metrics/quotes/latest': 300}.
+        :param default_ttl: Seconds responses of endpoints missing from `ttls` stay fresh.
+        """
+        self.backend = backend if backend is not None else MemoryCache()
+        self.ttls = dict(_DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.default_ttl = default_ttl
+
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "<ResponseCache(backend={0})>".format(self.backend)
+
+    def ttl(self, url):
+        """
+        Returns the number of seconds a response of the url stays fresh.
+
+        :param url: HTTP link of a CoinMarketCap API endpoint
+        :return: Number of seconds
+        """
+        for endpoint, ttl in self.ttls.items():
+            if url.rstrip('/').endswith(endpoint):
+                return ttl
+        return self.default_ttl
+
+    @staticmethod
+    def key(url, params):
+        """
+        Returns the cache key of a request, the API key is deliberately left out.
+
+        :param url: HTTP link of a CoinMarketCap API endpoint
+        :param params: dictionary of query parameters, including the `convert` currency
+        :return: A str object
+        """
+        raw = json.dumps([url, sorted((str(k), str(v)) for k, v in params.items())])
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def fetch(self, url, params, loader):
+        """
+        Returns the cached response of the request or calls `loader` once for every concurrent caller.
+
+        :param url: HTTP link of a CoinMarketCap API endpoint
+        :param params: dictionary of query parameters
+        :param loader: callable without arguments returning the JSON response
+        :return: JSON object containing response data
+        """
+        key = self.key(url, params)
+
+        value = self.backend.get(key)
+        _emit('cache', cache='responses', hit=value is not None, url=url)
+        if value is not None:
+            return value
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            # A call that just finished may have filled the cache before we became the leader
+            value = self.backend.get(key)
+
+            if value is None:
+                value = loader()
+
+                if value.get('status', {}).get('error_code') == 0:
+                    self.backend.set(key, value, self.ttl(url))
+
+            call.value = value
+            return value
+
+        except Exception as e:
+            call.error = e
+            raise
+
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
@@ -0,0 +1,293 @@
+"""
+Command-line exports of historical data, historical snapshots and live quotes.
+
+Examples:
+  coinsta history --tickers-file tickers.txt --start 2015-01-01 --out history/ --workers 8
+  coinsta snapshots --start 2018-01-01 --end 2018-12-31 --out snapshots/ --format parquet
+  coinsta quotes --tickers btc eth xrp --api-key KEY --every 60s --out quotes.ndjson
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime
+from coinsta.exceptions import CoinstaError
+from coinsta.writers import ChunkWriter
+
+# Suffixes accepted by --every and their number of seconds
+_DURATION_UNITS = {'': 1, 's': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def _date(text):
+    try:
+        return datetime.strptime(text, '%Y-%m-%d').date()
+    except ValueError:
+        raise argparse.ArgumentTypeError("'{0}' is not a YYYY-MM-DD date".format(text))
+
+
+def _duration(text):
+    """
+    A function that reads durations such as '90', '60s', '5m' or '1h' as a number of seconds.
+
+    :param text: str object of the duration
+    :return: A float object
+    """
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([smhd]?)\s*', text.lower())
+    if match is None or float(match.group(1)) <= 0:
+        raise argparse.ArgumentTypeError("'{0}' is not a duration such as 60s, 5m or 1h".format(text))
+    return float(match.group(1)) * _DURATION_UNITS[match.group(2)]
+
+
+def _tickers(args):
+    """
+    A function that gathers the tickers given on the command line and in the tickers file.
+
+    The file holds tickers separated by spaces, commas or new lines, lines starting with # are ignored.
+
+    :param args: argparse Namespace object
+    :return: A list of str objects without duplicates
+    """
+    tickers = list(args.tickers or [])
+    if args.tickers_file:
+        with open(args.tickers_file) as f:
+            for line in f:
+                if not line.lstrip().startswith('#'):
+                    tickers.extend(re.split(r'[\s,]+', line.strip()))
+
+    tickers = list(dict.fromkeys(ticker for ticker in tickers if ticker))
+    if not tickers:
+        raise CoinstaError("No tickers given, use --tickers or --tickers-file")
+    return tickers
+
+
+def _report(message):
+    print(message, file=sys.stderr, flush=True)
+
+
+class _Checkpoint:
+    """
+    The list of items an export already wrote, kept next to the output so that a rerun resumes.
+
+    The checkpoint belongs to the parameters of the export, running with other parameters
+    into the same directory starts over.
+    """
+
+    name = '.coinsta-checkpoint.json'
+
+    def __init__(self, directory, params):
+        self.path = os.path.join(directory, self.name)
+        self.params = params
+        self.done = set()
+
+        try:
+            with open(self.path) as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if saved.get('params') == params:
+            self.done = set(saved.get('done', []))
+
+    def __repr__(self):
+        return "<_Checkpoint({0}, done={1})>".format(self.path, len(self.done))
+
+    def add(self, item):
+        self.done.add(item)
+
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'params': self.params, 'done': sorted(self.done)}, f)
+        os.replace(tmp, self.path)
+
+
+def _write_file(path, df, fmt):
+    """
+    A function that writes a DataFrame with its index through a ChunkWriter and moves it in place once complete.
+
+    :param path: location of the output file
+    :param df: Pandas DataFrame object
+    :param fmt: one of ChunkWriter.formats
+    """
+    tmp = path + '.tmp'
+    with ChunkWriter(tmp, fmt=fmt, index=True) as writer:
+        writer.write(df)
+    os.replace(tmp, path)
+
+
+def _history(args):
+    from coinsta.core import Historical
+
+    tickers = _tickers(args)
+    os.makedirs(args.out, exist_ok=True)
+
+    end = args.end or date.today()
+    checkpoint = _Checkpoint(args.out, {'command': 'history', 'start': args.start.isoformat(),
+                                        'end': end.isoformat(), 'format': args.format})
+    pending = [ticker for ticker in tickers if ticker not in checkpoint.done]
+    _report("{0} tickers, {1} already exported".format(len(tickers), len(tickers) - len(pending)))
+
+    failed = {}
+
+    def progress(event):
+        if event['error'] is not None:
+            failed.setdefault(event['ticker'], event['error'])
+
+    # Tickers are downloaded a batch at a time so finished ones are written and checkpointed early
+    for i in range(0, len(pending), args.batch_size):
+        batch = pending[i:i + args.batch_size]
+        panel = Historical.get_many(batch, args.start, end, workers=args.workers, chunk_days=args.chunk_days,
+                                    rate=args.rate, progress=progress, errors='ignore', strict=args.strict)
+
+        written = set(panel.index.get_level_values('ticker')) if len(panel) else set()
+        for ticker in batch:
+            if ticker in failed or ticker not in written:
+                _report("{0}: failed, {1}".format(ticker, failed.get(ticker, 'no data')))
+                continue
+
+            df = panel.loc[ticker]
+            _write_file(os.path.join(args.out, '{0}.{1}'.format(ticker, args.format)), df, args.format)
+            checkpoint.add(ticker)
+            _report("{0}: {1} days".format(ticker, len(df)))
+
+    return 1 if failed or len(checkpoint.done & set(tickers)) < len(tickers) else 0
+
+
+def _snapshots(args):
+    import pandas as pd
+    from coinsta.core import HistoricalSnapshot
+
+    os.makedirs(args.out, exist_ok=True)
+
+    end = args.end or date.today()
+    periods = [timestamp.date() for timestamp in pd.date_range(args.start, end, freq=args.freq)]
+    checkpoint = _Checkpoint(args.out, {'command': 'snapshots', 'start': args.start.isoformat(),
+                                        'end': end.isoformat(), 'freq': args.freq, 'format': args.format})
+    pending = [period for period in periods if period.isoformat() not in checkpoint.done]
+    _report("{0} periods, {1} already exported".format(len(periods), len(periods) - len(pending)))
+
+    failures = 0
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = {executor.submit(lambda period: HistoricalSnapshot(period).get_snapshot(), period): period
+                   for period in pending}
+
+        # Snapshots are written as they arrive, in whatever order they finish
+        for future in as_completed(futures):
+            period = futures[future]
+            try:
+                df = future.result()
+            except Exception as e:
+                failures += 1
+                _report("{0}: failed, {1}".format(period, e))
+                continue
+
+            _write_file(os.path.join(args.out, '{0}.{1}'.format(period, args.format)), df.set_index('Rank'),
+                        args.format)
+            checkpoint.add(period.isoformat())
+            _report("{0}: {1} coins".format(period, len(df)))
+
+    return 1 if failures else 0
+
+
+def _quotes(args):
+    from coinsta.core import Current
+    from coinsta.stream import Poller
+
+    tickers = _tickers(args)
+    api_key = args.api_key or os.environ.get('COINSTA_API_KEY')
+    if not api_key:
+        raise CoinstaError("No API key given, use --api-key or set COINSTA_API_KEY")
+
+    with Current(api_key, currency=args.currency) as current, ChunkWriter(args.out, fmt=args.format,
+                                                                          index=True) as writer:
+        if args.every is None:
+            quotes = current.get_current_many(tickers, chunk_size=args.chunk_size, workers=args.workers)
+            writer.write(quotes)
+            _report("{0} quotes written to {1}".format(len(quotes), args.out))
+            return 0
+
+        # Every poll appends the quotes that changed since the previous one
+        poller = Poller(current, tickers, interval=args.every, chunk_size=args.chunk_size)
+        polls = 0
+        try:
+            for delta in poller:
+                writer.write(delta)
+                polls += 1
+                _report("{0}: {1} changed quotes".format(time.strftime('%Y-%m-%dT%H:%M:%S'), len(delta)))
+                if args.count and polls >= args.count:
+                    poller.stop()
+        except KeyboardInterrupt:
+            pass
+
+        return 0
+
+
+def _parser():
+    parser = argparse.ArgumentParser(prog='coinsta', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    commands.required = True
+
+    def tickers_options(command):
+        command.add_argument('--tickers', nargs='+', metavar='TICKER', help='tickers to export')
+        command.add_argument('--tickers-file', help='file of tickers separated by spaces, commas or new lines')
+
+    def output_options(command, default):
+        command.add_argument('--format', choices=ChunkWriter.formats, default=default, help='output format')
+        command.add_argument('--workers', type=int, default=8, help='requests in flight (default: 8)')
+
+    history = commands.add_parser('history', help='export the daily history of many tickers, a file per ticker')
+    tickers_options(history)
+    history.add_argument('--start', type=_date, required=True, help='first day, YYYY-MM-DD')
+    history.add_argument('--end', type=_date, help='last day, YYYY-MM-DD (default: today)')
+    history.add_argument('--out', required=True, help='output directory, also holding the resume checkpoint')
+    output_options(history, 'csv')
+    history.add_argument('--chunk-days', type=int, default=365, help='days downloaded per request')
+    history.add_argument('--rate', type=float, default=4, help='requests per second (default: 4)')
+    history.add_argument('--batch-size', type=int, default=50, help='tickers written per batch (default: 50)')
+    history.add_argument('--strict', action='store_true',
+                         help='fail tickers missing from the directory without downloading them')
+    history.set_defaults(run=_history)
+
+    snapshots = commands.add_parser('snapshots', help='export historical snapshots, a file per period')
+    snapshots.add_argument('--start', type=_date, required=True, help='first period, YYYY-MM-DD')
+    snapshots.add_argument('--end', type=_date, help='last period, YYYY-MM-DD (default: today)')
+    snapshots.add_argument('--freq', default='W', help='pandas frequency between periods (default: W)')
+    snapshots.add_argument('--out', required=True, help='output directory, also holding the resume checkpoint')
+    output_options(snapshots, 'csv')
+    snapshots.set_defaults(run=_snapshots)
+
+    quotes = commands.add_parser('quotes', help='export the latest quotes once or on a fixed cadence')
+    tickers_options(quotes)
+    quotes.add_argument('--api-key', help='CoinMarketCap API key (default: $COINSTA_API_KEY)')
+    quotes.add_argument('--currency', default='USD', help='currency of the quotes (default: USD)')
+    quotes.add_argument('--every', type=_duration, help='poll on this cadence, e.g. 60s, and append the changes')
+    quotes.add_argument('--count', type=int, help='stop after this many polls with changes')
+    quotes.add_argument('--chunk-size', type=int, default=100, help='symbols per request (default: 100)')
+    quotes.add_argument('--out', required=True, help='output file, the format follows the extension')
+    output_options(quotes, None)
+    quotes.set_defaults(run=_quotes)
+
+    return parser
+
+
+def main(argv=None):
+    """
+    Runs the coinsta command line.
+
+    :param argv: Optional list of arguments, sys.argv by default.
+    :return: The integer exit status, 1 when some items failed to export
+    """
+    args = _parser().parse_args(argv)
+
+    try:
+        return args.run(args)
+    except (CoinstaError, OSError, ValueError) as e:
+        _report("coinsta {0}: {1}".format(args.command, e))
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,174 @@
+import os
+import threading
+from coinsta.transport import Transport
+
+# Where coinsta sends its requests unless told otherwise
+_DEFAULT_WEB_URL = 'https://coinmarketcap.com'
+_DEFAULT_API_URL = 'https://pro-api.coinmarketcap.com'
+
+
+def _env(name, default, cast=str):
+    value = os.environ.get(name)
+    return default if value in (None, '') else cast(value)
+
+
+class Config:
+    """
+    The base URLs and transport options used by every request coinsta sends.
+
+    Options left out are read from the environment ($COINSTA_WEB_URL, $COINSTA_API_URL,
+    $COINSTA_TIMEOUT, $COINSTA_POOL_SIZE, $COINSTA_RETRIES, $COINSTA_BACKOFF and
+    $COINSTA_CACHE_DIR) and fall back to the CoinMarketCap defaults. Point the URLs at a
+    caching reverse proxy, a mirror or a local replay server to put it in front of every call.
+    """
+
+    def __init__(self, web_url=None, api_url=None, timeout=None, pool_size=None, retries=None, backoff=None,
+                 headers=None, cache_dir=None):
+        """
+        :param web_url: Base URL of the CoinMarketCap website, e.g. 'https://coinmarketcap.com'.
+        :param api_url: Base URL of the CoinMarketCap Pro API, e.g. 'https://pro-api.coinmarketcap.com'.
+        :param timeout: Seconds (or a (connect, read) tuple) to wait for a response before giving up.
+        :param pool_size: Number of connections kept alive per host.
+        :param retries: Number of times a request is retried on connection errors or 429/5xx responses.
+        :param backoff: Backoff factor in seconds applied between retries.
+        :param headers: Optional dictionary of headers sent with every request, e.g. for a proxy.
+        :param cache_dir: Directory of the on-disk caches. Defaults to ~/.cache/coinsta.
+        """
+        self.web_url = (web_url or _env('COINSTA_WEB_URL', _DEFAULT_WEB_URL)).rstrip('/')
+        self.api_url = (api_url or _env('COINSTA_API_URL', _DEFAULT_API_URL)).rstrip('/')
+        self.timeout = timeout if timeout is not None else _env('COINSTA_TIMEOUT', 10, float)
+        self.pool_size = pool_size if pool_size is not None else _env('COINSTA_POOL_SIZE', 10, int)
+        self.retries = retries if retries is not None else _env('COINSTA_RETRIES', 3, int)
+        self.backoff = backoff if backoff is not None else _env('COINSTA_BACKOFF', 0.5, float)
+        self.headers = dict(headers) if headers else {}
+        self.cache_dir = cache_dir or _env('COINSTA_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache',
+                                                                             'coinsta'))
+
+        self._transport = None
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "<Config(web_url={0}, api_url={1}, timeout={2})>".format(self.web_url, self.api_url, self.timeout)
+
+    def replace(self, **options):
+        """
+        Returns a copy of the configuration with some options changed.
+
+        :param options: Any argument of the Config constructor
+        :return: A Config object
+        """
+        current = {
+            'web_url': self.web_url,
+            'api_url': self.api_url,
+            'timeout': self.timeout,
+            'pool_size': self.pool_size,
+            'retries': self.retries,
+            'backoff': self.backoff,
+            'headers': self.headers,
+            'cache_dir': self.cache_dir
+        }
+        current.update(options)
+        return Config(**current)
+
+    @property
+    def transport(self):
+        """
+        The pooled Transport built from these options, created on first use and shared by its users.
+        """
+        with self._lock:
+            if self._transport is None:
+                self._transport = self.new_transport()
+            return self._transport
+
+    def new_transport(self):
+        """
+        Builds a Transport from these options which the caller owns and closes.
+
+        :return: A Transport object
+        """
+        return Transport(pool_size=self.pool_size, timeout=self.timeout, retries=self.retries, backoff=self.backoff,
+                         headers=self.headers)
+
+    def web(self, path):
+        """
+        Returns the URL of a page of the website.
+
+        :param path: path of the page, e.g. 'historical/20180729/'
+        :return: String object representing the URL
+        """
+        return "{0}/{1}".format(self.web_url, path.lstrip('/'))
+
+    def api(self, endpoint):
+        """
+        Returns the URL of a Pro API endpoint.
+
+        :param endpoint: name of the endpoint, e.g. 'cryptocurrency/quotes/latest'
+        :return: String object representing the URL
+        """
+        return "{0}/v1/{1}".format(self.api_url, endpoint.strip('/'))
+
+    def historical_url(self, slug, start, end):
+        """
+        Returns the historical data URL of a crypto-currency.
+
+        :param slug: website crypto id as returned by _ticker_checker
+        :param start: string formatted starting date (YYYYMMDD)
+        :param end: string formatted ending date (YYYYMMDD)
+        :return: String object representing the URL
+        """
+        return self.web("currencies/{0}/historical-data/?start={1}&end={2}".format(slug, start, end))
+
+    def snapshot_url(self, period):
+        """
+        Returns the historical snapshot URL of a date.
+
+        :param period: date object of the snapshot
+        :return: String object representing the URL
+        """
+        return self.web("historical/{0}".format(period.isoformat().replace("-", "")))
+
+    def directory_url(self):
+        """
+        Returns the URL of the page listing every crypto-currency.
+
+        :return: String object representing the URL
+        """
+        return self.web("all/views/all/")
+
+
+_CONFIG = None
+_CONFIG_LOCK = threading.Lock()
+
+
+def get_config():
+    """
+    A function that returns the configuration used when none is supplied, read from the environment on first use.
+
+    :return: A Config object
+    """
+    global _CONFIG
+
+    with _CONFIG_LOCK:
+        if _CONFIG is None:
+            _CONFIG = Config()
+        return _CONFIG
+
+
+def set_config(config=None, **options):
+    """
+    A function that replaces the configuration used when none is supplied.
+
+    :param config: A Config object, or None to change some `options` of the current configuration.
+    :param options: Any argument of the Config constructor, e.g. api_url='http://localhost:8080'
+    :return: The Config object now in use
+    """
+    global _CONFIG
+
+    if config is None:
+        config = get_config().replace(**options)
+    elif options:
+        config = config.replace(**options)
+
+    with _CONFIG_LOCK:
+        _CONFIG = config
+        return config
@@ -1,11 +1,137 @@
 # Needed libraries
-import pandas as pd
-from pandas import json_normalize
-from coinsta.exceptions import BadSnapshotURL, WrongCoinCode, ApiKeyError
-from coinsta.utils import _readable_date, _ticker_checker, _snapshot_readable_date, _parse_cmc_url
+from coinsta.cache import MemoryCache
+from coinsta.config import get_config
+from coinsta.exceptions import BadSnapshotURL, WrongCoinCode, is_retryable
+from coinsta.instrument import _emit, _timed
+from coinsta.ratelimit import CreditLedger, _bucket_for
+from coinsta.tables import _clean_historical, _extract_table, _is_historical_table, _read_snapshot, _stream_html
+from coinsta.writers import ChunkWriter
+from coinsta.utils import _readable_date, _ticker_checker, _snapshot_readable_date, _parse_cmc_url, _quote_record, \
+    _global_record, _currencies, _merge_quotes, _listings_frame, _historical_url, _snapshot_url, \
+    _date_chunks, _RateLimiter, _SLUG_DIRECTORY, _backoff, _http_error, _check_api_status
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date, datetime
-from requests.exceptions import ConnectionError, Timeout, TooManyRedirects
-from urllib.error import HTTPError
+from coinsta.lazy import _lazy_import
+import time
+
+pd = _lazy_import('pandas')
+requests_exceptions = _lazy_import('requests.exceptions')
+
+# Columns returned by Current.get_current_many
+_QUOTE_COLUMNS = ['symbol', 'id', 'name', 'rank', 'circulating_supply', 'total_supply', 'max_supply', 'price',
+                  'volume_24h', 'percent_change_1h', 'percent_change_24h', 'percent_change_7d', 'market_cap',
+                  'last_updated', 'error']
+
+
+def _download_history_table(slug, start, end, config=None):
+    """
+    A function that downloads the raw historical data table of one website crypto id.
+
+    :param slug: website crypto id as returned by _ticker_checker
+    :param start: string formatted starting date (YYYYMMDD)
+    :param end: string formatted ending date (YYYYMMDD)
+    :param config: Config object to send the request with, the global configuration otherwise
+    :return: A tuple of the list of header cells and a list of rows, each a list of cell strings
+    """
+    config = config or get_config()
+
+    # Custom data url based on the user specified ticker and starting period and ending period
+    site_url = _historical_url(slug, start, end, config)
+
+    # Stream the page and parse the historical table while it downloads
+    try:
+        return _extract_table(_stream_html(site_url, transport=config.transport), match=_is_historical_table,
+                              table='historical')
+    except requests_exceptions.HTTPError as e:
+        error = _http_error(e.response.status_code, site_url,
+                            WrongCoinCode("'{0}' is unavailable on CoinMarketCap.com. "
+                                          "Please check the website for the right ticker name".format(slug)))
+        if isinstance(error, WrongCoinCode):
+            # Later calls with this id fail before downloading anything
+            _SLUG_DIRECTORY.mark_unavailable(slug, config)
+        raise error from e
+
+
+def _download_history(slug, start, end, config=None):
+    """
+    A function that downloads and cleans the historical data of one website crypto id.
+
+    :param slug: website crypto id as returned by _ticker_checker
+    :param start: string formatted starting date (YYYYMMDD)
+    :param end: string formatted ending date (YYYYMMDD)
+    :param config: Config object to send the request with, the global configuration otherwise
+    :return: A Pandas DataFrame object containing historical data indexed by date
+    """
+    return _clean_historical([_download_history_table(slug, start, end, config)])
+
+
+def _download_snapshot(period, config=None):
+    """
+    A function that downloads and cleans the historical snapshot of one period, shared by every caller.
+
+    Snapshots are kept in HistoricalSnapshot.cache keyed by their url, so a configuration pointing at
+    another host downloads its own copy.
+
+    :param period: date object of the snapshot
+    :param config: Config object to send the request with, the global configuration otherwise
+    :return: A Pandas DataFrame object with historical snapshot data of the period, which must not be modified
+    """
+    config = config or get_config()
+
+    site_url = _snapshot_url(period, config)
+
+    snapshot = HistoricalSnapshot.cache.get(site_url)
+    if snapshot is not None:
+        return snapshot
+
+    try:
+        snapshot = _read_snapshot(_stream_html(site_url, transport=config.transport))
+    except requests_exceptions.HTTPError as e:
+        raise _http_error(e.response.status_code, site_url,
+                          BadSnapshotURL("Check 'https://coinmarketcap.com/historical/' "
+                                         "for available historical snapshot periods ")) from e
+    except ValueError:
+        raise BadSnapshotURL("Check 'https://coinmarketcap.com/historical/' "
+                             "for available historical snapshot periods ")
+
+    # Published snapshots never change, they only leave the cache when it is full
+    HistoricalSnapshot.cache.set(site_url, snapshot, float('inf'))
+    return snapshot
+
+
+def _chunk_records(response_data, symbols, currencies):
+    """
+    A function that turns the quotes response of one chunk of symbols into a record per symbol and currency.
+
+    :param response_data: JSON object returned by the quotes endpoint, merged over every currency
+    :param symbols: A list of upper cased ticker strings sent in the request.
+    :param currencies: list of str objects representing the currencies the quotes were converted to
+    :return: A list of dictionary objects, one per symbol supplied and per currency when there are many.
+    """
+    # A single currency keeps one row per symbol, many get a row per symbol and currency
+    targets = [(None, currencies[0])] if len(currencies) == 1 else [(name, name) for name in currencies]
+
+    # Key, rate limit and server errors were raised already, what is left concerns the symbols
+    if response_data['status']['error_code']:
+        message = response_data['status'].get('error_message') or 'Invalid ticker from "CoinMarketCap.com"'
+        return [{'symbol': symbol, 'currency': label, 'error': message}
+                for symbol in symbols for label, _ in targets]
+
+    coins_dict = response_data['data']
+
+    records = []
+    for symbol in symbols:
+        for label, currency in targets:
+            if symbol in coins_dict:
+                record = _quote_record(coins_dict[symbol], currency)
+                record['id'] = coins_dict[symbol]['id']
+                record['error'] = None
+            else:
+                record = {'symbol': symbol, 'error': 'Invalid ticker from "CoinMarketCap.com"'}
+            record['currency'] = label
+            records.append(record)
+
+    return records
 
 
 # Historical Class for all methods related to historical data
@@ -16,7 +142,7 @@ class Historical:
     CoinMarketCap.
     """
 
-    def __init__(self, ticker, start, end=None):
+    def __init__(self, ticker, start, end=None, config=None, strict=False):
         """
         This method initialises the Historical object based on the
         ticker, starting period, and ending period as specified by
@@ -25,6 +151,9 @@ class Historical:
         :param ticker: str object representing ticker information.
         :param start: a Datetime date object representing YYYYMMDD.
         :param end: a Datetime date object representing YYYYMMDD.
+        :param config: An optional Config object, the global configuration is used otherwise.
+        :param strict: Boolean (default=False) indicating whether a ticker missing from the CoinMarketCap directory
+                       raises WrongCoinCode before any download instead of being tried as the website id.
         """
 
         # Check for mis-specification of dates
@@ -50,6 +179,8 @@ class Historical:
         self.ticker = ticker
         self.start = start
         self.end = end
+        self.config = config
+        self.strict = strict
 
     def __repr__(self):
         return "<Historical({0}, {1}, {2})>".format(self.ticker, self.start, self.end)
@@ -61,45 +192,167 @@ class Historical:
                                          _readable_date(self.end)
                                          )
 
-    def get_data(self):
+    def get_data(self, store=None):
         """
         This function scrapes and cleans the data of the specified tickers
         from CoinMarketCap website.
 
+        :param store: An optional HistoryStore, only the days missing from it are downloaded.
         :return: A Pandas DataFrame object containing historical data on the specified tickers.
         """
 
-        # Get the ticker id used by CoinMarketCap
-        slug = _ticker_checker(self.ticker)
+        with _timed('get_data', ticker=self.ticker):
 
-        # Custom data url based on the user specified ticker and starting period and ending period
-        site_url = "https://coinmarketcap.com/currencies/{0}/historical-data/?start={1}&end={2}".format(slug,
-                                                                                                        self.start,
-                                                                                                        self.end)
-        # Download the data based on the custom data url
-        try:
-            data = pd.read_html(site_url)
-        except HTTPError:
-            raise WrongCoinCode("'{0}' is unavailable on CoinMarketCap.com. "
-                                "Please check the website for the right ticker name".format(slug))
+            # Get the ticker id used by CoinMarketCap
+            with _timed('slugs', ticker=self.ticker):
+                slug = _ticker_checker(self.ticker, self.strict, self.config)
 
-        df = data[-1]
+            if store is None:
+                return _download_history(slug, self.start, self.end, self.config)
 
-        # Clean up the DataFrame
-        df['Date'] = pd.to_datetime(df['Date'])
+            for gap_start, gap_end in store.missing(slug, self.start, self.end):
+                gap_start, gap_end = gap_start.strftime('%Y%m%d'), gap_end.strftime('%Y%m%d')
+                store.write(slug, _download_history(slug, gap_start, gap_end, self.config), gap_start, gap_end)
 
-        df.rename(
-            {
-                "Open*": "Open",
-                "Close**": "Close",
-                "Market Cap": "Market_cap"
-            },
-            axis='columns', inplace=True
-        )
+            return store.read(slug, self.start, self.end)
 
-        df.set_index('Date', drop=True, inplace=True)
-        df.sort_index(inplace=True)
-        return df
+    @classmethod
+    def get_many(cls, tickers, start, end=None, workers=4, chunk_days=365, retries=3, rate=4, progress=None,
+                 errors='raise', store=None, config=None, strict=False):
+        """
+        This method downloads the historical data of many tickers in parallel.
+
+        Long periods are split into chunks of `chunk_days` days which are downloaded on a thread pool,
+        rate limited per host. A chunk failing with a retryable error is retried on its own with a jittered
+        exponential backoff so a transient failure does not lose the chunks already downloaded. A permanent
+        error, such as a ticker without a page, skips the remaining chunks of that ticker.
+
+        :param tickers: An iterable of str objects representing ticker information.
+        :param start: a Datetime date object representing the starting period.
+        :param end: a Datetime date object representing the ending period. Default is today.
+        :param workers: Integer (default=4) representing the number of chunks downloaded at the same time.
+        :param chunk_days: Integer (default=365) representing the number of days downloaded per request.
+        :param retries: Integer (default=3) representing the number of times a failed chunk is retried.
+        :param rate: Number (default=4) of requests per second allowed per host, None disables the limit.
+        :param progress: An optional callable receiving a dictionary with the ticker, period, number of rows,
+                         attempts, elapsed seconds and error of every finished chunk.
+        :param errors: 'raise' (default) to raise the error of a chunk that kept failing, 'ignore' to leave it out.
+        :param store: An optional HistoryStore, only the days missing from it are downloaded.
+        :param config: An optional Config object, the global configuration is used otherwise.
+        :param strict: Boolean (default=False) indicating whether tickers missing from the CoinMarketCap directory
+                       raise WrongCoinCode before any download.
+
+        :return: A Pandas DataFrame object indexed by ticker and date containing historical data on the tickers.
+        """
+        if errors not in ('raise', 'ignore'):
+            raise ValueError("errors must be either 'raise' or 'ignore'")
+
+        # Validates the dates the same way a single download does
+        spec = cls('', start, end)
+        start = datetime.strptime(spec.start, '%Y%m%d').date()
+        end = datetime.strptime(spec.end, '%Y%m%d').date()
+
+        tickers = list(dict.fromkeys(tickers))
+
+        # The directory is resolved once for the whole job, when it stays out of reach the job fails
+        # as a whole rather than once per ticker
+        attempt = 0
+        while tickers:
+            attempt += 1
+            try:
+                _SLUG_DIRECTORY.warm(config)
+                break
+            except Exception as e:
+                if not is_retryable(e) or attempt > retries:
+                    raise
+                _emit('retry', ticker=None, start=start, end=end, attempt=attempt, error=repr(e))
+                time.sleep(_backoff(attempt))
+
+        # Tickers which failed for good, their other chunks are not worth a request
+        failed = {}
+
+        slugs = {}
+        for ticker in tickers:
+            started = time.perf_counter()
+            try:
+                slugs[ticker] = _ticker_checker(ticker, strict, config)
+            except Exception as e:
+                if errors == 'raise':
+                    raise
+                failed[ticker] = e
+                if progress is not None:
+                    progress({'ticker': ticker, 'start': spec.start, 'end': spec.end, 'rows': 0, 'attempts': 0,
+                              'seconds': time.perf_counter() - started, 'error': e})
+
+        limiter = _RateLimiter(rate)
+
+        def fetch(ticker, chunk_start, chunk_end):
+            started = time.perf_counter()
+            attempt = 0
+            while True:
+                if ticker in failed:
+                    table, error = None, failed[ticker]
+                    break
+
+                attempt += 1
+                limiter.wait(_historical_url(slugs[ticker], chunk_start, chunk_end, config))
+                try:
+                    table = _download_history_table(slugs[ticker], chunk_start, chunk_end, config)
+                    if store is not None:
+                        store.write(slugs[ticker], _clean_historical([table]), chunk_start, chunk_end)
+                    error = None
+                    break
+                except Exception as e:
+                    if not is_retryable(e):
+                        failed.setdefault(ticker, e)
+                        table, error = None, e
+                        break
+                    if attempt > retries:
+                        table, error = None, e
+                        break
+                    _emit('retry', ticker=ticker, start=chunk_start, end=chunk_end, attempt=attempt, error=repr(e))
+                    time.sleep(_backoff(attempt))
+
+            if progress is not None:
+                progress({'ticker': ticker, 'start': chunk_start, 'end': chunk_end,
+                          'rows': 0 if table is None else len(table[1]), 'attempts': attempt,
+                          'seconds': time.perf_counter() - started, 'error': error})
+            return table, error
+
+        def gaps(ticker):
+            if store is None:
+                return [(start, end)]
+            return store.missing(slugs[ticker], start, end)
+
+        jobs = [(ticker, chunk_start, chunk_end)
+                for ticker in tickers if ticker in slugs
+                for gap_start, gap_end in gaps(ticker)
+                for chunk_start, chunk_end in _date_chunks(gap_start, gap_end, chunk_days)]
+
+        tables = [None] * len(jobs)
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = {executor.submit(fetch, *job): i for i, job in enumerate(jobs)}
+
+            for future in as_completed(futures):
+                table, error = future.result()
+
+                if error is not None and errors == 'raise':
+                    for pending in futures:
+                        pending.cancel()
+                    raise error
+
+                tables[futures[future]] = table
+
+        if store is None:
+            # Every raw chunk is cleaned and stitched in a single pass, in the order of the tickers
+            downloaded = [(job[0], table) for job, table in zip(jobs, tables) if table is not None]
+            return _clean_historical([table for _, table in downloaded], keys=[ticker for ticker, _ in downloaded])
+
+        stitched = {ticker: store.read(slugs[ticker], start, end) for ticker in tickers if ticker in slugs}
+        if not stitched:
+            return pd.DataFrame(index=pd.MultiIndex.from_arrays([[], []], names=['ticker', 'Date']))
+
+        return pd.concat(stitched, names=['ticker', 'Date'])
 
     @classmethod
     def from_strings(cls, ticker, start, end, hyphen=True):
@@ -132,11 +385,18 @@ class HistoricalSnapshot:
     """
     A class that returns a historical snapshot of crypto-currency market information
     on a specified period of time.
+
+    Downloaded snapshots are shared through `HistoricalSnapshot.cache`, an LRU of the last 64 periods
+    keyed by url. Set its `maxsize` to keep more or fewer of them and call its `clear()` to free them.
     """
 
-    def __init__(self, period):
+    # Parsed snapshots by url, shared by every instance
+    cache = MemoryCache(maxsize=64)
+
+    def __init__(self, period, config=None):
         assert isinstance(period, date)
         self.period = period
+        self.config = config
 
     def __repr__(self):
         return "<HistoricalSnapshot({0})>".format(self.period)
@@ -151,20 +411,40 @@ class HistoricalSnapshot:
 
         :return: A Pandas DataFrame object with historical snapshot data of the period specified.
         """
-        snap_date = self.period.isoformat().replace("-", "")
-        snap_url = "https://coinmarketcap.com/historical/{0}".format(snap_date)
+        # Snapshots never change so the cached copy is as good as a new download
+        return _download_snapshot(self.period, self.config).copy()
+
+    @classmethod
+    def range(cls, start, end, freq='W', workers=8, config=None):
+        """
+        A method that retrieves the historical snapshots of many periods concurrently.
+
+        CoinMarketCap publishes its snapshots every Sunday which is what the default weekly
+        frequency lands on.
+
+        :param start: a Datetime date object representing the first period.
+        :param end: a Datetime date object representing the last period.
+        :param freq: str object representing a Pandas frequency (default='W') between periods.
+        :param workers: Integer (default=8) representing the number of snapshots downloaded at the same time.
+        :param config: An optional Config object, the global configuration is used otherwise.
+
+        :return: A long format Pandas DataFrame object with a `period` column followed by the snapshot columns.
+        """
+        periods = [timestamp.date() for timestamp in pd.date_range(start, end, freq=freq)]
+
+        if not periods:
+            return pd.DataFrame(columns=['period'])
 
-        try:
-            snap_df = pd.read_html(snap_url)  # Check for the existence of the table
-        except ValueError:
-            raise BadSnapshotURL("Check 'https://coinmarketcap.com/historical/' "
-                                 "for available historical snapshot periods ")
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(periods)))) as executor:
+            snapshots = list(executor.map(lambda period: _download_snapshot(period, config), periods))
 
-        snap_df = pd.read_html(snap_url)[-1]
+        frames = []
+        for period, snap_df in zip(periods, snapshots):
+            snap_df = snap_df.copy()
+            snap_df.insert(0, 'period', pd.Timestamp(period))
+            frames.append(snap_df)
 
-        cleaned_df = snap_df.rename({"#": "Rank"}, axis=1)
-        cleaned_df = cleaned_df.iloc[0:, :-1]
-        return cleaned_df
+        return pd.concat(frames, ignore_index=True)
 
     @classmethod
     def from_strings(cls, string_period, hyphen=True):
@@ -194,109 +474,250 @@ class Current:
     API Keys signup available at: 'https://pro.coinmarketcap.com/signup/'
     """
 
-    def __init__(self, api_key=None, currency='USD'):
+    def __init__(self, api_key=None, currency='USD', transport=None, pool_size=None, timeout=None, retries=None,
+                 cache=None, rate_limit=None, rate_limit_path=None, credits=None, config=None, convert_limit=None):
+        """
+        :param api_key: str object representing the CoinMarketCap API key.
+        :param currency: str object representing the currency prices are converted to, or a list of them
+                         (e.g. ['USD', 'EUR', 'BTC']) which are all requested in the same call.
+        :param transport: An optional Transport object to share pooled connections between instances.
+        :param pool_size: Connections kept alive when the instance builds its own transport. Defaults to the config.
+        :param timeout: Seconds to wait for the API when the instance builds its own transport. Defaults to the config.
+        :param retries: Retries on connection errors, timeouts and 429/5xx when the instance builds its own transport.
+                        Defaults to the config.
+        :param cache: An optional ResponseCache shared between instances to reuse fresh responses.
+        :param rate_limit: Optional requests per minute or plan name (e.g. 'standard') shared by every user of the key.
+        :param rate_limit_path: Optional file sharing the rate limit of the key between processes.
+        :param credits: An optional CreditLedger shared between instances, a new one is created otherwise.
+        :param config: An optional Config object holding the API url, the global configuration is used otherwise.
+        :param convert_limit: Optional number of currencies the API plan converts per call (1 on the basic plan),
+                              longer lists are split into that many currencies per request and merged.
+        """
         self.api_key = api_key
-        self.currency = currency.upper()
+        self.config = config or get_config()
+        self.currencies = _currencies(currency)
+        self.currency = self.currencies[0]
+        self.convert_limit = convert_limit
+        self.cache = cache
+        self.credits = credits if credits is not None else CreditLedger()
+        self.limiter = None if rate_limit is None else _bucket_for(api_key, rate_limit, rate_limit_path)
+
+        # Only close the transport on exit when the instance owns it
+        self._owns_transport = transport is None
+        if transport is None:
+            options = {'pool_size': pool_size, 'timeout': timeout, 'retries': retries}
+            transport = self.config.replace(**{k: v for k, v in options.items() if v is not None}).new_transport()
+        self.transport = transport
 
     def __repr__(self):
-        return "<Current(api_key={0}, currency{1})>".format(self.api_key, self.currency)
+        return "<Current(api_key={0}, currency{1})>".format(self.api_key, ','.join(self.currencies))
 
     def __str__(self):
-        return "Current class specified with key: {0} & currency: {1}".format(self.api_key, self.currency)
+        return "Current class specified with key: {0} & currency: {1}".format(self.api_key, ','.join(self.currencies))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """
+        A method that closes the pooled connections of the transport owned by this instance.
+        """
+        if self._owns_transport:
+            self.transport.close()
+
+    def _convert(self, convert):
+        """
+        A method that returns the currencies of a call and how the records are keyed by them.
+
+        :param convert: Optional str object or list of str objects overriding the currencies of the instance.
+        :return: A tuple of the list of currencies and the str currency, or the list when there are many
+        """
+        currencies = self.currencies if convert is None else _currencies(convert)
+        return currencies, currencies[0] if len(currencies) == 1 else currencies
+
+    def _request(self, url, currencies, **kwargs):
+        """
+        A method that requests an endpoint converted to every currency, in as few calls as the plan allows.
+
+        :param url: HTTP link to an acceptable CoinMarketCap API endpoint
+        :param currencies: list of str objects representing the currencies to convert to
+        :param kwargs: All acceptable parameters available in CoinMarketCap API
+        :return: JSON object containing response data with the quotes of every currency
+        """
+        size = self.convert_limit or len(currencies)
 
-    def get_current(self, ticker):
+        responses = [_parse_cmc_url(url=url, api_key=self.api_key, transport=self.transport, cache=self.cache,
+                                    limiter=self.limiter, ledger=self.credits,
+                                    convert=','.join(currencies[i:i + size]), **kwargs)
+                     for i in range(0, len(currencies), size)]
+
+        response = _merge_quotes(responses)
+        _check_api_status(response)
+        return response
+
+    def get_current(self, ticker, convert=None):
         """
         The method returns the latest price information for the user supplied ticker.
 
         :param ticker: A string representing the ticker of the crypto-currency of interest.
-        :return: A dictionary object containing current market and price information on the ticker supplied.
+        :param convert: Optional currency or list of currencies overriding those of the instance.
+        :return: A dictionary object containing current market and price information on the ticker supplied,
+                 with `<currency>.<field>` keys when converted to many currencies.
         """
-        url = 'https://pro-api.coinmarketcap.com/v1/cryptocurrency/quotes/latest'
+        url = self.config.api('cryptocurrency/quotes/latest')
+        currencies, currency = self._convert(convert)
 
-        try:
-            response_data = _parse_cmc_url(url=url, api_key=self.api_key, convert=self.currency, symbol=ticker.upper())
+        response_data = self._request(url, currencies, symbol=ticker.upper())
 
-            if response_data['status']['error_code'] == 400:
-                raise WrongCoinCode('Invalid ticker from "CoinMarketCap.com". Please supply a valid crypto ticker')
+        if response_data['status']['error_code'] == 400:
+            raise WrongCoinCode('Invalid ticker from "CoinMarketCap.com". Please supply a valid crypto ticker')
 
-            elif response_data['status']['error_code'] == 401:
-                raise ApiKeyError('Please check API Key as it was rejected by CoinMarketCap')
+        coins_dict = response_data['data']
 
-            else:
-                coins_dict = response_data['data']
+        for v in coins_dict.values():
+            return _quote_record(v, currency)
 
-                for v in coins_dict.values():
+    def get_current_many(self, tickers, chunk_size=100, workers=4, convert=None):
+        """
+        The method returns the latest price information for many tickers with batched requests.
+
+        Tickers are sent in comma separated chunks of `chunk_size` symbols and the chunks are
+        requested concurrently. Tickers unknown to CoinMarketCap are reported in the `error`
+        column instead of failing the whole batch.
+
+        :param tickers: An iterable of strings representing the tickers of the crypto-currencies of interest.
+        :param chunk_size: Integer (default=100) representing the number of symbols sent per request.
+        :param workers: Integer (default=4) representing the number of chunks requested at the same time.
+        :param convert: Optional currency or list of currencies overriding those of the instance.
+        :return: A Pandas DataFrame object indexed by symbol containing current market and price information,
+                 or by (symbol, currency) when converted to many currencies.
+        """
+        currencies, _ = self._convert(convert)
 
-                    my_dict = dict()
-                    my_dict['name'] = v['name']
-                    my_dict['symbol'] = v['symbol']
-                    my_dict['rank'] = v['cmc_rank']
-                    my_dict['circulating_supply'] = v['circulating_supply']
-                    my_dict['total_supply'] = v['total_supply']
-                    my_dict['max_supply'] = v['max_supply']
+        # Upper case and drop duplicated tickers while keeping the order supplied
+        symbols = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+        chunks = [symbols[i:i + chunk_size] for i in range(0, len(symbols), chunk_size)]
 
-                    quotes = v['quote'][self.currency]
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(chunks)))) as executor:
+            results = list(executor.map(lambda chunk: self._quote_chunk(chunk, currencies), chunks))
 
-                    for key, val in quotes.items():
-                        my_dict[key] = val
+        records = [record for chunk_records in results for record in chunk_records]
 
-                    return my_dict
+        if len(currencies) == 1:
+            return pd.DataFrame.from_records(records, index='symbol', columns=_QUOTE_COLUMNS)
 
-        except (ConnectionError, Timeout, TooManyRedirects) as e:
-            raise e
+        return pd.DataFrame.from_records(records, index=['symbol', 'currency'], columns=_QUOTE_COLUMNS + ['currency'])
 
-    def global_info(self):
+    def _quote_chunk(self, symbols, currencies=None):
         """
-        A method that returns market information at the global level.
+        A method that requests the quotes of one chunk of symbols and returns a record per symbol and currency.
 
-        :return: A dictionary object containing global market information of crypto-currencies.
+        :param symbols: A list of upper cased ticker strings.
+        :param currencies: Optional list of currencies, those of the instance by default.
+        :return: A list of dictionary objects, one per symbol supplied and per currency when there are many.
         """
-        url = 'https://pro-api.coinmarketcap.com/v1/global-metrics/quotes/latest'
+        url = self.config.api('cryptocurrency/quotes/latest')
+        currencies = currencies or self.currencies
+
+        response_data = self._request(url, currencies, symbol=','.join(symbols), skip_invalid='true')
+        return _chunk_records(response_data, symbols, currencies)
+
+    def global_info(self, convert=None):
+        """
+        A method that returns market information at the global level.
 
-        try:
-            global_response = _parse_cmc_url(url=url, api_key=self.api_key, convert=self.currency)
+        :param convert: Optional currency or list of currencies overriding those of the instance.
+        :return: A dictionary object containing global market information of crypto-currencies,
+                 with `<currency>.<field>` keys when converted to many currencies.
+        """
+        url = self.config.api('global-metrics/quotes/latest')
+        currencies, currency = self._convert(convert)
 
-            for _, _ in global_response.items():
+        global_response = self._request(url, currencies)
 
-                glo_dict = dict()
+        return _global_record(global_response['data'], currency)
 
-                glo_dict['active_cryptos'] = global_response['data']['active_cryptocurrencies']
-                glo_dict['active_exchanges'] = global_response['data']['active_exchanges']
-                glo_dict['btc_dominance'] = global_response['data']['btc_dominance']
-                glo_dict['eth_dominance'] = global_response['data']['eth_dominance']
+    def top_100(self, limit=100, columns=None, convert=None):
+        """
+        A method that returns the top listings of crypto-currencies by market capitalisation.
 
-                glo_quotes = global_response['data']['quote'][self.currency]
+        :param limit: Integer (default=100) representing the number of listings
+        :param columns: Optional list of the columns to build, e.g. ['symbol', 'cmc_rank', 'USD.price']
+        :param convert: Optional currency or list of currencies overriding those of the instance.
+        :return: A Pandas DataFrame object containing all market and price information of number of listings requested
+                 with a `<currency>.<field>` column per field and currency
+        """
 
-                for key, value in glo_quotes.items():
-                    glo_dict[key] = value
+        url = self.config.api('cryptocurrency/listings/latest')
+        currencies, _ = self._convert(convert)
 
-                return glo_dict  # pd.DataFrame.from_dict(glo_dict, orient='index')
+        top_response = self._request(url, currencies, limit=limit)
 
-        except (ConnectionError, Timeout, TooManyRedirects) as e:
-            raise e
+        with _timed('clean', table='listings'):
+            return _listings_frame(top_response['data'], columns=columns)
 
-    def top_100(self, limit=100):
+    def iter_listings(self, page_size=5000, columns=None, records=False, prefetch=True, convert=None):
         """
-        A method that
+        A generator that walks the complete listings universe page by page.
 
-        :param limit: Integer (default=100) representing the number of listings
-        :return: A Pandas DataFrame object containing all market and price information of number of listings requested
+        The next page is requested in the background while the caller processes the current one,
+        so memory stays bounded to about two pages.
+
+        :param page_size: Integer (default=5000) representing the number of listings per page.
+        :param columns: Optional list of the columns to build, e.g. ['symbol', 'cmc_rank', 'USD.price']
+        :param records: Boolean indicating whether the raw list of records is yielded instead of a DataFrame.
+        :param prefetch: Boolean (default=True) indicating whether the next page is requested in advance.
+        :param convert: Optional currency or list of currencies overriding those of the instance.
+        :return: A generator of Pandas DataFrame objects, or lists of dictionary objects when `records` is True.
         """
+        url = self.config.api('cryptocurrency/listings/latest')
+        currencies, _ = self._convert(convert)
+
+        def fetch(start):
+            return self._request(url, currencies, start=start, limit=page_size).get('data') or []
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            start = 1
+            pending = executor.submit(fetch, start)
 
-        url = 'https://pro-api.coinmarketcap.com/v1/cryptocurrency/listings/latest'
+            while pending is not None:
+                data = pending.result()
 
-        try:
-            top_response = _parse_cmc_url(url=url, api_key=self.api_key, convert=self.currency, limit=limit)
+                # A short page is the last one
+                start += page_size
+                if prefetch and len(data) == page_size:
+                    pending = executor.submit(fetch, start)
+                else:
+                    pending = None
 
-            # Convert the data from the json into a Pandas DataFrame
-            df = pd.DataFrame.from_records(top_response['data'])
+                if not data:
+                    return
 
-            #
-            main_df = df.drop('quote', axis='columns')
-            expanded_df = json_normalize(df['quote'])
+                if not records:
+                    with _timed('clean', table='listings'):
+                        data = _listings_frame(data, columns=columns)
 
-            combo_df = pd.concat([main_df, expanded_df], axis='columns')
-            return combo_df
+                yield data
+
+                if not prefetch and len(data) == page_size:
+                    pending = executor.submit(fetch, start)
+
+    def export_listings(self, path, fmt=None, page_size=5000, columns=None, convert=None):
+        """
+        A method that streams the complete listings universe to a CSV, NDJSON or Parquet file.
+
+        :param path: Location of the output file.
+        :param fmt: One of 'csv', 'ndjson' or 'parquet' (requires pyarrow). Inferred from the file extension by default.
+        :param page_size: Integer (default=5000) representing the number of listings per page.
+        :param columns: Optional list of the columns to write, e.g. ['symbol', 'cmc_rank', 'USD.price']
+        :param convert: Optional currency or list of currencies overriding those of the instance.
+        :return: Integer representing the number of listings written.
+        """
+        with ChunkWriter(path, fmt=fmt) as writer:
+            for chunk in self.iter_listings(page_size=page_size, columns=columns, convert=convert):
+                writer.write(chunk)
 
-        except (ConnectionError, Timeout, TooManyRedirects) as e:
-            raise e
+        return writer.rows
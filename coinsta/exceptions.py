@@ -1,11 +1,72 @@
+import socket
+from coinsta.lazy import _lazy_import
+
+requests_exceptions = _lazy_import('requests.exceptions')
+
+
 # Personalised Error Raises
-class WrongCoinCode(NotImplementedError):
+class CoinstaError(Exception):
+    """Base class of the errors raised by coinsta, `retryable` tells whether trying again may succeed"""
+    retryable = False
+
+
+class WrongCoinCode(CoinstaError, NotImplementedError):
     """This coin code is unavailable at 'coinmarketcap.com'"""
 
 
-class BadSnapshotURL(ConnectionError):
+class BadSnapshotURL(CoinstaError, ConnectionError):
     """Check 'https://coinmarketcap.com/historical/' for available historical snapshot periods"""
 
 
-class ApiKeyError(KeyError):
+class ApiKeyError(CoinstaError, KeyError):
     """ API Key reject by CoinMarketCap API Check 'https://pro.coinmarketcap.com/signup/' for a valid API Key"""
+
+
+class AccessDenied(CoinstaError, PermissionError):
+    """CoinMarketCap refused the request with a 401 or 403 status, e.g. a bot block, whatever the ticker"""
+
+
+class TransientError(CoinstaError, ConnectionError):
+    """CoinMarketCap failed to answer for a reason that may go away, such as a 5xx status"""
+    retryable = True
+
+
+class RateLimitError(TransientError):
+    """CoinMarketCap rejected the request because the rate limit of the API key was reached"""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class UnknownTickerWarning(UserWarning):
+    """The ticker is missing from the CoinMarketCap directory and is used as the website id as is"""
+
+
+def is_retryable(error):
+    """
+    A function that tells whether the request failing with `error` may succeed when tried again.
+
+    Coinsta errors carry their own classification. Connection errors and timeouts are retryable,
+    as are HTTP errors answered with a 429 or 5xx status. Anything else, e.g. a 404, an invalid url,
+    a redirect loop or a page that cannot be parsed, fails the same way on every attempt.
+
+    :param error: Exception object
+    :return: A boolean object
+    """
+    if isinstance(error, CoinstaError):
+        return error.retryable
+
+    # requests.HTTPError carries the response that failed
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None)
+    if status is not None:
+        return status == 429 or status >= 500
+
+    # Every requests error is an OSError, only those raised by the network are worth another attempt
+    if isinstance(error, (requests_exceptions.ConnectionError, requests_exceptions.Timeout)):
+        return True
+    if isinstance(error, requests_exceptions.RequestException):
+        return False
+
+    return isinstance(error, (ConnectionError, TimeoutError, socket.gaierror))
@@ -0,0 +1,187 @@
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+# Callables receiving every instrumentation event, empty unless someone is listening
+_HOOKS = []
+_HOOKS_LOCK = threading.Lock()
+
+
+def add_hook(hook):
+    """
+    A function that registers a callable receiving every instrumentation event.
+
+    Events are dictionaries with an `event` key and a `time` stamp:
+
+    - 'request': one HTTP request with its `url`, `status`, `bytes` downloaded, `connect` seconds
+      until the response headers arrived (DNS, connect and server time), `transfer` seconds spent
+      reading the body and the `retries` the transport made.
+    - 'phase': the `seconds` spent in a `phase` such as 'slugs', 'parse', 'clean' or 'get_data'.
+    - 'cache': a lookup in a `cache` ('responses' or 'slugs') and whether it was a `hit`.
+    - 'retry': a failed download retried by `Historical.get_many`, with the `attempt` and `error`,
+      the `ticker` is None when the directory of tickers is retried.
+
+    Hooks run on the thread that made the call, keep them fast.
+
+    :param hook: callable accepting a dictionary object
+    :return: The hook, so that the function can be used as a decorator
+    """
+    with _HOOKS_LOCK:
+        _HOOKS.append(hook)
+    return hook
+
+
+def remove_hook(hook):
+    """
+    A function that unregisters a callable added with `add_hook`.
+
+    :param hook: callable previously added
+    """
+    with _HOOKS_LOCK:
+        if hook in _HOOKS:
+            _HOOKS.remove(hook)
+
+
+def _emit(event, **fields):
+    """
+    A function that hands an event to every hook, a no-op when none is registered.
+
+    :param event: name of the event
+    :param fields: values describing the event
+    """
+    if not _HOOKS:
+        return
+
+    fields['event'] = event
+    fields['time'] = time.time()
+
+    for hook in list(_HOOKS):
+        try:
+            hook(fields)
+        except Exception:
+            # A broken exporter must never fail the download it is measuring
+            logging.getLogger(__name__).exception("coinsta instrumentation hook failed")
+
+
+@contextmanager
+def _timed(phase, **fields):
+    """
+    A context manager emitting a 'phase' event with the seconds spent in its block.
+
+    :param phase: name of the phase
+    :param fields: values describing the phase
+    """
+    if not _HOOKS:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _emit('phase', phase=phase, seconds=time.perf_counter() - started, **fields)
+
+
+def _retries(response):
+    """
+    A function that returns the number of retries urllib3 made before a response.
+
+    :param response: requests Response object
+    :return: Integer number of retries
+    """
+    history = getattr(getattr(response.raw, 'retries', None), 'history', None)
+    return len(history) if isinstance(history, tuple) else 0
+
+
+class LogExporter:
+    """
+    A hook writing every event as a JSON structured log record.
+    """
+
+    def __init__(self, logger=None, level=logging.INFO):
+        """
+        :param logger: logging.Logger object to write to. Defaults to the 'coinsta' logger.
+        :param level: logging level of the records
+        """
+        self.logger = logger if logger is not None else logging.getLogger('coinsta')
+        self.level = level
+
+    def __repr__(self):
+        return "<LogExporter({0})>".format(self.logger.name)
+
+    def __call__(self, event):
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, json.dumps(event, default=str), extra={'coinsta': event})
+
+
+class PrometheusExporter:
+    """
+    A hook aggregating the events into counters rendered in the Prometheus text format.
+
+    Serve `render()` from the metrics endpoint of the application to scrape it.
+    """
+
+    def __init__(self, prefix='coinsta'):
+        """
+        :param prefix: prefix of every metric name
+        """
+        self.prefix = prefix
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "<PrometheusExporter(metrics={0})>".format(len(self._counters))
+
+    def __call__(self, event):
+        kind = event['event']
+
+        if kind == 'request':
+            status = str(event.get('status'))
+            self._add('requests_total', {'status': status}, 1)
+            self._add('bytes_total', {}, event.get('bytes') or 0)
+            self._add('retries_total', {'layer': 'transport'}, event.get('retries') or 0)
+            for stage in ('connect', 'transfer'):
+                self._add('request_seconds_sum', {'stage': stage}, event.get(stage) or 0.0)
+                self._add('request_seconds_count', {'stage': stage}, 1)
+
+        elif kind == 'phase':
+            self._add('phase_seconds_sum', {'phase': event['phase']}, event['seconds'])
+            self._add('phase_seconds_count', {'phase': event['phase']}, 1)
+
+        elif kind == 'cache':
+            result = 'hit' if event['hit'] else 'miss'
+            self._add('cache_total', {'cache': event['cache'], 'result': result}, 1)
+
+        elif kind == 'retry':
+            self._add('retries_total', {'layer': 'download'}, 1)
+
+    def _add(self, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def render(self):
+        """
+        Returns every metric in the Prometheus text exposition format.
+
+        :return: A str object
+        """
+        with self._lock:
+            counters = sorted(self._counters.items())
+
+        lines = []
+        for (name, labels), value in counters:
+            label_text = ','.join('{0}="{1}"'.format(k, v) for k, v in labels)
+            lines.append("{0}_{1}{2} {3}".format(self.prefix, name, '{' + label_text + '}' if labels else '',
+                                                 value))
+
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        """
+        Sets every metric back to zero.
+        """
+        with self._lock:
+            self._counters.clear()
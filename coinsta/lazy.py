@@ -0,0 +1,34 @@
+import importlib
+
+
+class _LazyModule:
+    """
+    A stand-in for a module that is only imported when one of its attributes is first used.
+
+    Pandas, NumPy, lxml and requests account for most of the time spent importing coinsta,
+    so modules refer to them through this proxy and a dictionary returning call such as
+    `Current.get_current` never pays for the DataFrame stack.
+    """
+
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+
+    def __repr__(self):
+        return "<_LazyModule({0})>".format(self._name)
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self._name)
+
+        # Later lookups of the module attributes no longer go through __getattr__
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+def _lazy_import(name):
+    """
+    A function that returns a proxy importing the module on first attribute access.
+
+    :param name: absolute name of the module, e.g. 'pandas'
+    :return: A _LazyModule object
+    """
+    return _LazyModule(name)
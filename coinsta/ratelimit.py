@@ -0,0 +1,246 @@
+import json
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Requests per minute allowed by the CoinMarketCap API plans
+PLAN_LIMITS = {
+    'basic': 30,
+    'hobbyist': 30,
+    'startup': 30,
+    'standard': 60,
+    'professional': 90,
+    'enterprise': 120
+}
+
+
+def _per_minute(per_minute):
+    """
+    A function that turns a plan name into its number of requests per minute.
+
+    :param per_minute: Number of requests per minute or the name of a plan
+    :return: A number of requests per minute
+    """
+    if isinstance(per_minute, str):
+        try:
+            return PLAN_LIMITS[per_minute.lower()]
+        except KeyError:
+            raise ValueError("Unknown plan '{0}', use one of {1}".format(per_minute, ', '.join(PLAN_LIMITS)))
+    return per_minute
+
+
+class TokenBucket:
+    """
+    A token bucket limiting the requests sent to the CoinMarketCap API.
+
+    The bucket is thread safe and, when given a `lock_path`, its state lives in a file
+    guarded by an exclusive lock so that every process using the same API key shares it.
+    """
+
+    def __init__(self, per_minute, burst=None, lock_path=None):
+        """
+        :param per_minute: Number of requests per minute or the name of a plan, e.g. 'standard'.
+        :param burst: Maximum number of requests sent back to back. Defaults to `per_minute`.
+        :param lock_path: Optional file shared by every process using the same API key.
+        """
+        per_minute = _per_minute(per_minute)
+
+        if lock_path is not None and fcntl is None:
+            raise RuntimeError("Sharing a rate limit between processes requires fcntl file locks")
+
+        self.per_minute = per_minute
+        self.rate = per_minute / 60.0
+        self.capacity = float(burst if burst is not None else per_minute)
+        self.lock_path = lock_path
+
+        self._tokens = self.capacity
+        self._updated = time.time()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "<TokenBucket(per_minute={0}, capacity={1})>".format(self.per_minute, self.capacity)
+
+    def acquire(self, tokens=1):
+        """
+        Blocks until `tokens` requests are allowed and takes them from the bucket.
+
+        :param tokens: Number of requests about to be sent
+        """
+        while True:
+            with self._state() as state:
+                self._refill(state)
+
+                if state['tokens'] >= tokens:
+                    state['tokens'] -= tokens
+                    return
+
+                wait = (tokens - state['tokens']) / self.rate
+
+            time.sleep(wait)
+
+    def penalize(self, seconds):
+        """
+        Empties the bucket for `seconds`, used when CoinMarketCap answers with a Retry-After header.
+
+        :param seconds: Number of seconds to hold every request back
+        """
+        with self._state() as state:
+            state['tokens'] = -seconds * self.rate
+            state['updated'] = time.time()
+
+    def _refill(self, state):
+        now = time.time()
+        state['tokens'] = min(self.capacity, state['tokens'] + (now - state['updated']) * self.rate)
+        state['updated'] = now
+
+    def _state(self):
+        if self.lock_path is None:
+            return _MemoryState(self)
+        return _FileState(self)
+
+
+class _MemoryState:
+    """
+    The state of a bucket shared between the threads of one process.
+    """
+
+    def __init__(self, bucket):
+        self.bucket = bucket
+
+    def __enter__(self):
+        self.bucket._lock.acquire()
+        self.state = {'tokens': self.bucket._tokens, 'updated': self.bucket._updated}
+        return self.state
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.bucket._tokens = self.state['tokens']
+        self.bucket._updated = self.state['updated']
+        self.bucket._lock.release()
+
+
+class _FileState:
+    """
+    The state of a bucket shared between processes through a locked file.
+    """
+
+    def __init__(self, bucket):
+        self.bucket = bucket
+
+    def __enter__(self):
+        self.bucket._lock.acquire()
+
+        if os.path.dirname(self.bucket.lock_path):
+            os.makedirs(os.path.dirname(self.bucket.lock_path), exist_ok=True)
+
+        self.file = open(self.bucket.lock_path, 'a+')
+        fcntl.flock(self.file, fcntl.LOCK_EX)
+
+        self.file.seek(0)
+        try:
+            self.state = json.loads(self.file.read())
+        except ValueError:
+            self.state = {'tokens': self.bucket.capacity, 'updated': time.time()}
+
+        return self.state
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            self.file.seek(0)
+            self.file.truncate()
+            self.file.write(json.dumps(self.state))
+            self.file.flush()
+        finally:
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+            self.file.close()
+            self.bucket._lock.release()
+
+
+_BUCKETS = {}
+_BUCKETS_LOCK = threading.Lock()
+
+
+def _bucket_for(api_key, per_minute, lock_path=None):
+    """
+    A function that returns the token bucket shared by every user of an API key in this process.
+
+    Users of the same key asking for another limit or lock file get a bucket of their own.
+
+    :param api_key: API key from CoinMarketCap in strings
+    :param per_minute: Number of requests per minute or the name of a plan
+    :param lock_path: Optional file shared by every process using the same API key
+    :return: A TokenBucket object
+    """
+    key = (api_key, _per_minute(per_minute), lock_path)
+
+    with _BUCKETS_LOCK:
+        bucket = _BUCKETS.get(key)
+        if bucket is None:
+            bucket = _BUCKETS[key] = TokenBucket(per_minute, lock_path=lock_path)
+        return bucket
+
+
+class CreditLedger:
+    """
+    A running tally of the API credits and calls consumed per endpoint.
+    """
+
+    def __init__(self):
+        self._credits = {}
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "<CreditLedger(total={0}, calls={1})>".format(self.total, self.calls)
+
+    def record(self, url, credits):
+        """
+        Adds the credits reported in the `status.credit_count` field of a response.
+
+        :param url: HTTP link of the CoinMarketCap API endpoint called
+        :param credits: Number of credits the call consumed
+        """
+        endpoint = urlsplit(url).path.split('/v1/', 1)[-1].strip('/')
+
+        with self._lock:
+            self._credits[endpoint] = self._credits.get(endpoint, 0) + (credits or 0)
+            self._calls[endpoint] = self._calls.get(endpoint, 0) + 1
+
+    @property
+    def total(self):
+        """
+        Number of credits consumed by every endpoint.
+        """
+        with self._lock:
+            return sum(self._credits.values())
+
+    @property
+    def calls(self):
+        """
+        Number of API calls sent to every endpoint.
+        """
+        with self._lock:
+            return sum(self._calls.values())
+
+    def by_endpoint(self):
+        """
+        Returns the credits and calls of every endpoint.
+
+        :return: A dictionary object of endpoint to {'credits': int, 'calls': int}
+        """
+        with self._lock:
+            return {endpoint: {'credits': self._credits[endpoint], 'calls': self._calls[endpoint]}
+                    for endpoint in self._credits}
+
+    def reset(self):
+        """
+        Sets every tally back to zero.
+        """
+        with self._lock:
+            self._credits.clear()
+            self._calls.clear()
@@ -0,0 +1,206 @@
+import os
+import sqlite3
+import threading
+import pandas as pd
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from coinsta.config import get_config
+from coinsta.tables import _INTEGER_COLUMNS, _nullable_int
+
+# Columns of the cleaned historical DataFrame and their names in the store
+_COLUMNS = {
+    'Open': 'open',
+    'High': 'high',
+    'Low': 'low',
+    'Close': 'close',
+    'Volume': 'volume',
+    'Market_cap': 'market_cap'
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ohlcv (
+    slug TEXT NOT NULL,
+    date TEXT NOT NULL,
+    open REAL,
+    high REAL,
+    low REAL,
+    close REAL,
+    volume REAL,
+    market_cap REAL,
+    PRIMARY KEY (slug, date)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS coverage (
+    slug TEXT NOT NULL,
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS coverage_slug ON coverage (slug);
+"""
+
+
+def _as_date(value):
+    """
+    A function that accepts a date object or a string formatted date (YYYYMMDD) and returns a date object.
+
+    :param value: date object or string formatted date
+    :return: A date object
+    """
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, '%Y%m%d').date()
+
+
+class HistoryStore:
+    """
+    A local SQLite store of historical data keyed by website crypto id and date.
+
+    The store remembers which periods were already downloaded so that only the missing
+    gaps are requested from CoinMarketCap. Today's partial candle is never marked as
+    downloaded and is therefore refreshed on every call.
+    """
+
+    def __init__(self, path=None):
+        """
+        :param path: Location of the SQLite database. Defaults to `history.sqlite` in the cache dir.
+        """
+        if path is None:
+            path = os.path.join(get_config().cache_dir, 'history.sqlite')
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self.path = path
+        self._lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def __repr__(self):
+        return "<HistoryStore({0})>".format(self.path)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def coverage(self, slug):
+        """
+        Returns the merged periods already downloaded for the supplied website crypto id.
+
+        :param slug: website crypto id
+        :return: A sorted list of (start, end) tuples of date objects
+        """
+        with self._connect() as conn:
+            rows = conn.execute("SELECT start_date, end_date FROM coverage WHERE slug = ? ORDER BY start_date",
+                                (slug,)).fetchall()
+
+        return [(_as_date(start), _as_date(end)) for start, end in rows]
+
+    def missing(self, slug, start, end):
+        """
+        Returns the gaps of the requested period that are not in the store yet.
+
+        :param slug: website crypto id
+        :param start: date object or string formatted date (YYYYMMDD) of the first day
+        :param end: date object or string formatted date (YYYYMMDD) of the last day
+        :return: A list of (start, end) tuples of date objects
+        """
+        start, end = _as_date(start), _as_date(end)
+
+        gaps = []
+        cursor = start
+        for covered_start, covered_end in self.coverage(slug):
+            if covered_end < cursor:
+                continue
+            if covered_start > end:
+                break
+            if covered_start > cursor:
+                gaps.append((cursor, covered_start - timedelta(days=1)))
+            cursor = max(cursor, covered_end + timedelta(days=1))
+
+        if cursor <= end:
+            gaps.append((cursor, end))
+
+        return gaps
+
+    def write(self, slug, df, start, end):
+        """
+        Merges a downloaded DataFrame into the store and records the period as downloaded.
+
+        :param slug: website crypto id
+        :param df: Pandas DataFrame object indexed by date as returned by Historical.get_data
+        :param start: date object or string formatted date (YYYYMMDD) of the first day requested
+        :param end: date object or string formatted date (YYYYMMDD) of the last day requested
+        """
+        start, end = _as_date(start), _as_date(end)
+
+        columns = [column for column in _COLUMNS if column in df.columns]
+        dates = [day.strftime('%Y-%m-%d') for day in df.index]
+        values = [df[column].tolist() for column in columns]
+        rows = [(slug, day) + tuple(row) for day, *row in zip(dates, *values)]
+
+        query = "INSERT OR REPLACE INTO ohlcv (slug, date, {0}) VALUES (?, ?, {1})".format(
+            ', '.join(_COLUMNS[column] for column in columns), ', '.join('?' * len(columns)))
+
+        # Today is still trading so it must be downloaded again next time
+        end = min(end, date.today() - timedelta(days=1))
+
+        with self._lock, self._connect() as conn:
+            conn.executemany(query, rows)
+
+            if start <= end:
+                self._add_coverage(conn, slug, start, end)
+
+    @staticmethod
+    def _add_coverage(conn, slug, start, end):
+        periods = [(_as_date(s), _as_date(e))
+                   for s, e in conn.execute("SELECT start_date, end_date FROM coverage WHERE slug = ?", (slug,))]
+        periods.append((start, end))
+        periods.sort()
+
+        # Merge overlapping or adjacent periods so the table stays small
+        merged = [periods[0]]
+        for period_start, period_end in periods[1:]:
+            last_start, last_end = merged[-1]
+            if period_start <= last_end + timedelta(days=1):
+                merged[-1] = (last_start, max(last_end, period_end))
+            else:
+                merged.append((period_start, period_end))
+
+        conn.execute("DELETE FROM coverage WHERE slug = ?", (slug,))
+        conn.executemany("INSERT INTO coverage (slug, start_date, end_date) VALUES (?, ?, ?)",
+                         [(slug, s.strftime('%Y%m%d'), e.strftime('%Y%m%d')) for s, e in merged])
+
+    def read(self, slug, start, end):
+        """
+        Returns the stored historical data of a website crypto id over the requested period.
+
+        :param slug: website crypto id
+        :param start: date object or string formatted date (YYYYMMDD) of the first day
+        :param end: date object or string formatted date (YYYYMMDD) of the last day
+        :return: A Pandas DataFrame object indexed and sorted by date
+        """
+        start, end = _as_date(start), _as_date(end)
+
+        query = "SELECT date, {0} FROM ohlcv WHERE slug = ? AND date BETWEEN ? AND ? ORDER BY date".format(
+            ', '.join(_COLUMNS.values()))
+
+        with self._connect() as conn:
+            rows = conn.execute(query, (slug, start.isoformat(), end.isoformat())).fetchall()
+
+        df = pd.DataFrame.from_records(rows, columns=['Date'] + list(_COLUMNS))
+        df['Date'] = pd.to_datetime(df['Date'], format='%Y-%m-%d')
+
+        # SQLite hands every column back as REAL, restore the schema of a fresh download
+        for column in _COLUMNS:
+            df[column] = df[column].astype('float64')
+            if column in _INTEGER_COLUMNS:
+                df[column] = _nullable_int(df[column].to_numpy())
+
+        return df.set_index('Date')
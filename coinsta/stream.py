@@ -0,0 +1,106 @@
+import math
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+
+class Poller:
+    """
+    A live quote poller that emits only the rows that changed since the previous poll.
+
+    The tickers are quoted through the batched quotes endpoint on a fixed cadence aligned to
+    the wall clock. The last price and update time of every coin are kept in arrays indexed by
+    CoinMarketCap id, so detecting changes is a handful of vectorised comparisons.
+    """
+
+    def __init__(self, current, tickers, interval=60, price_tolerance=0.0, chunk_size=100):
+        """
+        :param current: Current object used to request the quotes.
+        :param tickers: An iterable of strings representing the tickers to poll.
+        :param interval: Number of seconds between polls, aligned to multiples of it on the wall clock.
+        :param price_tolerance: Relative price move (e.g. 0.001 for 0.1%) needed to report an unchanged quote.
+        :param chunk_size: Integer (default=100) representing the number of symbols sent per request.
+        """
+        self.current = current
+        self.tickers = list(tickers)
+        self.interval = interval
+        self.price_tolerance = price_tolerance
+        self.chunk_size = chunk_size
+
+        self._price = np.full(0, np.nan)
+        self._updated = np.zeros(0, dtype=np.int64)
+        self._stop = threading.Event()
+
+    def __repr__(self):
+        return "<Poller(tickers={0}, interval={1})>".format(len(self.tickers), self.interval)
+
+    def __iter__(self):
+        """
+        Polls on every tick until `stop` is called and yields the non-empty deltas.
+
+        :return: A generator of Pandas DataFrame objects indexed by symbol
+        """
+        self._stop.clear()
+
+        while not self._stop.is_set():
+            delta = self.poll()
+            if len(delta):
+                yield delta
+
+            # Sleep to the next tick, skipping the ones a slow poll ran over
+            now = time.time()
+            next_tick = math.floor(now / self.interval) * self.interval + self.interval
+            self._stop.wait(next_tick - now)
+
+    def run(self, callback):
+        """
+        Polls until `stop` is called and hands every non-empty delta to the callback.
+
+        :param callback: callable accepting a Pandas DataFrame object of the changed rows
+        """
+        for delta in self:
+            callback(delta)
+
+    def stop(self):
+        """
+        Stops the polling loop after the current poll.
+        """
+        self._stop.set()
+
+    def poll(self):
+        """
+        Requests the quotes once and returns the rows whose `last_updated` advanced or price moved.
+
+        :return: A Pandas DataFrame object indexed by symbol containing the changed rows
+        """
+        # Deltas are tracked on the first currency of the Current object
+        quotes = self.current.get_current_many(self.tickers, chunk_size=self.chunk_size, convert=self.current.currency)
+        quotes = quotes[quotes['error'].isnull() & quotes['id'].notnull()]
+
+        ids = quotes['id'].to_numpy(dtype=np.int64)
+        prices = quotes['price'].to_numpy(dtype=np.float64)
+        updated = pd.to_datetime(quotes['last_updated'], utc=True).values.astype('datetime64[ns]').astype(np.int64)
+
+        if len(ids):
+            self._grow(ids.max() + 1)
+
+        old_prices = self._price[ids]
+
+        changed = (updated > self._updated[ids]) | np.isnan(old_prices)
+        with np.errstate(invalid='ignore'):
+            changed |= np.abs(prices - old_prices) > self.price_tolerance * np.abs(old_prices)
+
+        self._price[ids[changed]] = prices[changed]
+        self._updated[ids[changed]] = updated[changed]
+
+        return quotes[changed]
+
+    def _grow(self, size):
+        if size <= len(self._price):
+            return
+
+        # Grow geometrically so new listings do not reallocate on every poll
+        size = max(size, 2 * len(self._price))
+        self._price = np.concatenate([self._price, np.full(size - len(self._price), np.nan)])
+        self._updated = np.concatenate([self._updated, np.zeros(size - len(self._updated), dtype=np.int64)])
@@ -0,0 +1,323 @@
+import csv
+import io
+import operator
+import time
+from coinsta.config import get_config
+from coinsta.instrument import _emit, _retries, _timed
+from coinsta.lazy import _lazy_import
+
+np = _lazy_import('numpy')
+pd = _lazy_import('pandas')
+etree = _lazy_import('lxml.etree')
+
+# Characters ignored when reading the numbers displayed by CoinMarketCap
+_NUMBER_CHARS = str.maketrans('', '', '$,% ')
+
+# Columns of the historical data table and their cleaned names
+_HISTORICAL_COLUMNS = {
+    'Open*': 'Open',
+    'Open': 'Open',
+    'High': 'High',
+    'Low': 'Low',
+    'Close**': 'Close',
+    'Close': 'Close',
+    'Volume': 'Volume',
+    'Market Cap': 'Market_cap'
+}
+
+_HISTORICAL_DATE_FORMAT = '%b %d, %Y'
+
+# Historical columns of whole numbers, kept as nullable Int64 whatever days are missing
+_INTEGER_COLUMNS = ('Volume', 'Market_cap')
+
+
+def _stream_html(url, chunk_size=64 * 1024, transport=None):
+    """
+    A generator that downloads an HTML page over the pooled transport and yields it in chunks.
+
+    :param url: HTTP link of the page
+    :param chunk_size: number of bytes per chunk
+    :param transport: Transport object to use, the one of the global configuration otherwise
+    :return: A generator of bytes objects
+    """
+    if transport is None:
+        transport = get_config().transport
+
+    response = transport.get(url, stream=True)
+    received, transfer = 0, 0.0
+    try:
+        response.raise_for_status()
+
+        # Only the time spent waiting on the socket counts, the consumer parses between chunks
+        chunks = response.iter_content(chunk_size)
+        while True:
+            started = time.perf_counter()
+            chunk = next(chunks, None)
+            transfer += time.perf_counter() - started
+            if chunk is None:
+                break
+            received += len(chunk)
+            yield chunk
+    finally:
+        response.close()
+        _emit('request', url=url, status=response.status_code, bytes=received,
+              connect=response.elapsed.total_seconds(), transfer=transfer, retries=_retries(response))
+
+
+def _extract_table(chunks, match=None, table=None):
+    """
+    A function that incrementally parses an HTML document and extracts one table as text.
+
+    Tables whose header is rejected by `match` are skipped without building their rows,
+    and parsing stops as soon as the first matching table is complete. Without `match`
+    the last table of the document is returned, like `pd.read_html(...)[-1]`.
+
+    :param chunks: iterable of bytes or str objects making up the document
+    :param match: optional callable accepting the list of header cells and returning a boolean
+    :param table: optional name of the table reported with the parse time to the instrumentation hooks
+    :return: A tuple of the list of header cells and a list of rows, each a list of cell strings
+    """
+    started = time.perf_counter()
+    waited = [0.0]
+
+    def timed(iterator):
+        # Time spent waiting on the download is reported by _stream_html, not as parsing
+        iterator = iter(iterator)
+        while True:
+            wait_started = time.perf_counter()
+            chunk = next(iterator, None)
+            waited[0] += time.perf_counter() - wait_started
+            if chunk is None:
+                return
+            yield chunk
+
+    try:
+        return _parse_table(timed(chunks), match)
+    finally:
+        _emit('phase', phase='parse', table=table, seconds=time.perf_counter() - started - waited[0])
+
+
+def _parse_table(chunks, match):
+    parser = etree.HTMLPullParser(events=('start', 'end'), tag=('table', 'tr', 'td', 'th'))
+
+    found = None
+    depth = 0
+    header, rows, row = [], [], None
+    skipping = False
+
+    for chunk in chunks:
+        parser.feed(chunk)
+
+        for event, element in parser.read_events():
+            tag = element.tag
+
+            if tag == 'table':
+                if event == 'start':
+                    depth += 1
+                    if depth == 1:
+                        header, rows, skipping = [], [], False
+                else:
+                    depth -= 1
+                    if depth == 0:
+                        if not skipping and (header or rows):
+                            found = (header, rows)
+                            if match is not None:
+                                parser.close()
+                                return found
+                        element.clear()
+                continue
+
+            if depth != 1 or skipping:
+                continue
+
+            if tag == 'tr':
+                if event == 'start':
+                    row = []
+                else:
+                    if row and all(cell.tag == 'th' for cell in element):
+                        header = row
+                        if match is not None and not match(header):
+                            skipping = True
+                    elif row:
+                        rows.append(row)
+                    row = None
+                    element.clear()
+
+            elif tag in ('td', 'th') and event == 'end' and row is not None:
+                row.append(''.join(element.itertext()).strip())
+
+    parser.close()
+
+    if found is None:
+        raise ValueError("No tables found")
+
+    return found
+
+
+def _numeric_block(lines, columns):
+    """
+    A function that parses the numeric cells of many rows with a single C level CSV pass.
+
+    :param lines: list of str objects, the tab separated cells of one row each
+    :param columns: names of the columns held by every line
+    :return: A dictionary object of float64 NumPy arrays keyed by column name, NaN where a cell holds no number
+    """
+    text = '\n'.join(lines).translate(_NUMBER_CHARS)
+    if not text.strip():
+        return {column: np.full(len(lines), np.nan) for column in columns}
+
+    frame = pd.read_csv(io.StringIO(text), sep='\t', header=None, names=columns, na_values=['-'],
+                        skip_blank_lines=False, quoting=csv.QUOTE_NONE)
+
+    # Cells holding stray text leave the whole column as strings, coerce them to NaN
+    return {column: pd.to_numeric(frame[column], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+            for column in columns}
+
+
+def _nullable_int(values):
+    """
+    A function that turns a float64 array into a nullable Int64 array, NaN becoming a missing value.
+
+    :param values: NumPy float64 array of whole numbers
+    :return: A Pandas IntegerArray object
+    """
+    values = np.asarray(values, dtype=np.float64)
+    missing = np.isnan(values)
+    return pd.arrays.IntegerArray(np.where(missing, 0, values).astype(np.int64), missing)
+
+
+def _clean_historical(tables, keys=None, name='ticker'):
+    """
+    A function that cleans many raw historical tables in one vectorized pass.
+
+    Every table is read into the same schema: float64 Open, High, Low and Close, nullable Int64 Volume
+    and Market_cap and a datetime64 index parsed with an explicit format.
+    The numbers of all tables sharing a header are parsed by a single CSV read, the rows are sorted
+    once and a day downloaded twice keeps its last value.
+
+    :param tables: list of (header, rows) tuples as returned by _extract_table
+    :param keys: optional list with a key per table, e.g. its ticker, added as the outer index level
+    :param name: name of the outer index level when keys are given
+    :return: A Pandas DataFrame object indexed and sorted by date, or by key and date when keys are given
+    """
+    with _timed('clean', table='historical'):
+        columns = list(dict.fromkeys(_HISTORICAL_COLUMNS.values()))
+        lengths = np.array([len(rows) for _, rows in tables], dtype=np.int64)
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+        n = int(offsets[-1])
+
+        dates = []
+        blocks = {}
+        for i, (header, rows) in enumerate(tables):
+            positions = {cell.strip(): pos for pos, cell in enumerate(header)}
+
+            present = {}
+            for raw_name, column in _HISTORICAL_COLUMNS.items():
+                if raw_name in positions:
+                    present.setdefault(column, positions[raw_name])
+
+            dates.extend(map(operator.itemgetter(positions['Date']), rows))
+
+            if present and rows:
+                # Tables sharing a layout are parsed together, CoinMarketCap pages all share one
+                getter = operator.itemgetter(*present.values())
+                if len(present) == 1:
+                    lines = list(map(getter, rows))
+                else:
+                    lines = ['\t'.join(getter(row)) for row in rows]
+                blocks.setdefault(tuple(present), []).append((i, lines))
+
+        values = {column: np.full(n, np.nan) for column in columns}
+        for present, parts in blocks.items():
+            parsed = _numeric_block([line for _, lines in parts for line in lines], list(present))
+
+            read = 0
+            for i, lines in parts:
+                for column in present:
+                    values[column][offsets[i]:offsets[i + 1]] = parsed[column][read:read + len(lines)]
+                read += len(lines)
+
+        stamps = pd.to_datetime(dates, format=_HISTORICAL_DATE_FORMAT).values
+
+        # CoinMarketCap lists the most recent day first, order by key then date in one sort
+        if keys is None:
+            order = np.argsort(stamps, kind='stable')
+            sorted_stamps = stamps[order]
+            keep = np.ones(n, dtype=bool)
+            keep[:-1] = sorted_stamps[1:] != sorted_stamps[:-1]
+        else:
+            table_codes, uniques = pd.factorize(pd.Index(keys, dtype=object), sort=False)
+            codes = np.repeat(table_codes, lengths)
+            order = np.lexsort((stamps, codes))
+            sorted_stamps, sorted_codes = stamps[order], codes[order]
+            keep = np.ones(n, dtype=bool)
+            keep[:-1] = (sorted_stamps[1:] != sorted_stamps[:-1]) | (sorted_codes[1:] != sorted_codes[:-1])
+
+        order = order[keep]
+        data = {}
+        for column in columns:
+            column_values = values[column][order]
+
+            # Volume and market cap are whole numbers, nullable so that a missing day keeps the dtype
+            if column in _INTEGER_COLUMNS:
+                column_values = _nullable_int(column_values)
+
+            data[column] = column_values
+
+        date_index = pd.DatetimeIndex(stamps[order], name='Date')
+        if keys is None:
+            index = date_index
+        else:
+            index = pd.MultiIndex.from_arrays([uniques.take(codes[order]), date_index], names=[name, 'Date'])
+
+        return pd.DataFrame(data, index=index, copy=False)
+
+
+def _is_historical_table(header):
+    return 'Date' in header
+
+
+def _read_historical(chunks):
+    """
+    A function that extracts and cleans the historical data table of a page.
+
+    :param chunks: iterable of bytes or str objects making up the page
+    :return: A Pandas DataFrame object indexed and sorted by date
+    """
+    return _clean_historical([_extract_table(chunks, match=_is_historical_table, table='historical')])
+
+
+def _is_snapshot_table(header):
+    return 'Symbol' in header and 'Market Cap' in header
+
+
+def _snapshot_frame(header, rows):
+    """
+    A function that builds the cleaned historical snapshot DataFrame from the extracted table.
+
+    :param header: list of header cells of the snapshot table
+    :param rows: list of rows of cell strings
+    :return: A Pandas DataFrame object without the trailing chart column
+    """
+    # The last column only holds a menu on the website
+    header = ['Rank' if name == '#' else name for name in header[:-1]]
+    width = len(header)
+
+    snap_df = pd.DataFrame([row[:width] for row in rows], columns=header)
+
+    if 'Rank' in snap_df.columns:
+        snap_df['Rank'] = pd.to_numeric(snap_df['Rank'])
+
+    return snap_df
+
+
+def _read_snapshot(chunks):
+    """
+    A function that extracts and cleans the table of a historical snapshot page.
+
+    :param chunks: iterable of bytes or str objects making up the page
+    :return: A Pandas DataFrame object with historical snapshot data
+    """
+    header, rows = _extract_table(chunks, match=_is_snapshot_table, table='snapshot')
+    with _timed('clean', table='snapshot'):
+        return _snapshot_frame(header, rows)
@@ -0,0 +1,73 @@
+from coinsta.lazy import _lazy_import
+
+requests = _lazy_import('requests')
+adapters = _lazy_import('requests.adapters')
+retry_util = _lazy_import('urllib3.util.retry')
+
+
+class Transport:
+    """
+    A pooled, keep-alive HTTP transport shared by the requests made to CoinMarketCap.
+
+    Connections are kept warm between calls. Connection errors, timeouts and requests
+    answered with 429 or 5xx statuses are retried with a jittered exponential backoff.
+    """
+
+    retry_statuses = (429, 500, 502, 503, 504)
+
+    def __init__(self, pool_size=10, timeout=10, retries=3, backoff=0.5, headers=None):
+        """
+        :param pool_size: Number of connections kept alive per host.
+        :param timeout: Seconds (or a (connect, read) tuple) to wait for CoinMarketCap before giving up.
+        :param retries: Number of times a request is retried on connection errors or 429/5xx responses.
+        :param backoff: Backoff factor in seconds applied between retries, plus up to as much random jitter.
+        :param headers: Optional dictionary of headers sent with every request.
+        """
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+
+        options = dict(total=retries, backoff_factor=backoff, status_forcelist=self.retry_statuses,
+                       raise_on_status=False, respect_retry_after_header=True)
+        try:
+            retry = retry_util.Retry(backoff_jitter=backoff, **options)
+        except TypeError:
+            # urllib3 1.x retries without jitter
+            retry = retry_util.Retry(**options)
+        adapter = adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+    def __repr__(self):
+        return "<Transport(pool_size={0}, timeout={1}, retries={2})>".format(self.pool_size, self.timeout,
+                                                                             self.retries)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def get(self, url, params=None, headers=None, stream=False):
+        """
+        Performs a GET request over the pooled connections.
+
+        :param url: HTTP link to request
+        :param params: Optional dictionary of query parameters
+        :param headers: Optional dictionary of headers for this request only
+        :param stream: Boolean indicating whether the body is read lazily by the caller
+        :return: A requests Response object
+        """
+        return self.session.get(url, params=params, headers=headers, timeout=self.timeout, stream=stream)
+
+    def close(self):
+        """
+        Closes every pooled connection.
+        """
+        self.session.close()
+
@@ -1,8 +1,23 @@
+import hashlib
 import json
-import pandas as pd
-from datetime import datetime
-from requests import Session
-from requests.exceptions import ConnectionError, Timeout, TooManyRedirects
+import os
+import random
+import threading
+import time
+import warnings
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+from coinsta.tables import _extract_table, _stream_html
+from coinsta.config import get_config
+from coinsta.exceptions import CoinstaError, AccessDenied, ApiKeyError, RateLimitError, TransientError, \
+    UnknownTickerWarning, WrongCoinCode
+from coinsta.instrument import _HOOKS, _emit, _retries, _timed
+from coinsta.lazy import _lazy_import
+
+np = _lazy_import('numpy')
+pd = _lazy_import('pandas')
+requests_exceptions = _lazy_import('requests.exceptions')
 
 
 def _readable_date(string):
@@ -25,46 +40,487 @@ def _snapshot_readable_date(specified_date):
     return specified_date.strftime('%B %d, %Y')
 
 
-def _ticker_checker(ticker):
+def _historical_url(slug, start, end, config=None):
+    """
+    A function that builds the historical data url of a crypto-currency on CoinMarketCap.
+
+    :param slug: website crypto id as returned by _ticker_checker
+    :param start: string formatted starting date (YYYYMMDD)
+    :param end: string formatted ending date (YYYYMMDD)
+    :param config: Config object holding the website url, the global configuration otherwise
+    :return: String object representing the historical data url
+    """
+    return (config or get_config()).historical_url(slug, start, end)
+
+
+def _snapshot_url(period, config=None):
+    """
+    A function that builds the historical snapshot url of a date on CoinMarketCap.
+
+    :param period: date object of the snapshot
+    :param config: Config object holding the website url, the global configuration otherwise
+    :return: String object representing the historical snapshot url
+    """
+    return (config or get_config()).snapshot_url(period)
+
+
+def _date_chunks(start, end, chunk_days):
+    """
+    A function that splits a period into consecutive chunks of at most `chunk_days` days.
+
+    :param start: date object of the first day
+    :param end: date object of the last day
+    :param chunk_days: maximum number of days per chunk
+    :return: A list of (start, end) tuples of string formatted dates (YYYYMMDD)
+    """
+    if chunk_days < 1:
+        raise ValueError("chunk_days must be a positive integer")
+
+    chunks = []
+    chunk_start = start
+    while chunk_start <= end:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end)
+        chunks.append((chunk_start.strftime('%Y%m%d'), chunk_end.strftime('%Y%m%d')))
+        chunk_start = chunk_end + timedelta(days=1)
+
+    return chunks
+
+
+class _RateLimiter:
+    """
+    A thread safe limiter spacing the requests sent to the same host.
+    """
+
+    def __init__(self, rate):
+        """
+        :param rate: Number of requests per second allowed per host, None disables the limit.
+        """
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        """
+        Blocks until a request to the host of the supplied url is allowed.
+
+        :param url: HTTP link about to be requested
+        """
+        if not self.interval:
+            return
+
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next.get(host, now))
+            self._next[host] = slot + self.interval
+
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def _is_directory_table(header):
+    return 'Symbol' in header and 'Name' in header
+
+
+def _read_table(url, match=None, table=None, transport=None):
+    """
+    A function that streams an HTML page and extracts the first table accepted by `match`.
+
+    :param url: HTTP link of the page
+    :param match: optional callable accepting the list of header cells and returning a boolean
+    :param table: optional name of the table reported to the instrumentation hooks
+    :param transport: Transport object to use, the one of the global configuration otherwise
+    :return: A tuple of the list of header cells and a list of rows, each a list of cell strings
+    """
+    return _extract_table(_stream_html(url, transport=transport), match=match, table=table)
+
+
+class _SlugDirectory:
+    """
+    A process wide index of crypto tickers to CoinMarketCap website ids.
+
+    The `/all/views/all/` page is downloaded once, kept in memory as a dictionary
+    and persisted on disk so that other processes can reuse it until the TTL expires.
+    Stale entries are still served while a background thread refreshes the index.
+    Every configuration pointing at another website gets an index and a file of its own.
+    """
+
+    def __init__(self, ttl=None, path=None, miss_interval=300):
+        """
+        :param ttl: Number of seconds the directory stays fresh. Defaults to $COINSTA_SLUG_TTL or a day.
+        :param path: JSON file persisting the directory between processes. Defaults to `slugs.json` in the cache dir,
+                     the url of the directory is hashed into the name of the file.
+        :param miss_interval: Minimum number of seconds between refreshes triggered by unknown tickers.
+        """
+        if ttl is None:
+            ttl = float(os.environ.get('COINSTA_SLUG_TTL', 24 * 60 * 60))
+
+        self.ttl = ttl
+        self._path = path
+        self.miss_interval = miss_interval
+        self._indexes = {}
+        self._fetched_at = {}
+        self._tried_at = {}
+        self._unavailable = {}
+        self._lock = threading.Lock()
+        self._refreshers = {}
+
+    def __repr__(self):
+        return "<_SlugDirectory(entries={0}, ttl={1})>".format(sum(map(len, self._indexes.values())), self.ttl)
+
+    @property
+    def path(self):
+        """
+        The location the JSON files persisting the directories are named after.
+        """
+        return self._path or os.path.join(get_config().cache_dir, 'slugs.json')
+
+    @path.setter
+    def path(self, path):
+        self._path = path
+
+    def path_for(self, config=None):
+        """
+        Returns the JSON file persisting the directory of a configuration.
+
+        :param config: Config object holding the website url, the global configuration otherwise
+        :return: A string object representing the location of the file
+        """
+        config = config or get_config()
+        root, ext = os.path.splitext(self._path or os.path.join(config.cache_dir, 'slugs.json'))
+        digest = hashlib.sha1(config.directory_url().encode('utf-8')).hexdigest()[:12]
+        return "{0}-{1}{2}".format(root, digest, ext)
+
+    def lookup(self, ticker, config=None):
+        """
+        Returns the website id for the supplied ticker or None if it is not listed.
+
+        :param ticker: crypto ticker as a string
+        :param config: Config object holding the website url and transport, the global configuration otherwise
+        :return: A string object representing the website crypto id or None
+        """
+        config = config or get_config()
+        url = config.directory_url()
+
+        if not self.warm(config) and self._is_stale(url):
+            self.refresh_in_background(config)
+
+        slug = self._indexes[url].get(ticker.upper())
+        _emit('cache', cache='slugs', hit=slug is not None)
+
+        # Unknown tickers may be new listings so give the directory one more chance,
+        # a failed attempt counts too so that an unreachable website is not asked again for every ticker
+        if slug is None and self._since_refresh(url) > self.miss_interval:
+            with self._lock:
+                if self._since_refresh(url) > self.miss_interval:
+                    self._tried_at[url] = time.time()
+                    try:
+                        self._refresh(config)
+                    except Exception:
+                        pass
+            slug = self._indexes[url].get(ticker.upper())
+
+        return slug
+
+    def warm(self, config=None):
+        """
+        Makes sure the directory of a configuration is in memory, reading it from disk or downloading it.
+
+        :param config: Config object holding the website url and transport, the global configuration otherwise
+        :return: A boolean indicating whether the directory had to be loaded
+        """
+        config = config or get_config()
+        url = config.directory_url()
+
+        if url in self._indexes:
+            return False
+
+        with self._lock:
+            if url not in self._indexes and not self._load(config):
+                self._refresh(config)
+        return True
+
+    def mark_unavailable(self, slug, config=None):
+        """
+        Remembers for the TTL that the website has no page for the id, so that it fails before any download.
+
+        :param slug: website crypto id as a string
+        :param config: Config object holding the website url, the global configuration otherwise
+        """
+        self._unavailable[((config or get_config()).directory_url(), slug.lower())] = time.time()
+
+    def is_unavailable(self, slug, config=None):
+        """
+        Returns whether the website id recently failed with no page on the website.
+
+        :param slug: website crypto id as a string
+        :param config: Config object holding the website url, the global configuration otherwise
+        :return: A boolean object
+        """
+        marked_at = self._unavailable.get(((config or get_config()).directory_url(), slug.lower()))
+        return marked_at is not None and time.time() - marked_at <= self.ttl
+
+    def refresh(self, config=None):
+        """
+        Downloads the directory from CoinMarketCap, replaces the index and persists it on disk.
+
+        :param config: Config object holding the website url and transport, the global configuration otherwise
+        """
+        with self._lock:
+            self._refresh(config or get_config())
+
+    def refresh_in_background(self, config=None):
+        """
+        Starts a daemon thread refreshing the directory unless one is already running.
+
+        :param config: Config object holding the website url and transport, the global configuration otherwise
+        """
+        config = config or get_config()
+        url = config.directory_url()
+
+        with self._lock:
+            refresher = self._refreshers.get(url)
+            if refresher is not None and refresher.is_alive():
+                return
+            refresher = self._refreshers[url] = threading.Thread(target=self._refresh_quietly, args=(config,),
+                                                                 name='coinsta-slug-refresh', daemon=True)
+            refresher.start()
+
+    def clear(self):
+        """
+        Drops the in-memory indexes so that the next lookup reloads them.
+        """
+        with self._lock:
+            self._indexes = {}
+            self._fetched_at = {}
+            self._tried_at = {}
+            self._unavailable = {}
+
+    def _refresh_quietly(self, config):
+        try:
+            self.refresh(config)
+        except Exception:
+            # Keep serving the stale index, the next lookup will try again
+            pass
+
+    def _is_stale(self, url):
+        return time.time() - self._fetched_at[url] > self.ttl
+
+    def _since_refresh(self, url):
+        return time.time() - max(self._fetched_at[url], self._tried_at.get(url, 0))
+
+    def _refresh(self, config):
+        url = config.directory_url()
+        try:
+            header, rows = _read_table(url, match=_is_directory_table, table='directory', transport=config.transport)
+        except requests_exceptions.HTTPError as e:
+            raise _http_error(e.response.status_code, url,
+                              CoinstaError("The CoinMarketCap directory is missing at {0}".format(url))) from e
+        symbol_pos, name_pos = header.index('Symbol'), header.index('Name')
+
+        index = dict()
+        for symbol, name in ((row[symbol_pos], row[name_pos]) for row in rows):
+            # Keep the first (highest ranked) coin when symbols collide
+            index.setdefault(str(symbol).upper(), name)
+
+        self._indexes[url] = index
+        self._fetched_at[url] = time.time()
+        self._save(config)
+
+    def _load(self, config):
+        try:
+            with open(self.path_for(config)) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if time.time() - cached.get('fetched_at', 0) > self.ttl or not cached.get('slugs'):
+            return False
+
+        url = config.directory_url()
+        self._indexes[url] = cached['slugs']
+        self._fetched_at[url] = cached['fetched_at']
+        return True
+
+    def _save(self, config):
+        url = config.directory_url()
+        path = self.path_for(config)
+        tmp_path = "{0}.{1}.tmp".format(path, os.getpid())
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, 'w') as f:
+                json.dump({'url': url, 'fetched_at': self._fetched_at[url], 'slugs': self._indexes[url]}, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            # A read-only cache location only costs us the cross-process reuse
+            pass
+
+
+_SLUG_DIRECTORY = _SlugDirectory()
+
+
+def _ticker_checker(ticker, strict=False, config=None):
     """
     A function that verifies and returns the right website id based on the supplied crypto ticker.
 
+    Tickers missing from the directory are used as the website id as is with an UnknownTickerWarning,
+    unless `strict` is set. Tickers whose page was recently found missing fail without any download.
+
     :param ticker: crypto ticker as a string
+    :param strict: boolean indicating whether a ticker missing from the directory raises WrongCoinCode
+    :param config: Config object the directory is downloaded with, the global configuration otherwise
     :return: A string object representing the website crypto id for the supplied ticker
     """
+    slug = _SLUG_DIRECTORY.lookup(ticker, config)
+
+    if (slug is None and strict) or _SLUG_DIRECTORY.is_unavailable(slug or ticker, config):
+        raise WrongCoinCode("'{0}' is unavailable on CoinMarketCap.com. Search it on "
+                            "'https://coinmarketcap.com/coins/' for the right ticker name".format(ticker))
+
+    if slug is not None:
+        return slug
+
+    warnings.warn("`{0}` was not found in the CoinMarketCap directory so defaulting to exact ticker specified. "
+                  "Search `{0}` on `https://coinmarketcap.com/coins/` for the right ticker if it fails."
+                  "".format(ticker.lower()), UnknownTickerWarning, stacklevel=3)
+
+    return ticker.lower()
+
+
+def _backoff(attempt, base=0.5, cap=30.0):
+    """
+    A function that returns the seconds to wait before retrying, an exponential backoff with full jitter.
+
+    Spreading the retries at random keeps the workers of a bulk job from hitting the server in lockstep.
+
+    :param attempt: number of the attempt that failed, starting at 1
+    :param base: seconds of the first backoff
+    :param cap: maximum number of seconds to wait
+    :return: A float object
+    """
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+def _http_error(status, url, missing, retry_after=None):
+    """
+    A function that classifies an HTTP error status answered by the website.
+
+    Only a 404 or 410 tells that the page does not exist. A 401 or 403 refuses the request itself,
+    e.g. a bot block, and says nothing about the page.
+
+    :param status: integer HTTP status code
+    :param url: HTTP link that was requested
+    :param missing: exception object raised when the page does not exist
+    :param retry_after: Optional number of seconds a 429 answer asked to wait
+    :return: The exception object to raise, a TransientError for 429 and 5xx statuses
+    """
+    message = "CoinMarketCap answered {0} to {1}".format(status, url)
+
+    if status is None or status in (404, 410):
+        return missing
+    if status == 429:
+        return RateLimitError(message, retry_after)
+    if status >= 500:
+        return TransientError(message)
+    if status in (401, 403):
+        return AccessDenied(message)
+    return CoinstaError(message)
+
+
+def _retry_after(value, default=60.0):
+    """
+    A function that reads a Retry-After header, given either as seconds or as an HTTP date.
+
+    :param value: str object of the header or None
+    :param default: Number of seconds returned when the header is missing or cannot be read
+    :return: A float object of the seconds to wait
+    """
+    if not value:
+        return default
+
     try:
-        # Pass the html from CoinMarketCap to Pandas
-        url = "https://coinmarketcap.com/all/views/all/"
-        df = pd.read_html(url)[-1]
+        return max(0.0, float(value))
+    except ValueError:
+        pass
 
-        # Get a dictionary of the names and symbols
-        check_dict = df[['Name', 'Symbol']].to_dict('records')
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return default
 
-        # Upper case user supplied ticker
-        ticker = ticker.upper()
+    if retry_at is None:
+        return default
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
 
-        for item in check_dict:
-            # Return the site id for the user specified  ticker
-            if item['Symbol'] == ticker:
-                return item['Name']
 
-        print("`{0}` was not found in the top 100 list so defaulting to exact ticker specified. \n"
-              "Search `{0}` on `https://coinmarketcap.com/coins/` for the right ticker if it fails. \n"
-              "".format(ticker.lower()))
+def _api_json(status, text, url, retry_after=None):
+    """
+    A function that reads the JSON body of an API response.
 
-        return ticker.lower()
+    CoinMarketCap reports its errors in a JSON status left to _check_api_status. Error statuses answered
+    without one, e.g. a proxy error page, are classified like website errors instead of failing to parse.
+    A rate limited answer raises RateLimitError at once so that the delay it asked for reaches the caller.
+
+    :param status: integer HTTP status code
+    :param text: str object of the response body
+    :param url: HTTP link that was requested
+    :param retry_after: Number of seconds the Retry-After header of a 429 answer asked to wait, None otherwise
+    :return: JSON object containing response data
+    """
+    try:
+        response_json = json.loads(text)
+    except ValueError:
+        if status < 400:
+            raise
+        error = CoinstaError("CoinMarketCap answered {0} to {1}".format(status, url))
+    else:
+        if retry_after is not None:
+            _check_api_status(response_json, retry_after)
+        return response_json
+
+    raise _http_error(status, url, error, retry_after)
 
-    except Exception as e:
-        raise e
 
+def _check_api_status(response_json, retry_after=None):
+    """
+    A function that raises the errors reported in the status of an API response which no caller can handle.
+
+    Invalid requests such as unknown symbols are left to the callers.
 
-def _parse_cmc_url(url, api_key, **kwargs):
+    :param response_json: JSON object returned by the CoinMarketCap API
+    :param retry_after: Optional number of seconds the Retry-After header asked to wait, kept on RateLimitError
+    :return: The integer error code of the response, 0 on success
+    """
+    status = response_json.get('status', {})
+    error_code = status.get('error_code') or 0
+    message = status.get('error_message') or 'CoinMarketCap API error {0}'.format(error_code)
+
+    # CoinMarketCap reports key and plan problems with 401-403 or 1001-1007, rate limits with 429 or 1008-1011
+    if error_code in (401, 402, 403) or 1001 <= error_code <= 1007:
+        raise ApiKeyError('Please check API Key as it was rejected by CoinMarketCap: {0}'.format(message))
+
+    if error_code == 429 or 1008 <= error_code <= 1011:
+        raise RateLimitError(message, retry_after)
+
+    if error_code >= 500 and not 1000 <= error_code < 2000:
+        raise TransientError(message)
+
+    return error_code
+
+
+def _parse_cmc_url(url, api_key, transport=None, cache=None, limiter=None, ledger=None, **kwargs):
     """
     This function takes the user supplied url link and API key along with acceptable parameters to
     CoinMarketCap PRO API and returns the JSON response data.
 
     :param url: HTTP link to an acceptable CoinMarketCap API endpoint
     :param api_key: API key from CoinMarketCap in strings
+    :param transport: Transport object whose pooled connections are reused, the global configuration's otherwise
+    :param cache: Optional ResponseCache object serving fresh responses without calling the API
+    :param limiter: Optional TokenBucket object holding requests back to the plan's rate limit
+    :param ledger: Optional CreditLedger object tallying the credits consumed
     :param kwargs: All acceptable parameters available in CoinMarketCap API
     :return: JSON object containing response data
     """
@@ -79,14 +535,284 @@ def _parse_cmc_url(url, api_key, **kwargs):
 
     }
 
-    session = Session()
-    session.headers.update(headers)
+    if transport is None:
+        transport = get_config().transport
+
+    def load():
+        if limiter is not None:
+            limiter.acquire()
+
+        started = time.perf_counter()
+        response = transport.get(url, params=parameters, headers=headers)
+
+        if _HOOKS:
+            connect = response.elapsed.total_seconds()
+            _emit('request', url=url, status=response.status_code, bytes=len(response.content), connect=connect,
+                  transfer=max(0.0, time.perf_counter() - started - connect), retries=_retries(response))
+
+        # The transport already retried, hold every caller back for as long as we are told to
+        retry_after = None
+        if response.status_code == 429:
+            retry_after = _retry_after(response.headers.get('Retry-After'))
+            if limiter is not None:
+                limiter.penalize(retry_after)
+
+        with _timed('parse', table='json'):
+            response_json = _api_json(response.status_code, response.text, url, retry_after)
+
+        if ledger is not None:
+            ledger.record(url, response_json.get('status', {}).get('credit_count', 0))
 
-    try:
-        response = session.get(url, params=parameters)
-        response_json = json.loads(response.text)
-        session.close()
         return response_json
 
-    except (ConnectionError, Timeout, TooManyRedirects) as e:
-        raise e
+    # Connection errors and timeouts were already retried by the transport
+    if cache is None:
+        return load()
+
+    return cache.fetch(url, parameters, load)
+
+
+def _currencies(convert):
+    """
+    A function that normalises the convert targets supplied by users into a list of upper cased symbols.
+
+    :param convert: str object such as 'USD' or 'USD,EUR', or an iterable of str objects
+    :return: A list of str objects without duplicates
+    """
+    if isinstance(convert, str):
+        convert = convert.split(',')
+
+    currencies = list(dict.fromkeys(currency.strip().upper() for currency in convert if currency.strip()))
+    if not currencies:
+        raise ValueError("At least one currency to convert to is required")
+
+    return currencies
+
+
+def _merge_quotes(responses):
+    """
+    A function that merges the responses of one request sent once per chunk of convert targets.
+
+    The `quote` of every coin holds the currencies of all the responses. Responses may be
+    shared with a cache so they are copied rather than updated.
+
+    :param responses: list of JSON objects returned by the same endpoint with different `convert` values
+    :return: JSON object containing the merged response data, or the first error response
+    """
+    for response in responses:
+        if response['status']['error_code']:
+            return response
+
+    if len(responses) == 1:
+        return responses[0]
+
+    def merge(coins):
+        merged = dict(coins[0])
+        merged['quote'] = dict(coins[0]['quote'])
+        for coin in coins[1:]:
+            merged['quote'].update(coin['quote'])
+        return merged
+
+    data = [response['data'] for response in responses]
+    first = data[0]
+
+    # Listings are a list, quotes a dictionary keyed by symbol and global metrics a single record
+    if isinstance(first, list):
+        others = [{coin['id']: coin for coin in page} for page in data[1:]]
+        merged = [merge([coin] + [other[coin['id']] for other in others if coin['id'] in other]) for coin in first]
+    elif 'quote' in first:
+        merged = merge(data)
+    else:
+        merged = {key: merge([coin] + [other[key] for other in data[1:] if key in other])
+                  for key, coin in first.items()}
+
+    response = dict(responses[0])
+    response['data'] = merged
+    return response
+
+
+def _quote_fields(record, quotes, currency):
+    """
+    A function that adds the quote of one or many currencies to a record.
+
+    A single currency keeps the plain field names, many currencies are prefixed as `<currency>.<field>`.
+
+    :param record: dictionary object the fields are added to
+    :param quotes: dictionary object of the `quote` field keyed by currency
+    :param currency: string of the currency the quote was converted to or a list of them
+    """
+    if isinstance(currency, str):
+        record.update(quotes[currency])
+        return
+
+    for name in currency:
+        for key, val in quotes[name].items():
+            record['{0}.{1}'.format(name, key)] = val
+
+
+def _quote_record(coin, currency):
+    """
+    A function that flattens one coin of the quotes endpoint into a dictionary of market and price information.
+
+    :param coin: dictionary object of one coin as returned by the quotes endpoint
+    :param currency: string of the currency the quote was converted to, or a list for `<currency>.<field>` keys
+    :return: A dictionary object containing market and price information on the coin
+    """
+    record = dict()
+    record['name'] = coin['name']
+    record['symbol'] = coin['symbol']
+    record['rank'] = coin['cmc_rank']
+    record['circulating_supply'] = coin['circulating_supply']
+    record['total_supply'] = coin['total_supply']
+    record['max_supply'] = coin['max_supply']
+
+    _quote_fields(record, coin['quote'], currency)
+
+    return record
+
+
+def _global_record(data, currency):
+    """
+    A function that flattens the response of the global metrics endpoint into a dictionary.
+
+    :param data: dictionary object of the `data` field returned by the global metrics endpoint
+    :param currency: string of the currency the quote was converted to, or a list for `<currency>.<field>` keys
+    :return: A dictionary object containing global market information of crypto-currencies
+    """
+    record = dict()
+
+    record['active_cryptos'] = data['active_cryptocurrencies']
+    record['active_exchanges'] = data['active_exchanges']
+    record['btc_dominance'] = data['btc_dominance']
+    record['eth_dominance'] = data['eth_dominance']
+
+    _quote_fields(record, data['quote'], currency)
+
+    return record
+
+
+# Known fields of the listings endpoint and the dtype they are parsed into
+_LISTING_FIELDS = {
+    'id': 'int',
+    'name': 'str',
+    'symbol': 'str',
+    'slug': 'str',
+    'num_market_pairs': 'nullable_int',
+    'date_added': 'datetime',
+    'tags': 'category',
+    'max_supply': 'float',
+    'circulating_supply': 'float',
+    'total_supply': 'float',
+    'platform': 'category',
+    'cmc_rank': 'nullable_int',
+    'last_updated': 'datetime'
+}
+
+_LISTING_QUOTE_FIELDS = {
+    'price': 'float',
+    'volume_24h': 'float',
+    'percent_change_1h': 'float',
+    'percent_change_24h': 'float',
+    'percent_change_7d': 'float',
+    'market_cap': 'float',
+    'last_updated': 'datetime'
+}
+
+
+def _listing_value(record, name, currency):
+    """
+    A function that returns one field of a listings record, flattening the nested fields.
+
+    :param record: dictionary object of one coin returned by the listings endpoint
+    :param name: name of the field
+    :param currency: currency of the quote field, None for top level fields
+    :return: The value of the field, None when missing
+    """
+    if currency is not None:
+        return record['quote'].get(currency, {}).get(name)
+
+    value = record.get(name)
+
+    # Nested values are reduced to a label so that they can be stored as categories
+    if name == 'tags':
+        return ','.join(value) if value else None
+    if name == 'platform':
+        return value['name'] if value else None
+
+    return value
+
+
+def _listing_column(data, name, currency, kind):
+    """
+    A function that builds one typed column of the listings DataFrame.
+
+    :param data: list of dictionary objects returned by the listings endpoint
+    :param name: name of the field
+    :param currency: currency of the quote field, None for top level fields
+    :param kind: one of 'int', 'nullable_int', 'float', 'str', 'category', 'datetime' or 'object'
+    :return: A numpy array or Pandas object holding the column
+    """
+    n = len(data)
+
+    if kind in ('int', 'nullable_int', 'float'):
+        values = np.fromiter((np.nan if v is None else v
+                              for v in (_listing_value(r, name, currency) for r in data)),
+                             dtype=np.float64, count=n)
+
+        # Fields some coins do not report keep a stable nullable integer dtype across pages
+        if kind == 'nullable_int':
+            return pd.array(values, dtype='Int64')
+        if kind == 'int':
+            return values.astype(np.int64)
+        return values
+
+    values = np.empty(n, dtype=object)
+    for i, record in enumerate(data):
+        values[i] = _listing_value(record, name, currency)
+
+    if kind == 'category':
+        return pd.Categorical(values)
+    if kind == 'datetime':
+        return pd.to_datetime(values)
+    return values
+
+
+def _listings_frame(data, columns=None):
+    """
+    A function that turns the records returned by the listings endpoint into a DataFrame.
+
+    The JSON is read once into one typed array per column: float64 for prices and supplies,
+    int64 for ids, nullable Int64 for ranks and market pairs, category for tags and platforms
+    and datetime64 for timestamps.
+    Fields unknown to coinsta are kept with the dtype Pandas infers.
+
+    :param data: list of dictionary objects of the `data` field returned by the listings endpoint
+    :param columns: optional list of the columns to build, e.g. ['symbol', 'USD.price']
+    :return: A Pandas DataFrame object with the nested quotes expanded into `<currency>.<field>` columns
+    """
+    if not data:
+        return pd.DataFrame(columns=columns)
+
+    first = data[0]
+
+    # Output columns follow the order of the API fields, nested quotes last
+    spec = [(name, None, _LISTING_FIELDS.get(name, 'object')) for name in first if name != 'quote']
+    for currency, quote in first.get('quote', {}).items():
+        spec.extend(('{0}.{1}'.format(currency, name), currency, _LISTING_QUOTE_FIELDS.get(name, 'object'))
+                    for name in quote)
+
+    if columns is not None:
+        wanted = set(columns)
+        spec = [item for item in spec if item[0] in wanted]
+
+    frame = {}
+    for column, currency, kind in spec:
+        name = column.split('.', 1)[1] if currency is not None else column
+        frame[column] = _listing_column(data, name, currency, kind)
+
+    df = pd.DataFrame(frame)
+
+    if columns is not None:
+        df = df.reindex(columns=[column for column in columns if column in df.columns])
+
+    return df
@@ -0,0 +1,99 @@
+import os
+from coinsta.lazy import _lazy_import
+
+pd = _lazy_import('pandas')
+
+
+class ChunkWriter:
+    """
+    A writer streaming DataFrame chunks to a single CSV, NDJSON or Parquet file.
+
+    Chunks are appended as they arrive so the whole dataset never sits in memory.
+    Parquet output requires `pyarrow` and takes the schema of the first chunk.
+    """
+
+    formats = ('csv', 'ndjson', 'parquet')
+
+    def __init__(self, path, fmt=None, index=False):
+        """
+        :param path: Location of the output file.
+        :param fmt: One of 'csv', 'ndjson' or 'parquet'. Inferred from the file extension by default.
+        :param index: Boolean indicating whether the DataFrame index is written as well.
+        """
+        if fmt is None:
+            fmt = os.path.splitext(path)[1].lstrip('.').lower()
+            fmt = {'json': 'ndjson', 'jsonl': 'ndjson', 'pq': 'parquet'}.get(fmt, fmt)
+
+        if fmt not in self.formats:
+            raise ValueError("Unsupported output format '{0}', use one of {1}".format(fmt, ', '.join(self.formats)))
+
+        self.path = path
+        self.fmt = fmt
+        self.index = index
+        self.rows = 0
+        self._file = None
+        self._parquet = None
+
+    def __repr__(self):
+        return "<ChunkWriter({0}, fmt={1}, rows={2})>".format(self.path, self.fmt, self.rows)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def write(self, df):
+        """
+        Appends a DataFrame chunk to the output file.
+
+        :param df: Pandas DataFrame object with the same columns as the previous chunks
+        """
+        if self.index:
+            df = df.reset_index()
+
+        if self.fmt == 'parquet':
+            self._write_parquet(df)
+
+        else:
+            if self._file is None:
+                self._file = open(self.path, 'w', newline='')
+                if self.fmt == 'csv':
+                    df.iloc[:0].to_csv(self._file, index=False)
+
+            if self.fmt == 'csv':
+                df.to_csv(self._file, header=False, index=False)
+            elif len(df):
+                lines = df.to_json(orient='records', lines=True, date_format='iso')
+                self._file.write(lines if lines.endswith('\n') else lines + '\n')
+
+        self.rows += len(df)
+
+    def _write_parquet(self, df):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # Categories differ between chunks so they are written as plain values
+        categories = [column for column in df.columns if isinstance(df[column].dtype, pd.CategoricalDtype)]
+        if categories:
+            df = df.astype({column: object for column in categories})
+
+        if self._parquet is None:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            self._parquet = pq.ParquetWriter(self.path, table.schema)
+        else:
+            table = pa.Table.from_pandas(df, schema=self._parquet.schema, preserve_index=False)
+
+        self._parquet.write_table(table)
+
+    def close(self):
+        """
+        Flushes and closes the output file.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+        if self._parquet is not None:
+            self._parquet.close()
+            self._parquet = None
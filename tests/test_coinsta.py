@@ -1,7 +1,34 @@
+import asyncio
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
 import unittest
-from datetime import date
-from coinsta.exceptions import WrongCoinCode, BadSnapshotURL
+from datetime import date, datetime, timedelta, timezone
+from unittest import mock
+import numpy as np
+import pandas as pd
+from benchmarks.server import StandInServer
+from coinsta.exceptions import AccessDenied, CoinstaError, WrongCoinCode, BadSnapshotURL, ApiKeyError, RateLimitError, \
+    TransientError, UnknownTickerWarning, is_retryable
+from coinsta.instrument import LogExporter, PrometheusExporter, add_hook, remove_hook
 from coinsta.core import Historical, Current, HistoricalSnapshot
+from coinsta.config import Config, get_config, set_config
+from coinsta.analytics import Panel
+from coinsta.backfill import SnapshotStore, backfill
+from coinsta.cli import main
+from coinsta.cache import DiskCache, MemoryCache, ResponseCache
+from coinsta.ratelimit import CreditLedger, TokenBucket
+from coinsta.store import HistoryStore
+from coinsta.stream import Poller
+from coinsta.tables import _clean_historical, _extract_table, _read_historical
+from coinsta.transport import Transport
+from coinsta.utils import _SlugDirectory, _SLUG_DIRECTORY, _check_api_status, _retry_after, _ticker_checker
 
 
 class TestCoinsta(unittest.TestCase):
@@ -92,5 +119,1216 @@ class TestCoinsta(unittest.TestCase):
         self.assertEqual(len_july_2018, 10)
 
 
+class TestSlugDirectory(unittest.TestCase):
+    listing = (['#', 'Name', 'Symbol'], [['1', 'Bitcoin', 'BTC'], ['2', 'Ethereum', 'ETH'], ['3', 'Bitcoin Fork', 'BTC']])
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'slugs.json')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_single_download(self):
+        directory = _SlugDirectory(path=self.path)
+        with mock.patch('coinsta.utils._read_table', return_value=self.listing) as read_html:
+            self.assertEqual(directory.lookup('btc'), 'Bitcoin')
+            self.assertEqual(directory.lookup('ETH'), 'Ethereum')
+
+        self.assertEqual(read_html.call_count, 1)
+
+    def test_persisted_between_instances(self):
+        with mock.patch('coinsta.utils._read_table', return_value=self.listing):
+            _SlugDirectory(path=self.path).lookup('btc')
+
+        with mock.patch('coinsta.utils._read_table') as read_html:
+            self.assertEqual(_SlugDirectory(path=self.path).lookup('eth'), 'Ethereum')
+
+        read_html.assert_not_called()
+
+    def test_expired_cache_file(self):
+        with mock.patch('coinsta.utils._read_table', return_value=self.listing):
+            _SlugDirectory(path=self.path).lookup('btc')
+
+        with mock.patch('coinsta.utils._read_table', return_value=self.listing) as read_html:
+            _SlugDirectory(ttl=-1, path=self.path).lookup('btc')
+
+        self.assertEqual(read_html.call_count, 1)
+
+    def test_miss_refresh_throttled(self):
+        directory = _SlugDirectory(path=self.path)
+        with mock.patch('coinsta.utils._read_table', return_value=self.listing) as read_html:
+            self.assertIsNone(directory.lookup('fake_ticker'))
+            self.assertIsNone(directory.lookup('fake_ticker'))
+
+        self.assertEqual(read_html.call_count, 1)
+
+    def test_failed_miss_refresh_throttled(self):
+        directory = _SlugDirectory(path=self.path, miss_interval=-1)
+        with mock.patch('coinsta.utils._read_table', return_value=self.listing):
+            directory.lookup('btc')
+
+        directory.miss_interval = 300
+        directory._fetched_at[get_config().directory_url()] -= 600
+        with mock.patch('coinsta.utils._read_table', side_effect=ConnectionError('reset by peer')) as read_html:
+            self.assertIsNone(directory.lookup('new_coin'))
+            self.assertIsNone(directory.lookup('other_coin'))
+
+        self.assertEqual(read_html.call_count, 1)
+
+    def test_instance_config(self):
+        with StandInServer() as server, mock.patch.object(_SLUG_DIRECTORY, '_path', self.path), \
+                mock.patch.dict(_SLUG_DIRECTORY._indexes), mock.patch.dict(_SLUG_DIRECTORY._fetched_at):
+            config = server.config()
+            self.addCleanup(config.transport.close)
+
+            df = Historical('btc', date(2019, 1, 1), date(2019, 1, 31), config=config).get_data()
+            self.assertEqual(len(df), 31)
+            self.assertEqual(server.requests, 2)
+            self.assertTrue(os.path.exists(_SLUG_DIRECTORY.path_for(config)))
+            self.assertIn(config.directory_url(), _SLUG_DIRECTORY._indexes)
+
+
+class TestTransport(unittest.TestCase):
+    quote = {'status': {'error_code': 0},
+             'data': {'BTC': {'name': 'Bitcoin', 'symbol': 'BTC', 'cmc_rank': 1, 'circulating_supply': 1,
+                              'total_supply': 1, 'max_supply': 1, 'quote': {'USD': {'price': 1.0}}}}}
+
+    def test_pooled_adapter(self):
+        with Transport(pool_size=4, retries=2) as transport:
+            adapter = transport.session.get_adapter('https://pro-api.coinmarketcap.com')
+            self.assertEqual(adapter._pool_maxsize, 4)
+            self.assertEqual(adapter.max_retries.total, 2)
+            self.assertIn(429, adapter.max_retries.status_forcelist)
+
+    def test_current_reuses_transport(self):
+        transport = mock.Mock()
+        transport.get.return_value.text = json.dumps(self.quote)
+
+        with Current('key', transport=transport) as cur:
+            cur.get_current('btc')
+            cur.get_current('btc')
+
+        self.assertEqual(transport.get.call_count, 2)
+        self.assertEqual(transport.get.call_args[1]['headers']['X-CMC_PRO_API_KEY'], 'key')
+        transport.close.assert_not_called()
+
+    def test_current_closes_own_transport(self):
+        cur = Current('key')
+        with mock.patch.object(cur.transport, 'close') as close:
+            with cur:
+                pass
+        close.assert_called_once_with()
+
+
+class TestCurrentMany(unittest.TestCase):
+
+    @staticmethod
+    def coin(symbol, cmc_id):
+        return {'id': cmc_id, 'name': symbol.title(), 'symbol': symbol, 'cmc_rank': cmc_id, 'circulating_supply': 1,
+                'total_supply': 1, 'max_supply': None, 'quote': {'USD': {'price': float(cmc_id), 'extra': 0}}}
+
+    def fake_parse(self, url, api_key, transport=None, **kwargs):
+        symbols = kwargs['symbol'].split(',')
+        self.calls.append(symbols)
+        data = {s: self.coin(s, i + 1) for i, s in enumerate(symbols) if s != 'FAKE'}
+        return {'status': {'error_code': 0}, 'data': data}
+
+    def setUp(self):
+        self.calls = []
+
+    def test_chunked_batches(self):
+        with mock.patch('coinsta.core._parse_cmc_url', side_effect=self.fake_parse):
+            df = Current('key').get_current_many(['btc', 'eth', 'xrp', 'btc', 'ltc', 'dash'], chunk_size=2)
+
+        self.assertEqual(sorted(len(call) for call in self.calls), [1, 2, 2])
+        self.assertEqual(list(df.index), ['BTC', 'ETH', 'XRP', 'LTC', 'DASH'])
+        self.assertTrue(df['error'].isnull().all())
+        self.assertNotIn('extra', df.columns)
+
+    def test_invalid_reported_per_item(self):
+        with mock.patch('coinsta.core._parse_cmc_url', side_effect=self.fake_parse):
+            df = Current('key').get_current_many(['btc', 'fake'])
+
+        self.assertEqual(len(self.calls), 1)
+        self.assertTrue(pd.isnull(df.loc['BTC', 'error']))
+        self.assertTrue(pd.isnull(df.loc['FAKE', 'price']))
+        self.assertIn('Invalid ticker', df.loc['FAKE', 'error'])
+
+
+class TestAsync(unittest.TestCase):
+
+    class FakeSession:
+        def __init__(self):
+            self.in_flight = 0
+            self.peak = 0
+
+        def get(self, url, params=None, headers=None):
+            session = self
+
+            class Response:
+                status = 200
+                headers = {}
+
+                async def __aenter__(self):
+                    session.in_flight += 1
+                    session.peak = max(session.peak, session.in_flight)
+                    await asyncio.sleep(0.01)
+                    return self
+
+                async def __aexit__(self, *args):
+                    session.in_flight -= 1
+
+                async def text(self):
+                    coin = TestCurrentMany.coin(params['symbol'], 1)
+                    return json.dumps({'status': {'error_code': 0}, 'data': {params['symbol']: coin}})
+
+            return Response()
+
+    def test_gather_bounded(self):
+        from coinsta.aio import AsyncClient, AsyncCurrent
+
+        session = self.FakeSession()
+
+        async def run():
+            cur = AsyncCurrent('key', client=AsyncClient(concurrency=3, session=session))
+            return await asyncio.gather(*[cur.get_current(t) for t in ['btc', 'eth', 'xrp', 'ltc', 'dash']])
+
+        results = asyncio.run(run())
+
+        self.assertEqual([r['symbol'] for r in results], ['BTC', 'ETH', 'XRP', 'LTC', 'DASH'])
+        self.assertEqual(session.peak, 3)
+
+    def test_instance_config(self):
+        from coinsta.aio import AsyncClient, AsyncHistoricalSnapshot
+
+        with StandInServer() as server:
+            config = server.config(timeout=(2, 5), headers={'X-Proxy-Token': 'secret'})
+
+            client = AsyncClient(config=config)
+            self.assertEqual(client.headers, {'X-Proxy-Token': 'secret'})
+            self.assertEqual(client.timeout, (2, 5))
+
+            df = asyncio.run(AsyncHistoricalSnapshot(date(2018, 7, 29), config=config).get_snapshot())
+            self.assertEqual(len(df), 10)
+            self.assertEqual(server.requests, 1)
+
+    def test_async_historical_wrong_code(self):
+        from coinsta.aio import AsyncClient, AsyncHistorical
+
+        async def run():
+            client = AsyncClient()
+            with mock.patch.object(AsyncClient, 'get_text', mock.AsyncMock(return_value=(404, ''))):
+                with mock.patch('coinsta.aio._ticker_checker', return_value='fake'):
+                    await AsyncHistorical('fake', date(2018, 1, 1), client=client).get_data()
+
+        with self.assertRaises(WrongCoinCode):
+            asyncio.run(run())
+
+
+class TestHistoricalMany(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(_SLUG_DIRECTORY, 'warm')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def fake_history(slug, start, end, config=None):
+        dates = pd.date_range(start, end, name='Date')
+        return pd.DataFrame({'Open': 1.0, 'Close': 2.0, 'Volume': 10, 'Market_cap': 100}, index=dates)
+
+    @staticmethod
+    def fake_table(slug, start, end, config=None):
+        dates = pd.date_range(start, end)[::-1]
+        return ['Date', 'Open*', 'Close**'], [[day.strftime('%b %d, %Y'), '$1.00', '$2.00'] for day in dates]
+
+    def test_chunked_download(self):
+        reports = []
+        with mock.patch('coinsta.core._ticker_checker', side_effect=lambda t, strict=False, config=None: t), \
+                mock.patch('coinsta.core._download_history_table', side_effect=self.fake_table) as download:
+            df = Historical.get_many(['btc', 'eth'], date(2018, 1, 1), date(2018, 3, 1), chunk_days=30, rate=None,
+                                     progress=reports.append)
+
+        self.assertEqual(download.call_count, 4)
+        self.assertEqual(len(reports), 4)
+        self.assertEqual(df.index.names, ['ticker', 'Date'])
+        self.assertEqual(len(df.loc['btc']), 60)
+        self.assertTrue(df.loc['eth'].index.is_monotonic_increasing)
+
+    def test_failed_chunk_retried_alone(self):
+        calls = []
+
+        def flaky(slug, start, end, config=None):
+            calls.append(start)
+            if start == '20180131' and calls.count(start) == 1:
+                raise ConnectionError('reset by peer')
+            return self.fake_table(slug, start, end)
+
+        with mock.patch('coinsta.core._ticker_checker', side_effect=lambda t, strict=False, config=None: t), \
+                mock.patch('coinsta.core._download_history_table', side_effect=flaky), \
+                mock.patch('coinsta.core.time.sleep'):
+            df = Historical.get_many(['btc'], date(2018, 1, 1), date(2018, 3, 1), chunk_days=30, rate=None)
+
+        self.assertEqual(sorted(calls), ['20180101', '20180131', '20180131'])
+        self.assertEqual(len(df), 60)
+
+    def test_wrong_code_not_retried(self):
+        with mock.patch('coinsta.core._ticker_checker', side_effect=lambda t, strict=False, config=None: t), \
+                mock.patch('coinsta.core._download_history_table', side_effect=WrongCoinCode('fake')) as download:
+            with self.assertRaises(WrongCoinCode):
+                Historical.get_many(['fake'], date(2018, 1, 1), date(2018, 1, 10), rate=None)
+
+        self.assertEqual(download.call_count, 1)
+
+
+class TestHistoryStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = HistoryStore(os.path.join(self.tmp.name, 'history.sqlite'))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_missing_gaps(self):
+        frame = TestHistoricalMany.fake_history('bitcoin', '20180110', '20180120')
+        self.store.write('bitcoin', frame, '20180110', '20180120')
+
+        self.assertEqual(self.store.missing('bitcoin', '20180101', '20180131'),
+                         [(date(2018, 1, 1), date(2018, 1, 9)), (date(2018, 1, 21), date(2018, 1, 31))])
+        self.assertEqual(self.store.missing('bitcoin', '20180112', '20180115'), [])
+
+    def test_adjacent_coverage_merged(self):
+        for start, end in [('20180101', '20180110'), ('20180111', '20180120')]:
+            self.store.write('bitcoin', TestHistoricalMany.fake_history('bitcoin', start, end), start, end)
+
+        self.assertEqual(self.store.coverage('bitcoin'), [(date(2018, 1, 1), date(2018, 1, 20))])
+
+    def test_get_data_delta_fetch(self):
+        frame = TestHistoricalMany.fake_history('bitcoin', '20180101', '20180215')
+        self.store.write('bitcoin', frame, '20180101', '20180215')
+
+        with mock.patch('coinsta.core._ticker_checker', return_value='bitcoin'), \
+                mock.patch('coinsta.core._download_history', side_effect=TestHistoricalMany.fake_history) as download:
+            df = Historical('btc', date(2018, 1, 1), date(2018, 3, 1)).get_data(store=self.store)
+
+        download.assert_called_once_with('bitcoin', '20180216', '20180301', None)
+        self.assertEqual(len(df), 60)
+        self.assertEqual(df['Close'].iloc[-1], 2.0)
+        self.assertEqual(df['Close'].dtype, 'float64')
+        self.assertEqual(df['Volume'].dtype, 'Int64')
+        self.assertEqual(df['Market_cap'].dtype, 'Int64')
+
+
+class TestTables(unittest.TestCase):
+    fixtures = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+    def fixture(self, name):
+        with open(os.path.join(self.fixtures, name), 'rb') as f:
+            return f.read()
+
+    def test_historical_fixture(self):
+        page = self.fixture('historical.html')
+        chunks = [page[i:i + 1024] for i in range(0, len(page), 1024)]
+        df = _read_historical(chunks)
+
+        self.assertEqual(list(df.columns), ['Open', 'High', 'Low', 'Close', 'Volume', 'Market_cap'])
+        self.assertEqual(len(df), 60)
+        self.assertTrue(df.index.is_monotonic_increasing)
+        self.assertEqual(df.index[-1], pd.Timestamp(2018, 3, 1))
+        self.assertEqual(df['Volume'].dtype, 'Int64')
+        self.assertEqual(df['Open'].dtype, 'float64')
+
+    def test_matches_read_html(self):
+        from io import StringIO
+        page = self.fixture('historical.html').decode()
+
+        expected = pd.read_html(StringIO(page))[-1]
+        df = _read_historical([page])
+
+        self.assertAlmostEqual(df['Close'].sum(), expected['Close**'].sum(), places=6)
+        self.assertEqual(df['Market_cap'].sum(), expected['Market Cap'].sum())
+
+    def test_skips_other_tables(self):
+        page = ('<table><tr><th>Name</th></tr><tr><td>x</td></tr></table>'
+                '<table><tr><th>Date</th><th>Volume</th></tr><tr><td>Jan 02, 2018</td><td>-</td></tr>'
+                '<tr><td>Jan 01, 2018</td><td>$1,000</td></tr></table>')
+
+        header, rows = _extract_table([page], match=lambda h: 'Date' in h)
+        self.assertEqual(header, ['Date', 'Volume'])
+
+        df = _read_historical([page])
+        self.assertTrue(pd.isnull(df['Volume'].iloc[-1]))
+        self.assertEqual(df['Volume'].iloc[0], 1000.0)
+
+    def test_no_table(self):
+        with self.assertRaises(ValueError):
+            _extract_table(['<html><body><p>Not found</p></body></html>'])
+
+    def test_clean_batch(self):
+        full = (['Date', 'Open*', 'High', 'Low', 'Close**', 'Volume', 'Market Cap'],
+                [['Jan 02, 2018', '$2.00', '$3.00', '$1.00', '$2.50', '$1,000', '$20,000'],
+                 ['Jan 01, 2018', '$1.00', '$2.00', '$0.50', '$1.50', '$900', '$10,000']])
+        overlap = (['Date', 'Open*', 'High', 'Low', 'Close**', 'Volume', 'Market Cap'],
+                   [['Jan 03, 2018', '$3.00', '$4.00', '$2.00', '$3.50', '$1,100', '$30,000'],
+                    ['Jan 02, 2018', '$2.00', '$3.00', '$1.00', '$2.75', '$1,000', '$20,000']])
+        partial = (['Date', 'Close'], [['Jan 01, 2018', '-']])
+
+        df = _clean_historical([full, partial, overlap], keys=['btc', 'eth', 'btc'])
+
+        self.assertEqual(df.index.names, ['ticker', 'Date'])
+        self.assertEqual(list(df.index.get_level_values('ticker')), ['btc', 'btc', 'btc', 'eth'])
+        self.assertEqual(list(df.columns), ['Open', 'High', 'Low', 'Close', 'Volume', 'Market_cap'])
+        self.assertEqual(df.loc[('btc', pd.Timestamp(2018, 1, 2)), 'Close'], 2.75)
+        self.assertEqual(df['Open'].dtype, 'float64')
+        self.assertEqual(df['Volume'].dtype, 'Int64')
+        self.assertTrue(df.loc['eth'].isnull().all().all())
+
+        df = _clean_historical([full, overlap])
+        self.assertEqual(df['Volume'].dtype, 'Int64')
+        self.assertEqual(df['Market_cap'].tolist(), [10000, 20000, 30000])
+        self.assertTrue(df.index.is_monotonic_increasing)
+
+        self.assertTrue(_clean_historical([], keys=[]).empty)
+
+
+class TestSnapshotRange(unittest.TestCase):
+
+    def setUp(self):
+        HistoricalSnapshot.cache.clear()
+        with open(os.path.join(TestTables.fixtures, 'snapshot.html'), 'rb') as f:
+            self.page = f.read()
+
+    def test_single_download(self):
+        with mock.patch('coinsta.core._stream_html', return_value=[self.page]) as stream:
+            df = HistoricalSnapshot(date(2018, 7, 29)).get_snapshot()
+
+        stream.assert_called_once_with('https://coinmarketcap.com/historical/20180729', transport=mock.ANY)
+        self.assertEqual(len(df.columns), 10)
+        self.assertEqual(list(df['Rank'][:3]), [1, 2, 3])
+
+    def test_bad_period(self):
+        with mock.patch('coinsta.core._stream_html', return_value=[b'<html><body>404</body></html>']):
+            with self.assertRaises(BadSnapshotURL):
+                HistoricalSnapshot(date(1999, 1, 1)).get_snapshot()
+
+    def test_range_shared_cache(self):
+        with mock.patch('coinsta.core._stream_html', side_effect=lambda url, transport: [self.page]) as stream:
+            df = HistoricalSnapshot.range(date(2018, 7, 1), date(2018, 7, 31))
+            HistoricalSnapshot(date(2018, 7, 29)).get_snapshot()
+
+        self.assertEqual(stream.call_count, 5)
+        self.assertEqual(list(df.columns[:3]), ['period', 'Rank', 'Name'])
+        self.assertEqual(df['period'].nunique(), 5)
+        self.assertEqual(len(df), 50)
+
+    def test_cache_follows_config(self):
+        with mock.patch('coinsta.core._stream_html', side_effect=lambda url, transport: [self.page]) as stream:
+            HistoricalSnapshot(date(2018, 7, 29)).get_snapshot()
+            HistoricalSnapshot(date(2018, 7, 29), config=Config(web_url='http://mirror.local')).get_snapshot()
+            HistoricalSnapshot(date(2018, 7, 29)).get_snapshot()
+
+        self.assertEqual([c[0][0] for c in stream.call_args_list],
+                         ['https://coinmarketcap.com/historical/20180729', 'http://mirror.local/historical/20180729'])
+        self.assertEqual(len(HistoricalSnapshot.cache._entries), 2)
+
+
+class TestResponseCache(unittest.TestCase):
+    ok = {'status': {'error_code': 0}, 'data': {}}
+
+    def test_memory_lru(self):
+        cache = MemoryCache(maxsize=2)
+        cache.set('a', 1, 60)
+        cache.set('b', 2, 60)
+        cache.get('a')
+        cache.set('c', 3, 60)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+
+        cache.set('d', 4, -1)
+        self.assertIsNone(cache.get('d'))
+
+    def test_disk_shared(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'responses.sqlite')
+            DiskCache(path).set('a', self.ok, 60)
+            self.assertEqual(DiskCache(path).get('a'), self.ok)
+
+    def test_keyed_on_params(self):
+        cache = ResponseCache()
+        loader = mock.Mock(return_value=self.ok)
+        url = 'https://pro-api.coinmarketcap.com/v1/global-metrics/quotes/latest'
+
+        cache.fetch(url, {'convert': 'USD'}, loader)
+        cache.fetch(url, {'convert': 'USD'}, loader)
+        cache.fetch(url, {'convert': 'EUR'}, loader)
+
+        self.assertEqual(loader.call_count, 2)
+        self.assertEqual(cache.ttl(url), 300)
+
+    def test_errors_not_cached(self):
+        cache = ResponseCache()
+        loader = mock.Mock(return_value={'status': {'error_code': 400}})
+
+        cache.fetch('url', {}, loader)
+        cache.fetch('url', {}, loader)
+
+        self.assertEqual(loader.call_count, 2)
+
+    def test_single_flight(self):
+        cache = ResponseCache()
+        calls = []
+
+        def loader():
+            calls.append(1)
+            time.sleep(0.1)
+            return self.ok
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.fetch('url', {'a': 1}, loader)))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [self.ok] * 8)
+
+    def test_current_uses_cache(self):
+        transport = mock.Mock()
+        transport.get.return_value.text = json.dumps(TestTransport.quote)
+
+        cur = Current('key', transport=transport, cache=ResponseCache())
+        cur.get_current('btc')
+        cur.get_current('btc')
+
+        self.assertEqual(transport.get.call_count, 1)
+
+
+class TestListingsFrame(unittest.TestCase):
+
+    def setUp(self):
+        with open(os.path.join(TestTables.fixtures, 'listings.json')) as f:
+            self.response = json.load(f)
+
+    def test_typed_columns(self):
+        from coinsta.utils import _listings_frame
+        df = _listings_frame(self.response['data'])
+
+        self.assertEqual(len(df.columns), 20)
+        self.assertEqual(df['id'].dtype, 'int64')
+        self.assertEqual(df['USD.price'].dtype, 'float64')
+        self.assertEqual(df['tags'].dtype, 'category')
+        self.assertEqual(df['platform'].iloc[3], 'Omni')
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(df['USD.last_updated']))
+        # One coin has no rank which the nullable integer column keeps as missing
+        self.assertEqual(df['cmc_rank'].dtype, 'Int64')
+        self.assertTrue(pd.isnull(df['cmc_rank'].iloc[-1]))
+
+    def test_selected_columns(self):
+        transport = mock.Mock()
+        transport.get.return_value.text = json.dumps(self.response)
+
+        df = Current('key', transport=transport).top_100(columns=['symbol', 'USD.price'])
+
+        self.assertEqual(list(df.columns), ['symbol', 'USD.price'])
+        self.assertEqual(df['symbol'].iloc[0], 'BTC')
+
+
+class TestListingsStream(unittest.TestCase):
+
+    def setUp(self):
+        with open(os.path.join(TestTables.fixtures, 'listings.json')) as f:
+            self.data = json.load(f)['data']
+        self.starts = []
+
+    def fake_parse(self, url, api_key, transport=None, cache=None, **kwargs):
+        self.starts.append(kwargs['start'])
+        page = self.data[kwargs['start'] - 1:kwargs['start'] - 1 + kwargs['limit']]
+        return {'status': {'error_code': 0}, 'data': page}
+
+    def test_pages(self):
+        with mock.patch('coinsta.core._parse_cmc_url', side_effect=self.fake_parse):
+            chunks = list(Current('key').iter_listings(page_size=4))
+
+        self.assertEqual([len(chunk) for chunk in chunks], [4, 2])
+        self.assertEqual(self.starts, [1, 5])
+        self.assertEqual(list(chunks[1]['symbol']), ['BCH', 'USDC'])
+
+    def test_exact_multiple_pages(self):
+        with mock.patch('coinsta.core._parse_cmc_url', side_effect=self.fake_parse):
+            chunks = list(Current('key').iter_listings(page_size=3, records=True, prefetch=False))
+
+        self.assertEqual([len(chunk) for chunk in chunks], [3, 3])
+        self.assertEqual(self.starts, [1, 4, 7])
+
+    def test_export(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ['listings.csv', 'listings.ndjson', 'listings.parquet']:
+                if name.endswith('parquet'):
+                    try:
+                        import pyarrow  # noqa: F401
+                    except ImportError:
+                        continue
+
+                path = os.path.join(tmp, name)
+                with mock.patch('coinsta.core._parse_cmc_url', side_effect=self.fake_parse):
+                    rows = Current('key').export_listings(path, page_size=4, columns=['symbol', 'cmc_rank'])
+
+                self.assertEqual(rows, 6)
+
+                if name.endswith('csv'):
+                    df = pd.read_csv(path)
+                elif name.endswith('ndjson'):
+                    df = pd.read_json(path, lines=True)
+                else:
+                    df = pd.read_parquet(path)
+
+                self.assertEqual(list(df['symbol']), [coin['symbol'] for coin in self.data])
+
+
+class TestRateLimit(unittest.TestCase):
+
+    def test_bucket_paces_requests(self):
+        bucket = TokenBucket(600, burst=2)
+        started = time.monotonic()
+        for _ in range(4):
+            bucket.acquire()
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.18)
+
+    def test_plan_names(self):
+        self.assertEqual(TokenBucket('standard').per_minute, 60)
+        with self.assertRaises(ValueError):
+            TokenBucket('free-lunch')
+
+    def test_bucket_per_settings(self):
+        with mock.patch.dict('coinsta.ratelimit._BUCKETS', clear=True):
+            shared = Current('key', rate_limit='standard').limiter
+            self.assertIs(Current('key', rate_limit=60).limiter, shared)
+
+            enterprise = Current('key', rate_limit='enterprise').limiter
+            self.assertIsNot(enterprise, shared)
+            self.assertEqual(enterprise.per_minute, 120)
+
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, 'key.lock')
+                self.assertEqual(Current('key', rate_limit=60, rate_limit_path=path).limiter.lock_path, path)
+
+    def test_shared_between_processes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'key.lock')
+            first, second = TokenBucket(60, burst=2, lock_path=path), TokenBucket(60, burst=2, lock_path=path)
+            first.acquire(2)
+
+            with mock.patch('coinsta.ratelimit.time.sleep', side_effect=StopIteration) as sleep:
+                with self.assertRaises(StopIteration):
+                    second.acquire()
+
+            self.assertGreater(sleep.call_args[0][0], 0.9)
+
+    def test_retry_after(self):
+        self.assertEqual(_retry_after('30'), 30.0)
+        self.assertEqual(_retry_after(None), 60.0)
+        self.assertEqual(_retry_after('soon'), 60.0)
+        self.assertEqual(_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0.0)
+
+        later = datetime.now(timezone.utc) + timedelta(seconds=120)
+        self.assertAlmostEqual(_retry_after(later.strftime('%a, %d %b %Y %H:%M:%S GMT')), 120, delta=2)
+
+    def test_rate_limit_carries_retry_after(self):
+        from coinsta.aio import AsyncClient, AsyncCurrent
+
+        body = json.dumps({'status': {'error_code': 1008, 'error_message': 'Rate limit reached.'}})
+        transport = mock.Mock()
+        transport.get.return_value.status_code = 429
+        transport.get.return_value.headers = {'Retry-After': '30'}
+        transport.get.return_value.text = body
+        with self.assertRaises(RateLimitError) as raised:
+            Current('key', transport=transport).get_current('btc')
+        self.assertEqual(raised.exception.retry_after, 30.0)
+
+        async def run(text):
+            with mock.patch.object(AsyncClient, 'get', mock.AsyncMock(return_value=(429, text, {'Retry-After': '12'}))):
+                await AsyncCurrent('key', client=AsyncClient()).get_current('btc')
+
+        for text in (body, '<html>'):
+            with self.assertRaises(RateLimitError) as raised:
+                asyncio.run(run(text))
+            self.assertEqual(raised.exception.retry_after, 12.0)
+
+    def test_credit_ledger(self):
+        response = dict(TestTransport.quote, status={'error_code': 0, 'credit_count': 2})
+        transport = mock.Mock()
+        transport.get.return_value.text = json.dumps(response)
+
+        ledger = CreditLedger()
+        cur = Current('key', transport=transport, credits=ledger, rate_limit=600)
+        cur.get_current('btc')
+        cur.get_current('eth')
+
+        self.assertEqual(ledger.total, 4)
+        self.assertEqual(ledger.by_endpoint(), {'cryptocurrency/quotes/latest': {'credits': 4, 'calls': 2}})
+
+
+class TestPoller(unittest.TestCase):
+
+    @staticmethod
+    def quotes(rows):
+        records = [{'symbol': s, 'id': i, 'price': p, 'last_updated': u, 'error': None} for s, i, p, u in rows]
+        records.append({'symbol': 'FAKE', 'id': None, 'price': None, 'last_updated': None, 'error': 'Invalid'})
+        return pd.DataFrame.from_records(records, index='symbol')
+
+    def test_only_changes_emitted(self):
+        current = mock.Mock()
+        current.get_current_many.side_effect = [
+            self.quotes([('BTC', 1, 100.0, '2020-01-01T00:00:00Z'), ('ETH', 1027, 10.0, '2020-01-01T00:00:00Z')]),
+            self.quotes([('BTC', 1, 100.0, '2020-01-01T00:00:00Z'), ('ETH', 1027, 11.0, '2020-01-01T00:00:00Z')]),
+            self.quotes([('BTC', 1, 100.0, '2020-01-01T00:01:00Z'), ('ETH', 1027, 11.0, '2020-01-01T00:00:00Z')]),
+            self.quotes([('BTC', 1, 100.0, '2020-01-01T00:01:00Z'), ('ETH', 1027, 11.0, '2020-01-01T00:00:00Z')]),
+        ]
+        poller = Poller(current, ['btc', 'eth', 'fake'])
+
+        self.assertEqual(list(poller.poll().index), ['BTC', 'ETH'])
+        self.assertEqual(list(poller.poll().index), ['ETH'])
+        self.assertEqual(list(poller.poll().index), ['BTC'])
+        self.assertEqual(len(poller.poll()), 0)
+
+    def test_price_tolerance(self):
+        current = mock.Mock()
+        current.get_current_many.side_effect = [
+            self.quotes([('BTC', 1, 100.0, '2020-01-01T00:00:00Z')]),
+            self.quotes([('BTC', 1, 100.05, '2020-01-01T00:00:00Z')]),
+        ]
+        poller = Poller(current, ['btc'], price_tolerance=0.001)
+        poller.poll()
+
+        self.assertEqual(len(poller.poll()), 0)
+
+    def test_aligned_to_wall_clock(self):
+        current = mock.Mock()
+        current.get_current_many.return_value = self.quotes([('BTC', 1, 100.0, '2020-01-01T00:00:00Z')])
+        poller = Poller(current, ['btc'], interval=60)
+
+        waits = []
+
+        def wait(delay):
+            waits.append(delay)
+            if len(waits) == 2:
+                poller.stop()
+
+        with mock.patch('coinsta.stream.time.time', side_effect=[125.0, 250.5]), \
+                mock.patch.object(poller._stop, 'wait', side_effect=wait):
+            deltas = list(poller)
+
+        self.assertEqual(len(deltas), 1)
+        self.assertEqual(waits, [55.0, 49.5])
+
+
+class TestConfig(unittest.TestCase):
+
+    def setUp(self):
+        previous = get_config()
+        self.addCleanup(set_config, previous)
+
+    def test_environment_and_defaults(self):
+        env = {'COINSTA_API_URL': 'http://proxy.local:8080/', 'COINSTA_TIMEOUT': '2.5'}
+        with mock.patch.dict(os.environ, env):
+            config = Config(retries=0)
+
+        self.assertEqual(config.api('cryptocurrency/quotes/latest'),
+                         'http://proxy.local:8080/v1/cryptocurrency/quotes/latest')
+        self.assertEqual(config.web_url, 'https://coinmarketcap.com')
+        self.assertEqual((config.timeout, config.retries), (2.5, 0))
+
+    def test_set_config_keeps_other_options(self):
+        set_config(Config(timeout=3))
+        config = set_config(web_url='http://mirror.local')
+
+        self.assertIs(get_config(), config)
+        self.assertEqual(config.timeout, 3)
+        self.assertEqual(config.snapshot_url(date(2018, 7, 29)), 'http://mirror.local/historical/20180729')
+
+    def test_current_uses_config(self):
+        set_config(api_url='http://global.local')
+        transport = mock.Mock()
+        transport.get.return_value.text = json.dumps({'status': {'error_code': 0}, 'data': {}})
+
+        Current('key', transport=transport).get_current('btc')
+        Current('key', transport=transport, config=Config(api_url='http://local.local')).get_current('btc')
+
+        urls = [call[0][0] for call in transport.get.call_args_list]
+        self.assertEqual(urls, ['http://global.local/v1/cryptocurrency/quotes/latest',
+                                'http://local.local/v1/cryptocurrency/quotes/latest'])
+
+
+class TestStandInServer(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StandInServer(error_rate=0.2, seed=1)
+        self.server.start()
+        self.addCleanup(self.server.stop)
+
+    def test_historical_through_flaky_upstream(self):
+        config = self.server.config(backoff=0)
+        self.addCleanup(config.transport.close)
+
+        with mock.patch('coinsta.core._ticker_checker', return_value='bitcoin'):
+            df = Historical('btc', date(2019, 1, 1), date(2019, 3, 31), config=config).get_data()
+
+        self.assertEqual(len(df), 90)
+        self.assertEqual(df.index[-1], pd.Timestamp(2019, 3, 31))
+
+    def test_current_through_flaky_upstream(self):
+        with Current('key', config=self.server.config(backoff=0)) as cur:
+            quotes = cur.get_current_many(['btc', 'eth', 'fake'])
+
+        self.assertEqual(quotes.loc['BTC', 'id'], 1)
+        self.assertTrue(pd.isnull(quotes.loc['ETH', 'error']))
+        self.assertGreater(self.server.requests, 0)
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StandInServer()
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.config = self.server.config()
+        self.addCleanup(self.config.transport.close)
+
+        self.events = []
+        add_hook(self.events.append)
+        self.addCleanup(remove_hook, self.events.append)
+
+    def test_get_data_phases(self):
+        with mock.patch('coinsta.core._ticker_checker', return_value='bitcoin'):
+            Historical('btc', date(2019, 1, 1), date(2019, 1, 31), config=self.config).get_data()
+
+        request = [e for e in self.events if e['event'] == 'request'][0]
+        self.assertEqual(request['status'], 200)
+        self.assertGreater(request['bytes'], 0)
+
+        phases = [(e['phase'], e.get('table')) for e in self.events if e['event'] == 'phase']
+        self.assertEqual(phases, [('slugs', None), ('parse', 'historical'), ('clean', 'historical'),
+                                  ('get_data', None)])
+
+    def test_cache_and_exporters(self):
+        prometheus = PrometheusExporter()
+        add_hook(prometheus)
+        self.addCleanup(remove_hook, prometheus)
+
+        exporter = add_hook(LogExporter())
+        self.addCleanup(remove_hook, exporter)
+
+        with Current('key', config=self.config, cache=ResponseCache()) as cur, \
+                self.assertLogs('coinsta', level='INFO') as logs:
+            cur.global_info()
+            cur.global_info()
+
+        metrics = prometheus.render()
+        self.assertIn('coinsta_cache_total{cache="responses",result="hit"} 1', metrics)
+        self.assertIn('coinsta_cache_total{cache="responses",result="miss"} 1', metrics)
+        self.assertIn('coinsta_requests_total{status="200"} 1', metrics)
+        self.assertIn('"event": "request"', '\n'.join(logs.output))
+
+
+class TestMultiCurrency(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StandInServer()
+        self.server.start()
+        self.addCleanup(self.server.stop)
+
+    def test_one_request_for_many_currencies(self):
+        with Current('key', currency=['usd', 'eur', 'btc'], config=self.server.config()) as cur:
+            quote = cur.get_current('btc')
+            quotes = cur.get_current_many(['btc', 'eth'])
+
+        self.assertEqual(self.server.requests, 2)
+        self.assertAlmostEqual(quote['EUR.price'], quote['USD.price'] * 0.9)
+        self.assertEqual(list(quotes.index.names), ['symbol', 'currency'])
+        self.assertEqual(len(quotes), 6)
+        self.assertAlmostEqual(quotes.loc[('ETH', 'EUR'), 'price'], quotes.loc[('ETH', 'USD'), 'price'] * 0.9)
+
+    def test_convert_limit_chunks_and_merges(self):
+        cache = ResponseCache()
+        with Current('key', currency='usd', config=self.server.config(), cache=cache, convert_limit=2) as cur:
+            single = cur.top_100(limit=3)
+            df = cur.top_100(limit=3, convert=['USD', 'EUR', 'GBP'])
+            again = cur.top_100(limit=3)
+
+        self.assertEqual([c for c in df.columns if c.endswith('.price')], ['USD.price', 'EUR.price', 'GBP.price'])
+        self.assertEqual(cur.credits.calls, 3)
+        pd.testing.assert_frame_equal(single, again)
+
+    def test_async_many_currencies(self):
+        from coinsta.aio import AsyncCurrent
+
+        async def run():
+            async with AsyncCurrent('key', currency=['usd', 'eur'], config=self.server.config(),
+                                    convert_limit=1) as cur:
+                return (await cur.get_current('btc'), await cur.get_current_many(['btc', 'eth']),
+                        await cur.global_info(convert='GBP'))
+
+        quote, quotes, info = asyncio.run(run())
+
+        self.assertAlmostEqual(quote['EUR.price'], quote['USD.price'] * 0.9)
+        self.assertEqual(list(quotes.index.names), ['symbol', 'currency'])
+        self.assertEqual(len(quotes), 4)
+        self.assertIn('total_market_cap', info)
+        self.assertEqual(self.server.requests, 5)
+
+
+class TestLazyImports(unittest.TestCase):
+
+    script = (
+        "import sys, coinsta.core\n"
+        "heavy = [m for m in ('pandas', 'numpy', 'lxml', 'requests') if m in sys.modules]\n"
+        "with coinsta.core.Current('key') as cur:\n"
+        "    quote, info = cur.get_current('btc'), cur.global_info()\n"
+        "assert quote['symbol'] == 'BTC' and 'btc_dominance' in info\n"
+        "print(heavy, [m for m in ('pandas', 'numpy', 'lxml') if m in sys.modules])\n"
+    )
+
+    def test_dict_paths_without_pandas(self):
+        with StandInServer() as server:
+            env = dict(os.environ, COINSTA_API_URL=server.url)
+            output = subprocess.check_output([sys.executable, '-c', self.script], env=env,
+                                             cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+        self.assertEqual(output.decode().strip(), '[] []')
+
+
+class TestAnalytics(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(7)
+        dates = pd.date_range('2018-01-01', periods=120, name='Date')
+        prices = np.exp(np.cumsum(rng.normal(0, 0.05, (120, 4)), axis=0)) * 100
+        prices[rng.rand(120, 4) < 0.1] = np.nan
+
+        self.wide = pd.DataFrame(prices, index=dates, columns=['btc', 'eth', 'ltc', 'xrp'])
+        panel = self.wide.stack().swaplevel().sort_index()
+        self.panel = panel.rename_axis(['ticker', 'Date']).to_frame('Close')
+
+    def test_matches_pandas(self):
+        panel = Panel.from_frame(self.panel)
+        returns = np.log(self.wide / self.wide.shift())
+
+        pd.testing.assert_frame_equal(panel.log_returns(), returns, check_freq=False)
+        pd.testing.assert_frame_equal(panel.rolling_std(20), returns.rolling(20).std(), check_freq=False)
+        pd.testing.assert_frame_equal(panel.drawdown(), self.wide / self.wide.cummax() - 1, check_freq=False)
+        pd.testing.assert_frame_equal(panel.corr(), returns.corr(), check_names=False)
+        pd.testing.assert_frame_equal(panel.cov(window=30), returns.iloc[-30:].cov(), check_names=False)
+
+    def test_incremental_append(self):
+        dates = self.panel.index.get_level_values('Date')
+        full = Panel.from_frame(self.panel)
+        panel = Panel.from_frame(self.panel[dates < '2018-03-01'])
+
+        # The first appended day replaces the last day of the panel
+        panel.append(self.panel[dates >= '2018-02-28'])
+
+        self.assertEqual(len(panel), 120)
+        np.testing.assert_allclose(panel.rolling_mean(10).values, full.rolling_mean(10).values)
+        np.testing.assert_allclose(panel.max_drawdown().values, full.max_drawdown().values)
+
+        early = pd.MultiIndex.from_tuples([('btc', pd.Timestamp('2017-12-01'))], names=['ticker', 'Date'])
+        with self.assertRaises(ValueError):
+            panel.append(pd.DataFrame({'Close': [1.0]}, index=early))
+
+    def test_new_ticker_appended(self):
+        panel = Panel.from_frame(self.panel)
+        new_day = pd.MultiIndex.from_tuples([('btc', pd.Timestamp('2018-05-01')), ('doge', pd.Timestamp('2018-05-01'))],
+                                            names=['ticker', 'Date'])
+        panel.append(pd.DataFrame({'Close': [1.0, 2.0]}, index=new_day))
+
+        self.assertEqual(list(panel.tickers), ['btc', 'eth', 'ltc', 'xrp', 'doge'])
+        self.assertEqual(panel.prices.shape, (121, 5))
+        self.assertTrue(np.isnan(panel.prices[:-1, -1]).all())
+        self.assertFalse(panel.prices.flags.writeable)
+
+
+class TestBackfill(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.server = StandInServer()
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.config = self.server.config(backoff=0)
+        self.addCleanup(self.config.transport.close)
+
+    def test_resumable_backfill(self):
+        reports = []
+        store = backfill(date(2018, 1, 1), date(2018, 3, 31), self.tmp.name, processes=0, segment_size=5,
+                         progress=reports.append, config=self.config)
+
+        self.assertEqual(len(store.periods()), 12)
+        self.assertEqual(len(reports), 12)
+        self.assertEqual(len(store.segments()), 3)
+
+        requests = self.server.requests
+        store = backfill(date(2018, 1, 1), date(2018, 4, 30), self.tmp.name, processes=0, config=self.config)
+        self.assertEqual(self.server.requests - requests, 5)
+        self.assertEqual(store.periods()[-1], date(2018, 4, 29))
+
+    def test_pages_in_flight_bounded(self):
+        from coinsta import backfill as module
+        held, peak = [0], [0]
+        download, parse = module._download_page, module._parse_snapshot_page
+
+        def slow_download(period, config=None):
+            page = download(period, config)
+            held[0] += 1
+            peak[0] = max(peak[0], held[0])
+            return page
+
+        def slow_parse(page):
+            time.sleep(0.02)
+            held[0] -= 1
+            return parse(page)
+
+        with mock.patch('coinsta.backfill._download_page', side_effect=slow_download), \
+                mock.patch('coinsta.backfill._parse_snapshot_page', side_effect=slow_parse):
+            store = backfill(date(2018, 1, 1), date(2018, 3, 31), self.tmp.name, workers=2, processes=0,
+                             config=self.config)
+
+        self.assertEqual(len(store.periods()), 12)
+        self.assertLessEqual(peak[0], 2)
+
+    def test_read_range(self):
+        backfill(date(2018, 1, 1), date(2018, 2, 28), self.tmp.name, processes=1, config=self.config)
+        store = SnapshotStore(self.tmp.name)
+
+        segment = store.segments(['coin_id', 'price'])[0]
+        self.assertIsInstance(segment['price'], np.memmap)
+        self.assertEqual(segment['coin_id'].dtype, np.int32)
+
+        df = store.read(date(2018, 2, 1), date(2018, 2, 28), columns=['rank', 'price'])
+        self.assertEqual(list(df.columns), ['period', 'coin_id', 'symbol', 'name', 'rank', 'price'])
+        self.assertEqual(df['period'].nunique(), 4)
+        self.assertEqual(df.loc[df['symbol'] == 'BTC', 'price'].iloc[0], 8200.0)
+        self.assertEqual(len(store.symbols), 10)
+
+
+class TestErrors(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.dict(_SLUG_DIRECTORY._unavailable)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def http_error(status):
+        import requests
+        response = requests.Response()
+        response.status_code, response.url = status, 'https://coinmarketcap.com/currencies/fakecoin/'
+        return requests.exceptions.HTTPError(response=response)
+
+    def test_classification(self):
+        self.assertTrue(is_retryable(ConnectionError('reset by peer')))
+        self.assertTrue(is_retryable(self.http_error(503)))
+        self.assertFalse(is_retryable(self.http_error(404)))
+        self.assertFalse(is_retryable(BadSnapshotURL()))
+        self.assertFalse(is_retryable(ValueError('No tables found')))
+
+        import requests
+        self.assertTrue(is_retryable(requests.exceptions.ConnectionError('reset by peer')))
+        self.assertTrue(is_retryable(requests.exceptions.ReadTimeout()))
+        for error in (requests.exceptions.MissingSchema(), requests.exceptions.InvalidURL(),
+                      requests.exceptions.TooManyRedirects(), requests.exceptions.InvalidHeader(),
+                      requests.exceptions.ContentDecodingError(), PermissionError()):
+            self.assertFalse(is_retryable(error), error)
+
+        self.assertEqual(_check_api_status({'status': {'error_code': 400}}), 400)
+        with self.assertRaises(ApiKeyError):
+            _check_api_status({'status': {'error_code': 1002, 'error_message': 'API key missing.'}})
+        with self.assertRaises(RateLimitError):
+            _check_api_status({'status': {'error_code': 1008}})
+
+    def test_unknown_ticker(self):
+        with mock.patch.object(_SLUG_DIRECTORY, 'lookup', return_value=None):
+            with self.assertWarns(UnknownTickerWarning):
+                self.assertEqual(_ticker_checker('FAKECOIN'), 'fakecoin')
+
+            with self.assertRaises(WrongCoinCode):
+                _ticker_checker('fakecoin', strict=True)
+
+    def test_missing_page_fails_fast(self):
+        with mock.patch.object(_SLUG_DIRECTORY, 'lookup', return_value=None), \
+                mock.patch('coinsta.core._stream_html', side_effect=self.http_error(404)) as stream:
+            historical = Historical('fakecoin', date(2018, 1, 1), date(2018, 1, 10))
+            with self.assertWarns(UnknownTickerWarning), self.assertRaises(WrongCoinCode):
+                historical.get_data()
+            with self.assertRaises(WrongCoinCode):
+                historical.get_data()
+
+        self.assertEqual(stream.call_count, 1)
+
+    def test_server_error_is_transient(self):
+        with mock.patch('coinsta.core._ticker_checker', return_value='bitcoin'), \
+                mock.patch('coinsta.core._stream_html', side_effect=self.http_error(503)):
+            with self.assertRaises(TransientError):
+                Historical('btc', date(2018, 1, 1), date(2018, 1, 10)).get_data()
+
+        self.assertFalse(_SLUG_DIRECTORY.is_unavailable('bitcoin'))
+
+    def test_refused_request_keeps_ticker(self):
+        with mock.patch('coinsta.core._ticker_checker', return_value='bitcoin'), \
+                mock.patch('coinsta.core._stream_html', side_effect=self.http_error(403)):
+            with self.assertRaises(AccessDenied) as raised:
+                Historical('btc', date(2018, 1, 1), date(2018, 1, 10)).get_data()
+
+        self.assertNotIsInstance(raised.exception, WrongCoinCode)
+        self.assertFalse(is_retryable(raised.exception))
+        self.assertFalse(_SLUG_DIRECTORY.is_unavailable('bitcoin'))
+
+    def test_missing_page_is_per_site(self):
+        mirror = Config(web_url='http://mirror.local')
+        with mock.patch('coinsta.core._ticker_checker', return_value='fakecoin'), \
+                mock.patch('coinsta.core._stream_html', side_effect=self.http_error(410)):
+            with self.assertRaises(WrongCoinCode):
+                Historical('fakecoin', date(2018, 1, 1), date(2018, 1, 10), config=mirror).get_data()
+
+        self.assertTrue(_SLUG_DIRECTORY.is_unavailable('fakecoin', mirror))
+        self.assertFalse(_SLUG_DIRECTORY.is_unavailable('fakecoin', Config(web_url='http://other.local')))
+
+    def test_api_error_page(self):
+        from coinsta.aio import AsyncClient, AsyncCurrent
+
+        async def run(status):
+            with mock.patch.object(AsyncClient, 'get', mock.AsyncMock(return_value=(status, '<html>', {}))):
+                await AsyncCurrent('key', client=AsyncClient()).get_current('btc')
+
+        with self.assertRaises(TransientError):
+            asyncio.run(run(502))
+        with self.assertRaises(CoinstaError) as raised:
+            asyncio.run(run(404))
+        self.assertFalse(is_retryable(raised.exception))
+
+    def test_unknown_ticker_in_bulk(self):
+        _SLUG_DIRECTORY.mark_unavailable('fake')
+        reports = []
+        with mock.patch.object(_SLUG_DIRECTORY, 'lookup', side_effect=lambda t, config=None: t), \
+                mock.patch.object(_SLUG_DIRECTORY, 'warm'), \
+                mock.patch('coinsta.core._download_history_table', side_effect=TestHistoricalMany.fake_table) as fetch:
+            df = Historical.get_many(['fake', 'btc'], date(2018, 1, 1), date(2018, 1, 31), rate=None,
+                                     progress=reports.append, errors='ignore')
+
+            with self.assertRaises(WrongCoinCode):
+                Historical.get_many(['fake', 'btc'], date(2018, 1, 1), date(2018, 1, 31), rate=None)
+
+        self.assertEqual([c[0][0] for c in fetch.call_args_list], ['btc'])
+        self.assertEqual(list(df.index.get_level_values('ticker').unique()), ['btc'])
+        self.assertIsInstance([r for r in reports if r['ticker'] == 'fake'][0]['error'], WrongCoinCode)
+
+    def test_unreachable_directory_fails_job(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        reports = []
+        with StandInServer(error_rate=1) as server, mock.patch('coinsta.core.time.sleep') as sleep, \
+                mock.patch.object(_SLUG_DIRECTORY, '_path', os.path.join(tmp.name, 'slugs.json')), \
+                mock.patch.dict(_SLUG_DIRECTORY._indexes), mock.patch.dict(_SLUG_DIRECTORY._fetched_at):
+            config = server.config(retries=0)
+            self.addCleanup(config.transport.close)
+
+            with self.assertRaises(TransientError):
+                Historical.get_many(['btc', 'eth', 'xrp'], date(2018, 1, 1), date(2018, 1, 31), retries=2,
+                                    progress=reports.append, errors='ignore', config=config)
+
+            self.assertEqual(server.requests, 3)
+        self.assertEqual(sleep.call_count, 2)
+        self.assertEqual(reports, [])
+
+    def test_permanent_error_stops_ticker(self):
+        def download(slug, start, end, config=None):
+            if slug == 'fake':
+                raise WrongCoinCode(slug)
+            return TestHistoricalMany.fake_table(slug, start, end)
+
+        with mock.patch('coinsta.core._ticker_checker', side_effect=lambda t, strict=False, config=None: t), \
+                mock.patch.object(_SLUG_DIRECTORY, 'warm'), \
+                mock.patch('coinsta.core._download_history_table', side_effect=download) as fetch, \
+                mock.patch('coinsta.core.time.sleep') as sleep:
+            df = Historical.get_many(['fake', 'btc'], date(2018, 1, 1), date(2018, 3, 1), workers=1, chunk_days=10,
+                                     rate=None, errors='ignore')
+
+        self.assertEqual([c[0][0] for c in fetch.call_args_list].count('fake'), 1)
+        self.assertEqual(list(df.index.get_level_values('ticker').unique()), ['btc'])
+        sleep.assert_not_called()
+
+
+class TestCli(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.server = StandInServer()
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.addCleanup(set_config, get_config())
+        config = set_config(self.server.config(backoff=0))
+        self.addCleanup(config.transport.close)
+
+    def run_cli(self, *argv):
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            status = main(list(argv))
+        return status, stderr.getvalue()
+
+    def test_history_resumes(self):
+        out = os.path.join(self.tmp.name, 'history')
+        argv = ['history', '--tickers', 'btc', 'eth', '--start', '2019-01-01', '--end', '2019-01-31', '--out', out]
+
+        with mock.patch('coinsta.core._ticker_checker', side_effect=lambda t, strict=False, config=None: t):
+            status, _ = self.run_cli(*argv)
+            self.assertEqual(status, 0)
+            self.assertEqual(sorted(os.listdir(out)), ['.coinsta-checkpoint.json', 'btc.csv', 'eth.csv'])
+
+            df = pd.read_csv(os.path.join(out, 'btc.csv'), index_col='Date')
+            self.assertEqual(len(df), 31)
+            self.assertEqual(list(df.columns), ['Open', 'High', 'Low', 'Close', 'Volume', 'Market_cap'])
+
+            requests = self.server.requests
+            status, report = self.run_cli(*argv)
+            self.assertEqual(status, 0)
+            self.assertEqual(self.server.requests, requests)
+            self.assertIn('2 already exported', report)
+
+    def test_history_strict_unknown_ticker(self):
+        out = os.path.join(self.tmp.name, 'history')
+        with mock.patch.object(_SLUG_DIRECTORY, '_path', os.path.join(self.tmp.name, 'slugs.json')), \
+                mock.patch.dict(_SLUG_DIRECTORY._indexes), mock.patch.dict(_SLUG_DIRECTORY._fetched_at):
+            status, report = self.run_cli('history', '--tickers', 'fakecoin', 'btc', 'eth', '--start', '2019-01-01',
+                                          '--end', '2019-01-31', '--out', out, '--batch-size', '1', '--strict')
+
+        self.assertEqual(status, 1)
+        self.assertIn('fakecoin: failed', report)
+        self.assertEqual(sorted(os.listdir(out)), ['.coinsta-checkpoint.json', 'btc.csv', 'eth.csv'])
+
+    def test_snapshots_and_quotes(self):
+        out = os.path.join(self.tmp.name, 'snapshots')
+        status, _ = self.run_cli('snapshots', '--start', '2018-01-01', '--end', '2018-01-31', '--out', out,
+                                 '--format', 'ndjson')
+        self.assertEqual(status, 0)
+        self.assertEqual(len([name for name in os.listdir(out) if name.endswith('.ndjson')]), 4)
+
+        path = os.path.join(self.tmp.name, 'quotes.csv')
+        status, _ = self.run_cli('quotes', '--tickers', 'btc', 'eth', '--api-key', 'key', '--out', path)
+        self.assertEqual(status, 0)
+        self.assertEqual(list(pd.read_csv(path)['symbol']), ['BTC', 'ETH'])
+
+        with mock.patch.dict(os.environ, {'COINSTA_API_KEY': ''}):
+            status, report = self.run_cli('quotes', '--tickers', 'btc', '--out', path)
+        self.assertEqual(status, 1)
+        self.assertIn('No API key', report)
+
+
 if __name__ == '__main__':
     unittest.main()